@@ -0,0 +1,34 @@
+import sys
+import os
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import socket
+import argparse
+import multiprocessing as mp
+from GuandanAgent.engine.rl.distributed import run_actor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Self-play actor for a remote learner (train.py --listen)')
+    parser.add_argument('coordinator', type=str, help='Coordinator address HOST:PORT')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='Actor processes on this host')
+    parser.add_argument('--games', type=int, default=None, help='Games per process before exiting (default: until stopped)')
+    parser.add_argument('--name', type=str, default=socket.gethostname(), help='Actor id prefix (default: hostname)')
+    args = parser.parse_args()
+
+    host, port = args.coordinator.rsplit(':', 1)
+    ctx = mp.get_context("spawn")
+    processes = [ctx.Process(target=run_actor, args=(host, int(port), f"{args.name}-{i}", args.games),
+                             name=f"actor-{i}") for i in range(args.processes)]
+    for p in processes:
+        p.start()
+    print(f"Started {len(processes)} actors for {host}:{port}")
+    try:
+        for p in processes:
+            p.join()
+    except KeyboardInterrupt:
+        for p in processes:
+            p.terminate()
+    print("Actors stopped")
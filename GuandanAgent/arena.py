@@ -0,0 +1,62 @@
+import sys
+import os
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import time
+import argparse
+from GuandanAgent.engine.rl.arena import schedule, run_games, elo_ratings, score_matrix, format_table
+
+
+def competitor_name(spec):
+    if spec.startswith("registry:"):
+        return f"v{spec.split(':', 1)[1]}"
+    return os.path.splitext(os.path.basename(spec))[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Round-robin arena with Elo ratings')
+    parser.add_argument('competitors', nargs='*', default=[],
+                        help='Checkpoints (.npz/.pth) or registry:<version>')
+    parser.add_argument('--baselines', nargs='*', default=['simple', 'heuristic'], choices=['simple', 'heuristic'],
+                        help='Rule-based baselines to include (default: simple heuristic)')
+    parser.add_argument('--games', type=int, default=200, help='Games per pair, half of them seat-swapped (default: 200)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (0 = in process)')
+    parser.add_argument('--seed', type=int, default=0, help='First deal seed')
+    parser.add_argument('--checkpoint-policy', type=str, default='greedy', choices=['greedy', 'mcts'],
+                        help='How checkpoints pick moves: 1-ply value greedy or value-network MCTS')
+    parser.add_argument('--simulations', type=int, default=50, help='MCTS simulations per move')
+    parser.add_argument('--registry', type=str, default=os.path.join(os.path.dirname(__file__), 'models'),
+                        help='Model registry directory for registry:<version> competitors')
+    parser.add_argument('--anchor', type=str, default=None, help='Competitor rated 1000 (default: first)')
+    parser.add_argument('--bootstrap', type=int, default=200, help='Bootstrap samples for the intervals')
+    parser.add_argument('--out', type=str, default=None, help='Optional JSON file for ratings and raw results')
+    args = parser.parse_args()
+
+    specs = list(args.baselines) + list(args.competitors)
+    if len(specs) < 2:
+        parser.error("need at least two competitors")
+    names = [competitor_name(s) for s in specs]
+    anchor = names.index(args.anchor) if args.anchor else 0
+    options = {"checkpoint_policy": args.checkpoint_policy, "simulations": args.simulations,
+               "registry_dir": args.registry}
+
+    tasks = schedule(len(specs), args.games, seed=args.seed)
+    print(f"Arena: {len(specs)} competitors, {len(tasks)} games on {args.workers} workers")
+    start = time.time()
+
+    def progress(done, total):
+        if done % 100 == 0 or done == total:
+            elapsed = time.time() - start
+            print(f"  {done}/{total} games ({done / elapsed:.1f} games/sec)")
+
+    results = run_games(specs, tasks, workers=args.workers, options=options, progress=progress)
+    table = elo_ratings(results, names, anchor=anchor, bootstrap=args.bootstrap, seed=args.seed)
+    print(format_table(table, names, score_matrix(results, len(specs))))
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({"competitors": dict(zip(names, specs)), "ratings": table, "results": results}, f, indent=2)
+        print(f"Saved results to {args.out}")
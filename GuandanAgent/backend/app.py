@@ -1,13 +1,30 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.routers.health import router as health_router
 from backend.routers.deal import router as deal_router
 from backend.routers.ai import router as ai_router
 from backend.routers.training import router as training_router
+from backend.decisions import configure_logging, get_decision_pool, get_decision_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start and warm the decision workers before serving, so the first
+    # suggest_move does not pay for process start-up and imports
+    configure_logging()
+    get_decision_service()
+    pool = get_decision_pool()
+    await asyncio.to_thread(pool.start)
+    print(f"Decision pool ready: {pool.workers} workers, queue {pool.queue_size}")
+    yield
+    pool.shutdown()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -0,0 +1,492 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+# engine.rl (behind engine.ai_strategy) imports the GuandanAgent package, as train.py does
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+
+class DecisionBusy(Exception):
+    """Every worker is busy and the wait queue is full."""
+
+
+class DecisionTimeout(Exception):
+    """The decision did not finish within the request timeout."""
+
+
+class InvalidCards(ValueError):
+    """A card in the request could not be converted."""
+
+
+# --- Worker side (runs in the pool processes) ---
+
+# Minimum time (ms) worth starting each search for; with less left, decide_move answers
+MIN_BUDGET_MS = {"MCTS": 200.0, "LLM": 2000.0}
+# Kept back from the deadline: MCTS overshoots by up to one rollout, then the answer goes back to the server
+DEADLINE_MARGIN_MS = 100.0
+
+# Frontend suit names ("HEARTS" -> "H")
+SUIT_ALIASES = {"HEARTS": "H", "DIAMONDS": "D", "SPADES": "S", "CLUBS": "C", "JOKER": "J"}
+
+
+class DecisionService:
+    """
+    Everything suggest_move needs, resolved once per process: the strategy
+    entry point, the 54 interned Card objects keyed by every accepted
+    (suit, rank) spelling, and the level-promoted rank tables for all 13
+    levels. Per request it only converts, decides and serializes.
+    """
+
+    def __init__(self):
+        from engine.cards import standard_deck
+        from engine.logic import get_rank_value
+        from engine.simple_strategy import decide_move, LEVEL_RANK_VALUES
+        self._decide_move = decide_move
+        self._rank_value = get_rank_value
+        self.level_tables = LEVEL_RANK_VALUES
+        self._ai_strategy = None  # imported on first MCTS / LLM request
+        self.deck = standard_deck()
+        self.cards = {}
+        for card in self.deck:
+            self.cards[(card.suit.value, card.rank.value)] = card
+        for name, suit in SUIT_ALIASES.items():
+            for card in self.deck:
+                if card.suit.value == suit:
+                    self.cards[(name, card.rank.value)] = card
+
+    def card(self, data: Dict[str, str]):
+        """{"suit", "rank"} -> interned Card; the exact spelling is one dict lookup."""
+        try:
+            return self.cards[(data["suit"], data["rank"])]
+        except (KeyError, TypeError):
+            pass
+        try:
+            suit = str(data["suit"]).upper()
+            return self.cards[(SUIT_ALIASES.get(suit, suit), str(data["rank"]).upper())]
+        except (KeyError, TypeError, AttributeError):
+            raise InvalidCards(f"Invalid card format: {data!r}") from None
+
+    def to_cards(self, cards: List[Dict[str, str]]):
+        return [self.card(c) for c in cards]
+
+    def rank_value(self, card, level: Optional[int] = None) -> int:
+        """Plain rank value, or the level-promoted one when `level` is given."""
+        table = self.level_tables.get(level)
+        return table.get(card.rank.value, 0) if table is not None else self._rank_value(card.rank.value)
+
+    def _card_key(self, data) -> Tuple[str, str]:
+        card = self.card(data) if isinstance(data, dict) else data
+        return getattr(card.suit, "value", card.suit), getattr(card.rank, "value", card.rank)
+
+    def canonical_key(self, payload: Dict[str, Any]) -> Optional[tuple]:
+        """
+        Cache key of a decision request, equal for requests decide_move
+        cannot tell apart: the hand as a sorted multiset in canonical
+        spelling, last_play reduced to what the strategy reads (type, cards
+        in play order, who played it relative to us), level and seat.
+        None when the request has cards that do not convert.
+        """
+        try:
+            hand = tuple(sorted(self._card_key(c) for c in payload["hand"]))
+            last_play = payload.get("last_play")
+            player = payload.get("player_index", -1)
+            play_key = None
+            if last_play:
+                last_idx = last_play.get("player_index")
+                if player == -1 or last_idx is None:
+                    relation = "unknown"
+                elif last_idx == player:
+                    relation = "self"
+                else:
+                    relation = "partner" if (last_idx - player) % 2 == 0 else "opponent"
+                play_key = (str(last_play.get("type")),
+                            tuple(self._card_key(c) for c in last_play.get("cards", [])), relation)
+        except (InvalidCards, KeyError, TypeError, AttributeError):
+            return None
+        return hand, play_key, payload.get("level", 2), player
+
+    def _serialize_cards(self, cards) -> List[Dict[str, str]]:
+        return [dict(zip(("suit", "rank"), self._card_key(c))) for c in cards or []]
+
+    def decide(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        One decision on plain data (picklable both ways):
+        payload {"hand": [{"suit", "rank"}], "last_play": dict | None, "level", "player_index",
+                 "algorithm": "HappyGuandan" | "MCTS" | "LLM", "deadline": time.time() due}
+        -> {"action", "cards": [{"suit", "rank"}], "type", "desc", "algorithm", "reasoning", ...}
+
+        MCTS and LLM get what is left of the deadline once the request
+        reaches a worker (queueing included), minus DEADLINE_MARGIN_MS for
+        getting the answer back. If that is under the algorithm's minimum,
+        decide_move answers instead.
+        """
+        hand = self.to_cards(payload["hand"])
+        last_play = payload.get("last_play")
+        if last_play and "cards" in last_play:
+            last_play = dict(last_play, cards=[c if not isinstance(c, dict) else self.card(c)
+                                               for c in last_play["cards"]])
+        level = payload.get("level", 2)
+        player = payload.get("player_index", -1)
+        algorithm = payload.get("algorithm") or "HappyGuandan"
+        reasoning = "HappyGuandan Strategy (Reverse Iter + Partner Logic)"
+
+        if algorithm in MIN_BUDGET_MS:
+            if self._ai_strategy is None:
+                # First search in this worker: the import counts against the deadline
+                from engine import ai_strategy
+                self._ai_strategy = ai_strategy
+            deadline = payload.get("deadline")
+            remaining_ms = None if deadline is None else (deadline - time.time()) * 1000.0 - DEADLINE_MARGIN_MS
+            if remaining_ms is None or remaining_ms >= MIN_BUDGET_MS[algorithm]:
+                return self._search(algorithm, hand, last_play, level, player, remaining_ms)
+            reasoning = f"{algorithm} skipped: {max(remaining_ms, 0):.0f} ms left before the deadline. " + reasoning
+
+        decision = self._decide_move(hand=hand, last_play=last_play, current_level=level,
+                                     my_player_index=player)
+        return {
+            "action": decision.get("action"),
+            "cards": self._serialize_cards(decision.get("cards")),
+            "type": decision.get("type"),
+            "desc": decision.get("desc"),
+            "algorithm": "HappyGuandan",
+            "reasoning": reasoning,
+        }
+
+    def _search(self, algorithm: str, hand, last_play, level: int, player: int,
+                budget_ms: Optional[float]) -> Dict[str, Any]:
+        """engine.ai_strategy's MCTS / LLM strategies, held to `budget_ms`."""
+        state = SimpleNamespace(my_hand=hand, last_play=last_play, current_level=level, player_index=player)
+        if algorithm == "MCTS":
+            result = self._ai_strategy.mcts_strategy(state, max_time_ms=budget_ms)
+        else:
+            timeout = 10.0 if budget_ms is None else min(10.0, budget_ms / 1000.0)
+            result = self._ai_strategy.llm_strategy(state, timeout=timeout)
+        return {
+            "action": result.get("action"),
+            "cards": self._serialize_cards(result.get("cards")),
+            "type": result.get("type"),
+            "desc": result.get("message") or result.get("desc"),
+            "algorithm": algorithm,
+            "reasoning": result.get("reasoning"),
+            "win_rate": result.get("win_rate"),
+            "visits": result.get("visits"),
+        }
+
+
+_service: Optional[DecisionService] = None
+
+
+def get_decision_service() -> DecisionService:
+    global _service
+    if _service is None:
+        _service = DecisionService()
+    return _service
+
+
+def decide(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return get_decision_service().decide(payload)
+
+
+def decide_many(payloads: List[Dict[str, Any]]) -> List[Any]:
+    """decide() over a chunk of a batch; a failing item yields its exception instead of a move."""
+    service = get_decision_service()
+    results = []
+    for payload in payloads:
+        try:
+            results.append(service.decide(payload))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _warm_worker():
+    """Pool initializer: build the service and run one decision so first requests are not cold."""
+    service = get_decision_service()
+    hand = [{"suit": c.suit.value, "rank": c.rank.value} for c in service.deck[::2]]
+    service.decide({"hand": hand, "last_play": None, "level": 2, "player_index": 0})
+
+
+def configure_logging(filename: str = "backend_ai_debug.log"):
+    """Decision errors go to a log file; called once at app startup."""
+    logging.basicConfig(filename=filename, level=logging.ERROR,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+# --- Server side ---
+
+# Algorithms whose answer is a pure function of the request; anything
+# sampled (MCTS rollouts, LLM) must be recomputed every time
+CACHEABLE_ALGORITHMS = {"HappyGuandan"}
+
+
+class DecisionCache:
+    """
+    Bounded LRU with a TTL, in front of the decision pool (server process,
+    so a hit costs a key build and a dict lookup, no IPC). Keyed by
+    (algorithm, DecisionService.canonical_key); only algorithms in
+    CACHEABLE_ALGORITHMS are stored, and only real decisions (never the
+    fallback move given on errors or timeouts).
+    """
+
+    def __init__(self, capacity: int = 10_000, ttl: float = 300.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+    @staticmethod
+    def key(algorithm: str, payload: Dict[str, Any]) -> Optional[tuple]:
+        if algorithm not in CACHEABLE_ALGORITHMS:
+            return None
+        state_key = get_decision_service().canonical_key(payload)
+        return (algorithm, state_key) if state_key is not None else None
+
+    def get(self, key: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        if key is None or self.capacity <= 0:
+            self.uncacheable += 1
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Optional[tuple], decision: Dict[str, Any]):
+        if key is None or self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, decision)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "uncacheable": self.uncacheable,
+        }
+
+
+class DecisionPool:
+    """
+    Pre-warmed worker processes for suggest_move, so the CPU-bound partition
+    search never runs on the event loop.
+
+    - bounded: at most `workers + queue_size` requests in flight, beyond that
+      submit() raises DecisionBusy at once (the router answers 503)
+    - per-request timeout: DecisionTimeout after `timeout` seconds
+    - cancellation: a request that times out or whose client goes away has
+      its task cancelled if it has not started; a task already running
+      finishes in its worker and keeps its slot until then, so the pool is
+      never oversubscribed
+    workers=0 runs decisions on a thread pool instead (tests, tiny hosts).
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None, timeout: float = 5.0):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.queue_size = 4 * max(self.workers, 1) if queue_size is None else queue_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1) + self.queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _make_executor(self):
+        if self.workers <= 0:
+            return ThreadPoolExecutor(max_workers=1, thread_name_prefix="decision", initializer=_warm_worker)
+        # spawn: uvicorn's process may hold threads; workers import the engine fresh
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                                   initializer=_warm_worker)
+
+    def start(self, warm: bool = True):
+        """Create the pool; with `warm`, block until every worker has run its warm-up."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._make_executor()
+                executor = self._executor
+            else:
+                return self
+        if warm:
+            # One no-op per worker forces them all to start (and run the initializer)
+            futures = [executor.submit(os.getpid) for _ in range(max(self.workers, 1))]
+            for f in futures:
+                f.result()
+        return self
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args) -> Future:
+        if self._executor is None:
+            self.start(warm=False)
+        try:
+            return self._executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed): replace the pool once
+            with self._lock:
+                broken, self._executor = self._executor, self._make_executor()
+            broken.shutdown(wait=False, cancel_futures=True)
+            return self._executor.submit(fn, *args)
+
+    async def run(self, fn, *args, timeout: Optional[float] = None):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise DecisionBusy("decision pool is full")
+        try:
+            future = self._submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the work really ends, not when the caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            self.timeouts += 1
+            raise DecisionTimeout(f"decision took longer than {timeout or self.timeout:.1f}s") from None
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        self.completed += 1
+        return result
+
+    async def decide(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self.run(decide, payload, timeout=timeout)
+
+    async def _decide_chunk(self, start: int, payloads: List[Dict[str, Any]], timeout: float):
+        """
+        (start, results) for one chunk; waits for a free slot instead of
+        failing when the pool is busy. The wait is also capped by the latest
+        payload "deadline" (time.time()) in the chunk, and a state answered
+        after its own deadline gets DecisionTimeout, like a single request.
+        """
+        deadlines = [p.get("deadline") for p in payloads]
+        if all(d is not None for d in deadlines):
+            timeout = min(timeout, max(deadlines) - time.time())
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + timeout
+        results = None
+        error: Exception = DecisionTimeout("deadline passed before the decision started")
+        while results is None and loop.time() < give_up:
+            try:
+                results = await self.run(decide_many, payloads, timeout=give_up - loop.time())
+            except DecisionBusy as e:
+                error = e
+                await asyncio.sleep(0.02)
+            except DecisionTimeout as e:
+                error = e
+                break
+        if results is None:
+            return start, [error] * len(payloads)
+        now = time.time()
+        late = DecisionTimeout("decision finished after its deadline")
+        return start, [late if d is not None and d <= now else r for d, r in zip(deadlines, results)]
+
+    async def decide_batch(self, payloads: List[Dict[str, Any]], chunk_size: Optional[int] = None,
+                           timeout: Optional[float] = None):
+        """
+        Async generator of (index, move or exception) as chunks finish.
+
+        The batch is cut into chunks of `chunk_size` states (one pool task
+        each, so a batch takes one slot per chunk rather than per state),
+        with at most `workers` chunks in flight: a large batch shares the
+        pool with single requests instead of filling its queue. Each chunk
+        gets `timeout` per state, capped by its states' deadlines. Closing
+        the generator cancels what has not run yet.
+        """
+        width = max(self.workers, 1)
+        if chunk_size is None:
+            chunk_size = max(1, min(16, -(-len(payloads) // width)))
+        per_state = timeout or self.timeout
+        chunks = iter([(i, payloads[i:i + chunk_size]) for i in range(0, len(payloads), chunk_size)])
+        pending = set()
+
+        def launch():
+            chunk = next(chunks, None)
+            if chunk is not None:
+                start, items = chunk
+                pending.add(asyncio.ensure_future(self._decide_chunk(start, items, per_state * len(items))))
+
+        for _ in range(width):
+            launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    start, results = task.result()
+                    launch()
+                    for offset, result in enumerate(results):
+                        yield start + offset, result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "queue_size": self.queue_size, "completed": self.completed,
+                "rejected": self.rejected, "timeouts": self.timeouts}
+
+
+_pool: Optional[DecisionPool] = None
+_cache: Optional[DecisionCache] = None
+
+
+def get_decision_pool() -> DecisionPool:
+    """Process-wide pool, configured from GUANDAN_DECISION_WORKERS / _QUEUE / _TIMEOUT_MS."""
+    global _pool
+    if _pool is None:
+        workers = os.getenv("GUANDAN_DECISION_WORKERS")
+        queue_size = os.getenv("GUANDAN_DECISION_QUEUE")
+        _pool = DecisionPool(workers=int(workers) if workers else None,
+                             queue_size=int(queue_size) if queue_size else None,
+                             timeout=float(os.getenv("GUANDAN_DECISION_TIMEOUT_MS", "5000")) / 1000.0)
+    return _pool
+
+
+def get_decision_cache() -> DecisionCache:
+    """Process-wide cache, sized by GUANDAN_DECISION_CACHE_SIZE (0 disables) / _CACHE_TTL_S."""
+    global _cache
+    if _cache is None:
+        _cache = DecisionCache(capacity=int(os.getenv("GUANDAN_DECISION_CACHE_SIZE", "10000")),
+                               ttl=float(os.getenv("GUANDAN_DECISION_CACHE_TTL_S", "300")))
+    return _cache
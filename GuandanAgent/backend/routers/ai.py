@@ -1,8 +1,20 @@
+import json
+import logging
+import time
+import traceback
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
+
+from engine.logic import get_rank_value
+from backend.decisions import (
+    get_decision_cache, get_decision_pool, get_decision_service, DecisionBusy, DecisionTimeout, InvalidCards
+)
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Data models for request/response
 class CardModel(BaseModel):
@@ -16,6 +28,8 @@ class GameStateModel(BaseModel):
     last_play: Optional[Dict[str, Any]] = None # Who played what last
     played_cards: Optional[Dict[int, List[CardModel]]] = None # History of played cards
     current_level: int = 2 # Current game level (Rank of Wild Card)
+    algorithm: Optional[Literal["HappyGuandan", "MCTS", "LLM"]] = None # Preferred algorithm (default HappyGuandan)
+    deadline_ms: Optional[float] = None # Time the client can wait for the answer
 
 class MoveResponse(BaseModel):
     action: str # "play" or "pass"
@@ -27,171 +41,209 @@ class MoveResponse(BaseModel):
     win_rate: Optional[float] = None
     visits: Optional[int] = None
     llm_recommendation: Optional[Dict[str, Any]] = None # Structured LLM advice
+    elapsed_ms: Optional[float] = None # Server time spent on this answer
 
-@router.post("/suggest_move", response_model=MoveResponse)
-async def suggest_move(state: GameStateModel):
+def _fallback_move(state: GameStateModel, error: Exception) -> Dict[str, Any]:
     """
-    Endpoint to get the best move for a player.
-    Uses HappyGuandan Strategy (ported from JS) as primary.
+    SUPER ROBUST FALLBACK
+    If anything crashed (or timed out), DO NOT FAIL. Return a safe move.
     """
-    import logging
-    import traceback
-    
-    # Configure logging to file
-    logging.basicConfig(
-        filename='backend_ai_debug.log', 
-        level=logging.ERROR,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
-
     try:
-        try:
-            from engine.simple_strategy import decide_move
-            from engine.cards import Card, Suit, Rank
-        except ImportError:
-            # Try absolute imports if engine is not in path
-            from GuandanAgent.engine.simple_strategy import decide_move
-            from GuandanAgent.engine.cards import Card, Suit, Rank
-        
-        # Convert CardModel to Engine Cards
+        service = get_decision_service()
         engine_hand = []
-        
-        # Helper to handle Frontend Suit names ("HEARTS" -> "H")
-        def normalize_suit(s):
-            s = s.upper()
-            if s == "HEARTS": return "H"
-            if s == "DIAMONDS": return "D"
-            if s == "SPADES": return "S"
-            if s == "CLUBS": return "C"
-            if s == "JOKER": return "J"
-            return s
-
         try:
-            for c in state.my_hand:
-                s_str = normalize_suit(c.suit)
-                r_str = c.rank
-                engine_hand.append(Card(suit=Suit(s_str), rank=Rank(r_str)))
-        except Exception as e:
-            logging.error(f"Card Conversion Error: {e}")
-            raise HTTPException(status_code=400, detail=f"Invalid card format: {e}")
-
-        # Convert Last Play Cards if present
-        last_play_dict = state.last_play
-        if last_play_dict and 'cards' in last_play_dict:
-             # Ensure cards are converted
-             converted_cards = []
-             for c in last_play_dict['cards']:
-                if isinstance(c, dict):
-                    s_str = normalize_suit(c.get('suit'))
-                    converted_cards.append(Card(suit=Suit(s_str), rank=Rank(c.get('rank'))))
-                else:
-                    converted_cards.append(c) # Assume already Card objects if internal call, but HTTP usually dicts
-             last_play_dict = last_play_dict.copy()
-             last_play_dict['cards'] = converted_cards
-
-        # 1. Run HappyGuandan Strategy
-        decision = decide_move(
-            hand=engine_hand,
-            last_play=last_play_dict,
-            current_level=state.current_level,
-            my_player_index=state.player_index
-        )
-        
-        # 3. Construct Final Response
-        final_decision = {
-            "action": decision.get("action"),
-            "cards": [CardModel(suit=c.suit.value, rank=c.rank.value) for c in decision.get("cards", [])],
-            "type": decision.get("type"),
-            "message": decision.get("desc"),
-            "reasoning": "HappyGuandan Strategy (Reverse Iter + Partner Logic)",
-            "algorithm": "HappyGuandan"
+            engine_hand = service.to_cards([c.model_dump() for c in state.my_hand])
+        except InvalidCards:
+            pass
+        engine_hand = sorted(engine_hand, key=service.rank_value)
+
+        # If Leading, play smallest single.
+        if not state.last_play and engine_hand:
+            best = engine_hand[0]
+            return {
+                "action": "play",
+                "cards": [CardModel(suit=best.suit.value, rank=best.rank.value)],
+                "type": "single",
+                "message": "Critical Failure Fallback: Smallest Single",
+                "algorithm": "FallbackSafetyNet"
+            }
+
+        # If Following, try to beat last play with simple logic.
+        if state.last_play and engine_hand:
+            lp_type = str(state.last_play.get('type')).lower()
+            cards_data = state.last_play.get('cards', [])
+            if lp_type == 'single' and cards_data:
+                # state.last_play is Dict, so likely list of dicts.
+                c0 = cards_data[0]
+                rank_val = 0
+                if isinstance(c0, dict):
+                    rank_val = get_rank_value(c0.get('rank'))
+                elif hasattr(c0, 'rank'):
+                    rank_val = get_rank_value(c0.rank)
+
+                # Find beater (hand is sorted, first one is the smallest)
+                candidates = [c for c in engine_hand if service.rank_value(c) > rank_val]
+                if candidates:
+                    best = candidates[0]
+                    return {
+                        "action": "play",
+                        "cards": [CardModel(suit=best.suit.value, rank=best.rank.value)],
+                        "type": "single",
+                        "message": "Critical Failure Fallback: Follow Single",
+                        "algorithm": "FallbackSafetyNet"
+                    }
+
+        # Just PASS to avoid blocking the game loop, but return 200 OK.
+        return {
+            "action": "pass",
+            "cards": [],
+            "message": f"Backend Error (Fallback Pass): {str(error)}",
+            "algorithm": "FallbackSafetyNet"
+        }
+
+    except Exception:
+        # If even fallback fails, return empty pass.
+        return {
+            "action": "pass",
+            "cards": [],
+            "message": "Critical Backend Failure (Total Collapse)",
+            "algorithm": "TotalCollapse"
         }
-            
-        return final_decision
 
+
+def _decision_payload(state: GameStateModel, started: float) -> Dict[str, Any]:
+    """
+    Plain, picklable request for the decision pool. The deadline is the
+    client's deadline_ms, capped by the server's decision timeout, counted
+    from `started` (time.time() when the request arrived).
+    """
+    budget_s = get_decision_pool().timeout
+    if state.deadline_ms is not None:
+        budget_s = min(budget_s, max(state.deadline_ms, 0) / 1000.0)
+    return {
+        "hand": [{"suit": c.suit, "rank": c.rank} for c in state.my_hand],
+        "last_play": state.last_play,
+        "level": state.current_level,
+        "player_index": state.player_index,
+        "algorithm": state.algorithm or "HappyGuandan",
+        "deadline": started + budget_s,
+    }
+
+
+def _move_response(state: GameStateModel, decision: Any, started: float) -> Dict[str, Any]:
+    """Pool result -> MoveResponse dict; a failed decision gets the safety-net move."""
+    if isinstance(decision, Exception):
+        if isinstance(decision, InvalidCards):
+            logger.error(f"Card Conversion Error: {decision}")
+        else:
+            logger.error(f"Error in suggest_move: {decision!r}")
+        response = _fallback_move(state, decision)
+    else:
+        response = {
+            "action": decision["action"],
+            "cards": [CardModel(**c) for c in decision["cards"]],
+            "type": decision["type"],
+            "message": decision["desc"],
+            "reasoning": decision.get("reasoning"),
+            "algorithm": decision.get("algorithm"),
+            "win_rate": decision.get("win_rate"),
+            "visits": decision.get("visits"),
+        }
+    response["elapsed_ms"] = round((time.time() - started) * 1000.0, 2)
+    return response
+
+
+@router.post("/suggest_move", response_model=MoveResponse)
+async def suggest_move(state: GameStateModel):
+    """
+    Endpoint to get the best move for a player.
+    Uses HappyGuandan Strategy (ported from JS) as primary; MCTS or LLM on
+    request (`algorithm`). The answer is due within `deadline_ms` (at most
+    the server's decision timeout): searches get the time that is left when
+    they start and give way to HappyGuandan when too little is, and past
+    the deadline the safety-net move is returned. The response reports the
+    algorithm that answered and elapsed_ms.
+    The search runs in the decision pool, so the event loop stays free for
+    other requests (/api/health included) while it works.
+    """
+    started = time.time()
+    payload = _decision_payload(state, started)
+    cache = get_decision_cache()
+    try:
+        # 1. Run the strategy (repeated HappyGuandan states are answered from the cache)
+        decision = cache.get(cache.key(payload["algorithm"], payload))
+        if decision is None:
+            decision = await get_decision_pool().decide(payload, timeout=max(payload["deadline"] - time.time(), 0.001))
+            if decision["algorithm"] == payload["algorithm"]:
+                cache.put(cache.key(payload["algorithm"], payload), decision)
+
+    except DecisionBusy as e:
+        # Shed load instead of queueing without bound; the client retries
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except (InvalidCards, DecisionTimeout) as e:
+        decision = e
     except Exception as e:
         error_msg = f"Error in suggest_move: {e}\n{traceback.format_exc()}"
-        logging.error(error_msg)
+        logger.error(error_msg)
         print(error_msg)
-        
-        # SUPER ROBUST FALLBACK
-        # If anything crashed, DO NOT FAIL. Return a safe move.
-        try:
-            # If Leading, play smallest single.
-            if not state.last_play:
-                if state.my_hand:
-                    # ... (existing lead logic)
-                    if 'engine_hand' in locals() and engine_hand:
-                        try:
-                            from engine.logic import get_rank_value
-                        except ImportError:
-                            from GuandanAgent.engine.logic import get_rank_value
-
-                        engine_hand.sort(key=lambda x: get_rank_value(x.rank.value))
-                        best = engine_hand[0]
-                        return {
-                            "action": "play",
-                            "cards": [CardModel(suit=best.suit.value, rank=best.rank.value)],
-                            "type": "single",
-                            "message": "Critical Failure Fallback: Smallest Single",
-                            "algorithm": "FallbackSafetyNet"
-                        }
-            
-            # If Following, try to beat last play with simple logic.
-            if state.last_play and 'engine_hand' in locals() and engine_hand:
-                lp_type = str(state.last_play.get('type')).lower()
-                
-                # Try to import get_rank_value again if needed
-                try:
-                    from engine.logic import get_rank_value
-                except ImportError:
-                    try:
-                        from GuandanAgent.engine.logic import get_rank_value
-                    except:
-                        pass # Give up if no logic
-
-                if lp_type == 'single' and 'get_rank_value' in locals():
-                    # Extract target rank
-                    cards_data = state.last_play.get('cards', [])
-                    if cards_data:
-                        # cards_data might be list of dicts or CardModels (if pydantic parsed it?)
-                        # state.last_play is Dict, so likely list of dicts.
-                        c0 = cards_data[0]
-                        rank_val = 0
-                        if isinstance(c0, dict):
-                            rank_val = get_rank_value(c0.get('rank'))
-                        elif hasattr(c0, 'rank'):
-                            rank_val = get_rank_value(c0.rank)
-                        
-                        # Find beater
-                        candidates = [c for c in engine_hand if get_rank_value(c.rank.value) > rank_val]
-                        if candidates:
-                            candidates.sort(key=lambda x: get_rank_value(x.rank.value))
-                            best = candidates[0]
-                            return {
-                                "action": "play",
-                                "cards": [CardModel(suit=best.suit.value, rank=best.rank.value)],
-                                "type": "single",
-                                "message": "Critical Failure Fallback: Follow Single",
-                                "algorithm": "FallbackSafetyNet"
-                            }
-
-            # Just PASS to avoid blocking the game loop, but return 200 OK.
-            return {
-                "action": "pass",
-                "cards": [],
-                "message": f"Backend Error (Fallback Pass): {str(e)}",
-                "algorithm": "FallbackSafetyNet"
-            }
-            
-        except Exception as fallback_error:
-            # If even fallback fails (e.g. imports failed), return empty pass.
-            return {
-                "action": "pass",
-                "cards": [],
-                "message": "Critical Backend Failure (Total Collapse)",
-                "algorithm": "TotalCollapse"
-            }
+        decision = e
+
+    # 3. Construct Final Response
+    return _move_response(state, decision, started)
+
+
+MAX_BATCH_SIZE = 1024
+
+
+@router.post("/suggest_moves", response_model=List[MoveResponse])
+async def suggest_moves(states: List[GameStateModel], stream: bool = False):
+    """
+    Batch suggest_move for simulators and analytics: one HTTP round trip
+    for many states, spread over the decision pool. Answers are in request
+    order and each follows suggest_move's rules (fallback move on failure;
+    deadlines count from when the batch arrived).
+
+    With ?stream=true the answers come back as NDJSON lines
+    {"index": i, ...MoveResponse} in completion order, as soon as each
+    chunk finishes.
+    """
+    if len(states) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} states per batch")
+    started = time.time()
+    payloads = [_decision_payload(s, started) for s in states]
+    cache = get_decision_cache()
+    cached = {i: d for i, d in enumerate(cache.get(cache.key(p["algorithm"], p)) for p in payloads)
+              if d is not None}
+    missing = [i for i in range(len(states)) if i not in cached]
+
+    async def decisions():
+        for index, decision in cached.items():
+            yield index, decision
+        async for j, decision in get_decision_pool().decide_batch([payloads[i] for i in missing]):
+            index = missing[j]
+            if not isinstance(decision, Exception) and decision["algorithm"] == payloads[index]["algorithm"]:
+                cache.put(cache.key(decision["algorithm"], payloads[index]), decision)
+            yield index, decision
+
+    batch = decisions()
+    if stream:
+        async def lines():
+            async for index, decision in batch:
+                move = MoveResponse(**_move_response(states[index], decision, started))
+                yield json.dumps({"index": index, **move.model_dump()}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    moves: List[Optional[Dict[str, Any]]] = [None] * len(states)
+    async for index, decision in batch:
+        moves[index] = _move_response(states[index], decision, started)
+    return moves
+
+@router.get("/decision_stats")
+async def decision_stats():
+    """Decision pool load and cache hit rates."""
+    return {"pool": get_decision_pool().stats(), "cache": get_decision_cache().stats()}
+
 
 @router.get("/stats")
 async def get_stats():
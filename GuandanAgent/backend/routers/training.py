@@ -8,11 +8,17 @@ import sys
 router = APIRouter()
 
 STATS_FILE = os.path.join(os.path.dirname(__file__), "../data/training_stats.json")
+METRICS_FILE = os.path.join(os.path.dirname(__file__), "../data/training_metrics.jsonl")
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
 
 import psutil
 import time
 
+from engine.rl.metrics import MetricsReader
+
+# In-memory view of the append-only metrics log; each poll only parses new lines
+metrics_reader = MetricsReader(METRICS_FILE)
+
 # Global variable to track the running process
 current_training_process = None
 should_stop = False
@@ -28,11 +34,11 @@ def run_training_task(mode: str):
     python_exe = sys.executable
     script_path = os.path.join(PROJECT_ROOT, "GuandanAgent", "train.py")
     
-    # Infinite loop arguments (no --games limit)
+    # Infinite loop arguments (no --games limit); pick up from the last checkpoint
     if mode == 'heuristic':
-        cmd = [python_exe, script_path, "--opponent", "heuristic"]
+        cmd = [python_exe, script_path, "--opponent", "heuristic", "--resume"]
     else:
-        cmd = [python_exe, script_path, "--opponent", "mcts"]
+        cmd = [python_exe, script_path, "--opponent", "mcts", "--resume"]
         
     try:
         print(f"Starting Infinite Training Task: {mode}...")
@@ -43,9 +49,10 @@ def run_training_task(mode: str):
         while current_training_process.poll() is None:
             if should_stop:
                 print("Stopping training task...")
+                # SIGTERM: train.py writes a final checkpoint before exiting
                 current_training_process.terminate()
                 try:
-                    current_training_process.wait(timeout=5)
+                    current_training_process.wait(timeout=30)
                 except subprocess.TimeoutExpired:
                     current_training_process.kill()
                 break
@@ -75,6 +82,9 @@ async def stop_training():
 
 @router.get("/stats")
 async def get_training_stats():
+    if metrics_reader.exists():
+        return metrics_reader.snapshot()
+    # Older runs: full stats file written by previous versions of train.py
     if os.path.exists(STATS_FILE):
         try:
             with open(STATS_FILE, "r") as f:
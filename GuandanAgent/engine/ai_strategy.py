@@ -10,16 +10,35 @@ from engine.logic import (
 )
 from engine.rl.env import GuandanEnv
 from engine.rl.mcts import MCTSNode, MCTS
+from engine.rl.registry import ModelRegistry, HotSwapModel
+from engine.rl.value_cache import ValueCache
+from engine.rl.budget import time_limit_ms
 
 # Load environment variables
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../backend/.env'))
 
 # Removed duplicated logic (moved to logic.py)
 
+MODELS_DIR = os.path.join(os.path.dirname(__file__), '../models')
+_serving_model = None
+
 def get_model_manager():
-    return None
+    """
+    Value network for MCTS: follows the newest published registry version
+    (hot-swapped in the background), behind a value cache that is cleared on
+    every swap. None until train.py has published one.
+    GUANDAN_VALUE_NET_QUANT=int8|float16 serves quantized weights.
+    """
+    global _serving_model
+    if _serving_model is None:
+        registry = ModelRegistry(MODELS_DIR)
+        if registry.current_version() is None:
+            return None
+        quantized = os.getenv("GUANDAN_VALUE_NET_QUANT") or None
+        _serving_model = ValueCache(HotSwapModel(registry, quantized=quantized).start())
+    return _serving_model
 
-def query_llm(context: str, options: List[str]) -> tuple[int, str]:
+def query_llm(context: str, options: List[str], timeout: float = 10) -> tuple[int, str]:
     """
     Call LLM to select the best move index.
     Returns (selected_index, raw_response_content)
@@ -68,7 +87,7 @@ Reasoning: [你的中文思考过程]
     }
     
     try:
-        response = requests.post(api_url, headers=headers, json=data, timeout=10)
+        response = requests.post(api_url, headers=headers, json=data, timeout=timeout)
         response.raise_for_status()
         res_json = response.json()
         content = res_json['choices'][0]['message']['content']
@@ -90,11 +109,11 @@ Reasoning: [你的中文思考过程]
         print(f"LLM Call Failed: {e}")
         return 0, f"LLM Call Failed: {str(e)}"
 
-def llm_strategy(state: Any) -> Dict[str, Any]:
+def llm_strategy(state: Any, timeout: float = 10) -> Dict[str, Any]:
     """
     Hybrid Strategy:
     1. Python generates legal moves.
-    2. LLM selects the best move.
+    2. LLM selects the best move (within `timeout` seconds).
     """
     my_hand = state.my_hand
     last_play = state.last_play
@@ -122,7 +141,7 @@ def llm_strategy(state: Any) -> Dict[str, Any]:
     options = [m['desc'] for m in moves]
     
     # 3. Ask LLM
-    selected_index, reasoning = query_llm(context, options)
+    selected_index, reasoning = query_llm(context, options, timeout=timeout)
     
     # Validate index
     if selected_index < 0 or selected_index >= len(moves):
@@ -136,9 +155,10 @@ def llm_strategy(state: Any) -> Dict[str, Any]:
         "reasoning": reasoning
     }
 
-def mcts_strategy(state: Any) -> Dict[str, Any]:
+def mcts_strategy(state: Any, max_time_ms: Optional[float] = None) -> Dict[str, Any]:
     """
     AlphaGo-style MCTS Strategy.
+    max_time_ms caps the search time (the caller's remaining deadline).
     """
     my_hand = state.my_hand
     last_play = state.last_play
@@ -192,12 +212,27 @@ def mcts_strategy(state: Any) -> Dict[str, Any]:
     else:
         print("  Last Play: None (Leading)")
 
-    env = GuandanEnv(engine_hand, last_play, current_player=player_idx, current_level=current_level)
+    # Public card counts per seat, when the caller knows them
+    hand_sizes = getattr(state, 'hand_sizes', None)
+    env = GuandanEnv(engine_hand, last_play, current_player=player_idx, current_level=current_level,
+                     hand_sizes=hand_sizes)
+
+    # Thinking time follows the decision: none for a forced move, never more than the old 2s
+    legal = env.get_legal_actions()
+    budget_ms = time_limit_ms(env, len(legal))
+    if max_time_ms is not None and budget_ms > 0:
+        budget_ms = max(1.0, min(budget_ms, max_time_ms))
+    if budget_ms == 0 and legal:
+        return {
+            **legal[0],
+            "message": f"Only Move: {legal[0].get('desc', 'Pass')}",
+            "reasoning": "Single legal move, played without search."
+        }
     
     # Run MCTS
     # Try to use Value Network if available
     model_mgr = get_model_manager()
-    mcts = MCTS(time_limit_ms=2000, model=model_mgr) # 2 seconds thinking time
+    mcts = MCTS(time_limit_ms=budget_ms, model=model_mgr)
     
     try:
         best_action = mcts.search(env)
@@ -210,6 +245,8 @@ def mcts_strategy(state: Any) -> Dict[str, Any]:
         moves = get_legal_moves(my_hand, last_play, current_level=current_level)
         if moves:
             best_action = moves[0]
+            if max_time_ms is not None:
+                return {**best_action, "message": "Fallback: First Legal Move", "reasoning": "MCTS failed."}
             hand_eval = calculate_hand_strength(my_hand, current_level=current_level)
             return {
                 **best_action,
@@ -218,26 +255,31 @@ def mcts_strategy(state: Any) -> Dict[str, Any]:
             }
         return {"action": "pass", "cards": [], "message": "No legal moves (MCTS Fallback)"}
         
-    # Add Hand Strength Info
-    hand_eval = calculate_hand_strength(my_hand, current_level=current_level)
     win_rate_pct = best_action.get('win_rate', 0.5) * 100
     visits = best_action.get('visits', 0)
-    
-    # Save Stats
-    try:
-        from backend.stats import save_stat
-        save_stat(best_action.get('win_rate', 0.5), hand_eval['score'], visits)
-    except:
-        pass # Don't block game logic
-    
-    return {
-        **best_action,
-        "message": f"MCTS: {best_action.get('desc', 'Unknown')} (WinRate: {win_rate_pct:.1f}%)",
-        "reasoning": (
-            f"Selected via MCTS ({visits} visits). "
-            f"Estimated Win Rate: {win_rate_pct:.1f}%. "
+    reasoning = (
+        f"Selected via MCTS ({visits} visits, {budget_ms:.0f} ms budget). "
+        f"Estimated Win Rate: {win_rate_pct:.1f}%. "
+    )
+
+    # Hand strength is a full partition search (often longer than the search
+    # itself), so under a deadline the report and dashboard stat are skipped
+    if max_time_ms is None:
+        hand_eval = calculate_hand_strength(my_hand, current_level=current_level)
+        reasoning += (
             f"Current Hand Strength: {hand_eval['score']} (Bombs: {hand_eval['num_bombs']}). "
             f"Strategy prefers playing small cards to gain tempo."
         )
-    }
 
+        # Save Stats
+        try:
+            from backend.stats import save_stat
+            save_stat(best_action.get('win_rate', 0.5), hand_eval['score'], visits)
+        except:
+            pass # Don't block game logic
+
+    return {
+        **best_action,
+        "message": f"MCTS: {best_action.get('desc', 'Unknown')} (WinRate: {win_rate_pct:.1f}%)",
+        "reasoning": reasoning
+    }
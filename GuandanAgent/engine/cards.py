@@ -1,6 +1,6 @@
 ﻿from dataclasses import dataclass
 from enum import Enum
-from typing import List
+from typing import Any, Dict, List, Tuple
 
 
 class Suit(str, Enum):
@@ -59,3 +59,23 @@ def standard_deck() -> List[Card]:
     deck.append(Card(suit=Suit.JOKER, rank=Rank.SMALL_JOKER))
     deck.append(Card(suit=Suit.JOKER, rank=Rank.BIG_JOKER))
     return deck
+
+
+# Stable integer ids 0..53 in standard_deck() order (double-deck games reuse the ids).
+_DECK: List[Card] = standard_deck()
+CARD_IDS: Dict[Tuple[str, str], int] = {(c.suit.value, c.rank.value): i for i, c in enumerate(_DECK)}
+
+
+def card_id(card: Any) -> int:
+    """Card object or {'suit', 'rank'} dict -> id in 0..53."""
+    if isinstance(card, dict):
+        suit, rank = card.get('suit'), card.get('rank')
+    else:
+        suit, rank = card.suit, card.rank
+    suit = getattr(suit, 'value', suit)
+    rank = getattr(rank, 'value', rank)
+    return CARD_IDS[(str(suit), str(rank))]
+
+
+def card_from_id(cid: int) -> Card:
+    return _DECK[cid]
@@ -0,0 +1,145 @@
+import contextlib
+import multiprocessing as mp
+import os
+import queue
+import random
+import time
+import traceback
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+from .registry import ModelRegistry, HotSwapModel
+from .selfplay import self_play_game
+from .budget import SimulationBudget
+from .shared_weights import SharedWeightStore, SharedModel
+
+
+def self_play_worker(worker_id: int, registry_dir: str, opponent_type: str, sample_queue, stop_event, seed: int,
+                     resign=None, search_budget=None, weights_spec=None):
+    """
+    Actor process: plays self-play games with the latest published weights and
+    streams (worker_id, winner, samples, model_version, game_record, info) to the learner.
+    Runs on the NumPy model, so workers never import torch.
+
+    With `weights_spec` the weights come from the learner's SharedWeightStore
+    (no disk reads), and opponent_type "pool" pits the current weights
+    against a random past snapshot from the store.
+    """
+    random.seed(seed)
+    np.random.seed(seed % (2 ** 32))
+
+    if weights_spec is not None:
+        model = SharedModel(SharedWeightStore.attach(weights_spec))
+    else:
+        model = HotSwapModel(ModelRegistry(registry_dir))
+    # Quiet the per-move MCTS logging in workers
+    devnull = open(os.devnull, 'w')
+
+    while not stop_event.is_set():
+        model.refresh() # Cheap stat() of the manifest; swaps between games only
+        if model.snapshot() is None:
+            time.sleep(0.5)
+            continue
+        opponent = None
+        if opponent_type == 'pool' and isinstance(model, SharedModel):
+            opponent = model.opponent()
+        try:
+            with contextlib.redirect_stdout(devnull):
+                budget = SimulationBudget(**(search_budget or {}))
+                winner, samples, record, info = self_play_game(
+                    model, opponent_type='mcts' if opponent_type == 'pool' else opponent_type, return_record=True,
+                    resign=resign, return_info=True, budget=budget, opponent_model=opponent)
+        except Exception:
+            traceback.print_exc()
+            continue
+        if isinstance(model, SharedModel) and not (model.valid() and (opponent is None or model.valid(opponent))):
+            # A slot was reused mid-game (the ring wrapped): weights may be torn, drop the game
+            continue
+        info["opponent_version"] = opponent.version if opponent is not None else None
+
+        item = (worker_id, winner, samples, model.version, record, info)
+        # Back-pressure: block while the learner is behind, but keep checking for shutdown
+        while not stop_event.is_set():
+            try:
+                sample_queue.put(item, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+    devnull.close()
+
+
+class SelfPlayFleet:
+    """
+    N self-play worker processes feeding one learner through a bounded queue.
+
+    The learner publishes weights to the ModelRegistry (or a shared memory
+    SharedWeightStore); workers pick up the new "current" version before
+    each game. When the queue is full, workers
+    block, which keeps a fast fleet from running ahead of training.
+    """
+
+    def __init__(self, num_workers: int, registry_dir: str, opponent_type: str = 'mcts',
+                 queue_size: int = 64, seed: Optional[int] = None, resign=None, search_budget=None,
+                 weights_spec=None):
+        self.num_workers = num_workers
+        self.registry_dir = registry_dir
+        self.opponent_type = opponent_type
+        self.resign = resign
+        self.search_budget = search_budget # SimulationBudget kwargs, one budget per game
+        self.weights_spec = weights_spec # SharedWeightStore.spec(), None = read the registry
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        # spawn: the learner has torch (and its threads) loaded; don't fork that state
+        self._ctx = mp.get_context("spawn")
+        self.queue = self._ctx.Queue(maxsize=queue_size)
+        self.stop_event = self._ctx.Event()
+        self.processes = []
+
+    def start(self):
+        for i in range(self.num_workers):
+            p = self._ctx.Process(
+                target=self_play_worker,
+                args=(i, self.registry_dir, self.opponent_type, self.queue, self.stop_event, self.seed + i, self.resign,
+                      self.search_budget, self.weights_spec),
+                name=f"selfplay-{i}",
+                daemon=True,
+            )
+            p.start()
+            self.processes.append(p)
+        print(f"Started {self.num_workers} self-play workers")
+        return self
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int, Any, Any, Any, Any]]:
+        """Next finished game, or None on timeout."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def alive(self) -> int:
+        return sum(1 for p in self.processes if p.is_alive())
+
+    def stop(self, timeout: float = 10.0):
+        """Ask workers to finish, drain the queue so none stays blocked on put, then join."""
+        self.stop_event.set()
+        deadline = time.time() + timeout
+        while self.alive() and time.time() < deadline:
+            try:
+                while True:
+                    self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            for p in self.processes:
+                p.join(0.1)
+        for p in self.processes:
+            if p.is_alive():
+                p.terminate()
+                p.join(1)
+        self.processes = []
+        print("Self-play workers stopped")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,205 @@
+import itertools
+import math
+import multiprocessing as mp
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .match import play_game, simple_policy, heuristic_policy, ValueGreedyPolicy, MCTSPolicy
+
+BASELINES = {"simple": simple_policy, "heuristic": heuristic_policy}
+
+
+def make_policy(spec: str, checkpoint_policy: str = "greedy", simulations: int = 50,
+                registry_dir: Optional[str] = None):
+    """
+    Competitor spec -> policy:
+      "simple" / "heuristic"   baseline rule policies
+      "path/to/model.npz|.pth" value-network checkpoint
+      "registry:<version>"     published registry version (needs registry_dir)
+    Checkpoints play with ValueGreedyPolicy or, with checkpoint_policy="mcts", MCTSPolicy.
+    """
+    if spec in BASELINES:
+        return BASELINES[spec]
+    from .numpy_net import NumpyValueNet
+    if spec.startswith("registry:"):
+        from .registry import ModelRegistry
+        if not registry_dir:
+            raise ValueError("registry competitors need a registry directory")
+        model = ModelRegistry(registry_dir).load_numpy(int(spec.split(":", 1)[1]))
+    elif spec.endswith(".npz"):
+        model = NumpyValueNet.from_npz(spec)
+    elif spec.endswith(".pth"):
+        import torch
+        model = NumpyValueNet(torch.load(spec, map_location="cpu"))
+    else:
+        raise ValueError(f"Unknown competitor: {spec}")
+    if checkpoint_policy == "mcts":
+        return MCTSPolicy(model, simulations=simulations)
+    return ValueGreedyPolicy(model)
+
+
+def schedule(num_competitors: int, games_per_pair: int, seed: int = 0) -> List[Tuple[int, int, int, bool]]:
+    """
+    (a, b, deal_seed, swapped) for every pair. Each deal is played twice with
+    the teams swapping seats, so both sides get the same cards.
+    """
+    tasks = []
+    deals = (games_per_pair + 1) // 2
+    for a, b in itertools.combinations(range(num_competitors), 2):
+        for k in range(deals):
+            deal_seed = seed + k
+            tasks.append((a, b, deal_seed, False))
+            tasks.append((a, b, deal_seed, True))
+    return tasks
+
+
+# --- Worker side ---
+
+_POLICIES: List[Any] = []
+
+
+def _init_worker(specs, options):
+    global _POLICIES
+    # MCTS search logs every move
+    sys.stdout = open(os.devnull, 'w')
+    _POLICIES = [make_policy(s, **options) for s in specs]
+
+
+def _play_task(task) -> Dict[str, Any]:
+    a, b, deal_seed, swapped = task
+    pa, pb = _POLICIES[a], _POLICIES[b]
+    # Team 0 sits in seats 0 and 2
+    seats = [pb, pa, pb, pa] if swapped else [pa, pb, pa, pb]
+    result = play_game(seats, deal_seed)
+    a_team = 1 if swapped else 0
+    if result["winner"] == -1:
+        score = 0.5
+    else:
+        score = 1.0 if result["winner"] == a_team else 0.0
+    return {"a": a, "b": b, "seed": deal_seed, "swapped": swapped, "score_a": score,
+            "steps": result["steps"]}
+
+
+def run_games(specs: Sequence[str], tasks, workers: int = 0, options: Optional[Dict[str, Any]] = None,
+              progress=None) -> List[Dict[str, Any]]:
+    options = options or {}
+    results = []
+    if workers <= 0:
+        global _POLICIES
+        _POLICIES = [make_policy(s, **options) for s in specs]
+        for task in tasks:
+            results.append(_play_task(task))
+            if progress:
+                progress(len(results), len(tasks))
+        return results
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(list(specs), options)) as pool:
+        chunksize = max(1, len(tasks) // (workers * 8))
+        for r in pool.map(_play_task, tasks, chunksize=chunksize):
+            results.append(r)
+            if progress:
+                progress(len(results), len(tasks))
+    return results
+
+
+# --- Ratings ---
+
+def _pair_units(results) -> List[Tuple[int, int, float, int]]:
+    """Mirrored games grouped per (pair, deal): (a, b, score_a, games)."""
+    units = {}
+    for r in results:
+        key = (r["a"], r["b"], r["seed"])
+        score, n = units.get(key, (0.0, 0))
+        units[key] = (score + r["score_a"], n + 1)
+    return [(a, b, s, n) for (a, b, _), (s, n) in units.items()]
+
+
+def fit_elo(units, num_competitors: int, anchor: int = 0, anchor_rating: float = 1000.0,
+            prior_games: float = 1.0, iterations: int = 200) -> np.ndarray:
+    """
+    Bradley-Terry maximum likelihood (MM updates) on Elo scale. Each pair gets
+    `prior_games` virtual drawn games so unbeaten competitors stay finite.
+    """
+    wins = np.zeros((num_competitors, num_competitors))
+    for a, b, score, n in units:
+        wins[a, b] += score
+        wins[b, a] += n - score
+    for a, b in itertools.combinations(range(num_competitors), 2):
+        if wins[a, b] + wins[b, a] > 0:
+            wins[a, b] += prior_games / 2
+            wins[b, a] += prior_games / 2
+    games = wins + wins.T
+    strength = np.ones(num_competitors)
+    total_wins = wins.sum(axis=1)
+    for _ in range(iterations):
+        denom = (games / (strength[:, None] + strength[None, :])).sum(axis=1)
+        new = np.where(denom > 0, total_wins / np.maximum(denom, 1e-12), strength)
+        new /= math.exp(np.log(np.maximum(new, 1e-12)).mean())
+        if np.allclose(new, strength, rtol=1e-9):
+            strength = new
+            break
+        strength = new
+    ratings = 400.0 * np.log10(np.maximum(strength, 1e-12))
+    return ratings - ratings[anchor] + anchor_rating
+
+
+def elo_ratings(results, names: Sequence[str], anchor: int = 0, bootstrap: int = 200,
+                seed: int = 0) -> List[Dict[str, Any]]:
+    """Elo per competitor with 95% bootstrap intervals (resampling mirrored deal pairs)."""
+    n = len(names)
+    units = _pair_units(results)
+    ratings = fit_elo(units, n, anchor)
+    rng = np.random.default_rng(seed)
+    samples = []
+    for _ in range(bootstrap):
+        picked = [units[i] for i in rng.integers(0, len(units), size=len(units))]
+        samples.append(fit_elo(picked, n, anchor))
+    samples = np.array(samples) if samples else np.tile(ratings, (1, 1))
+    low, high = np.percentile(samples, [2.5, 97.5], axis=0)
+
+    table = []
+    for i, name in enumerate(names):
+        played = [(s if a == i else g - s, g) for a, b, s, g in units if i in (a, b)]
+        games = sum(g for _, g in played)
+        table.append({
+            "name": name,
+            "elo": float(ratings[i]),
+            "ci_low": float(low[i]),
+            "ci_high": float(high[i]),
+            "games": games,
+            "score": sum(s for s, _ in played) / games if games else 0.0,
+        })
+    return sorted(table, key=lambda r: -r["elo"])
+
+
+def score_matrix(results, num_competitors: int) -> np.ndarray:
+    """score[i, j] = fraction of points i took against j."""
+    points = np.zeros((num_competitors, num_competitors))
+    games = np.zeros((num_competitors, num_competitors))
+    for r in results:
+        a, b = r["a"], r["b"]
+        points[a, b] += r["score_a"]
+        points[b, a] += 1 - r["score_a"]
+        games[a, b] += 1
+        games[b, a] += 1
+    return np.divide(points, games, out=np.full_like(points, np.nan), where=games > 0)
+
+
+def format_table(table, names: Sequence[str], matrix: Optional[np.ndarray] = None) -> str:
+    width = max(len(n) for n in names)
+    lines = [f"{'Competitor':<{width}}  {'Elo':>7}  {'95% CI':>17}  {'Games':>6}  {'Score':>6}"]
+    for r in table:
+        ci = f"[{r['ci_low']:.0f}, {r['ci_high']:.0f}]"
+        lines.append(f"{r['name']:<{width}}  {r['elo']:>7.0f}  {ci:>17}  {r['games']:>6}  {r['score'] * 100:>5.1f}%")
+    if matrix is not None:
+        lines.append("")
+        lines.append(" " * (width + 2) + "  ".join(f"{i:>6}" for i in range(len(names))))
+        for i, name in enumerate(names):
+            row = "  ".join("     -" if np.isnan(v) else f"{v * 100:>5.1f}%" for v in matrix[i])
+            lines.append(f"{name:<{width}}  {row}   [{i}]")
+    return "\n".join(lines)
@@ -0,0 +1,94 @@
+import math
+from typing import Dict, Optional
+
+from .env import GuandanEnv
+
+
+def move_difficulty(env: GuandanEnv, num_legal: int) -> float:
+    """
+    Relative search effort for the current decision (1.0 = an average move,
+    0 = nothing to decide):
+    - more legal moves -> more to compare (log scale)
+    - endgame (someone close to going out) -> mistakes decide the game
+    - opening with a full hand -> cheaper, plenty of time to recover
+    """
+    if num_legal <= 1:
+        return 0.0
+    branching = min(2.0, max(0.5, math.log2(num_legal) / 3.0))
+    fewest = min(len(h) for h in env.hands if h) if any(env.hands) else 0
+    own = len(env.hands[env.current_player])
+    if fewest <= 6 or own <= 8:
+        phase = 1.5
+    elif own >= 24:
+        phase = 0.75
+    else:
+        phase = 1.0
+    return branching * phase
+
+
+def time_limit_ms(env: GuandanEnv, num_legal: int, base_ms: float = 2000.0,
+                  min_ms: float = 200.0, max_ms: float = 2000.0) -> float:
+    """
+    Wall-clock budget for serving: base_ms scaled by move_difficulty() (0 = no search).
+    max_ms defaults to the old fixed 2s serving budget, so easy moves get less time
+    but no move gets more; offline callers that can wait pass a larger max_ms.
+    """
+    difficulty = move_difficulty(env, num_legal)
+    if difficulty == 0:
+        return 0.0
+    return max(min_ms, min(max_ms, base_ms * difficulty))
+
+
+class SimulationBudget:
+    """
+    Per-game MCTS simulation allocator.
+
+    allocate() scales `base` simulations by move_difficulty(), clamped to
+    [min_sims, max_sims]; single-move positions get 0 (play without search).
+    With `game_budget`, each team's total stays within it: a move never gets
+    more than twice its fair share of what is left, spread over the moves
+    the team is still expected to make, and never more than is left (an
+    exhausted team gets 0 even when that is below min_sims). Search stops
+    early when the root is decided (MCTS min_simulations), and spend()
+    returns the unused part.
+    """
+
+    def __init__(self, base: int = 50, min_sims: int = 8, max_sims: int = 200,
+                 game_budget: Optional[int] = None):
+        self.base = base
+        self.min_sims = min_sims
+        self.max_sims = max_sims
+        self.game_budget = game_budget
+        self.used: Dict[int, int] = {0: 0, 1: 0}
+        self.searched_moves = 0
+        self.auto_moves = 0
+
+    def remaining(self, team: int) -> Optional[int]:
+        if self.game_budget is None:
+            return None
+        return max(0, self.game_budget - self.used[team])
+
+    def allocate(self, env: GuandanEnv, num_legal: int) -> int:
+        difficulty = move_difficulty(env, num_legal)
+        if difficulty == 0:
+            self.auto_moves += 1
+            return 0
+        sims = int(round(self.base * difficulty))
+        remaining = self.remaining(env.current_player % 2)
+        if remaining == 0:
+            return 0
+        if remaining is not None:
+            # Roughly one decision per 2-3 cards still in hand
+            moves_left = max(1, math.ceil(len(env.hands[env.current_player]) / 2.5))
+            sims = min(sims, 2 * remaining // moves_left)
+        self.searched_moves += 1
+        sims = max(self.min_sims, min(self.max_sims, sims))
+        # The min_sims floor must not overdraw the game budget
+        return sims if remaining is None else min(sims, remaining)
+
+    def spend(self, team: int, simulations: int):
+        self.used[team] += simulations
+
+    def stats(self) -> Dict[str, int]:
+        return {"searched_moves": self.searched_moves, "auto_moves": self.auto_moves,
+                "simulations": self.used[0] + self.used[1]}
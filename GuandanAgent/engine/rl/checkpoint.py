@@ -0,0 +1,57 @@
+import os
+import random
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+
+
+def capture_rng_state() -> Dict[str, Any]:
+    """Python, NumPy (global) and torch RNG states."""
+    state = {"python": random.getstate(), "numpy": np.random.get_state()}
+    try:
+        import torch
+        state["torch"] = torch.get_rng_state()
+        if torch.cuda.is_available():
+            state["torch_cuda"] = torch.cuda.get_rng_state_all()
+    except ImportError:
+        pass
+    return state
+
+
+def restore_rng_state(state: Dict[str, Any]):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    if "torch" in state:
+        import torch
+        torch.set_rng_state(state["torch"])
+        if "torch_cuda" in state and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(state["torch_cuda"])
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]):
+    """
+    Write the whole training state as one file, atomically: readers (and a
+    resume after a crash mid-write) see either the previous or the new
+    checkpoint, never a partial one.
+    """
+    import torch
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        torch.save({"checkpoint_version": CHECKPOINT_VERSION, **state}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    import torch
+    # Contains optimizer state, numpy arrays and RNG tuples, not just tensors
+    state = torch.load(path, map_location="cpu", weights_only=False)
+    if state.get("checkpoint_version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version: {state.get('checkpoint_version')}")
+    return state
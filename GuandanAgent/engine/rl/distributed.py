@@ -0,0 +1,386 @@
+import contextlib
+import io
+import json
+import os
+import queue
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+import traceback
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .env import FEATURE_DIM
+from .records import encode_record, decode_record
+
+# Frame: (header bytes, payload bytes) lengths, JSON header, raw payload
+_FRAME = struct.Struct("<II")
+MAX_HEADER_BYTES = 1 << 20
+MAX_PAYLOAD_BYTES = 256 << 20
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(min(n - len(buf), 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        buf += chunk
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, header: Dict[str, Any], payload: bytes = b""):
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(data), len(payload)) + data + payload)
+
+
+def recv_message(sock: socket.socket) -> Tuple[Dict[str, Any], bytes]:
+    header_len, payload_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    if header_len > MAX_HEADER_BYTES or payload_len > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"frame too large ({header_len} + {payload_len} bytes)")
+    header = json.loads(_recv_exact(sock, header_len).decode("utf-8"))
+    payload = _recv_exact(sock, payload_len) if payload_len else b""
+    return header, payload
+
+
+def request(sock: socket.socket, header: Dict[str, Any], payload: bytes = b"") -> Tuple[Dict[str, Any], bytes]:
+    send_message(sock, header, payload)
+    return recv_message(sock)
+
+
+def encode_weights(state_dict: Dict[str, Any]) -> bytes:
+    from .numpy_net import _to_numpy
+    buf = io.BytesIO()
+    np.savez(buf, **{k: _to_numpy(v) for k, v in state_dict.items()})
+    return buf.getvalue()
+
+
+def decode_weights(data: bytes) -> Dict[str, np.ndarray]:
+    with np.load(io.BytesIO(data)) as npz:
+        return {k: npz[k] for k in npz.files}
+
+
+def encode_result(winner: int, samples, record, info: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+    """Game result -> (header fields, payload): record bytes, float32 states, float32 rewards."""
+    record_bytes = encode_record(record) if record is not None else b""
+    states = np.asarray([s for s, _ in samples], dtype=np.float32).reshape(-1, FEATURE_DIM)
+    rewards = np.asarray([r for _, r in samples], dtype=np.float32)
+    header = {"winner": winner, "info": info, "record_bytes": len(record_bytes), "samples": len(rewards)}
+    return header, record_bytes + states.tobytes() + rewards.tobytes()
+
+
+def decode_result(header: Dict[str, Any], payload: bytes):
+    """Inverse of encode_result: (winner, [(state_vector, reward)], record, info)."""
+    n, record_len = header["samples"], header["record_bytes"]
+    record = decode_record(payload[:record_len]) if record_len else None
+    states = np.frombuffer(payload, dtype=np.float32, count=n * FEATURE_DIM, offset=record_len).reshape(n, FEATURE_DIM)
+    rewards = np.frombuffer(payload, dtype=np.float32, count=n, offset=record_len + states.nbytes)
+    return header["winner"], list(zip(states, rewards.tolist())), record, header["info"]
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        coordinator: "Coordinator" = self.server.coordinator
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                header, payload = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+            try:
+                reply, reply_payload = coordinator.dispatch(header, payload, self.client_address)
+            except Exception as e:
+                traceback.print_exc()
+                reply, reply_payload = {"type": "error", "error": str(e)}, b""
+            try:
+                send_message(self.request, reply, reply_payload)
+            except OSError:
+                return
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Coordinator:
+    """
+    TCP coordinator for self-play actors on other hosts (see ActorClient).
+
+    Hands out the current weight version and game seeds (leased a few at a
+    time), collects finished games and tracks actor health from their
+    messages and heartbeats. An actor silent for `heartbeat_timeout` seconds
+    is marked dead and its unfinished seeds are leased to others.
+
+    The learner side has the SelfPlayFleet interface: get() returns
+    (actor_id, winner, samples, model_version, game_record, info); when the
+    results queue is full, actors block on their result upload.
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 0, opponent_type: str = "mcts",
+                 config: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+                 heartbeat_timeout: float = 30.0, queue_size: int = 64, seeds_per_lease: int = 4):
+        self.opponent_type = opponent_type
+        self.config = config or {}
+        self.heartbeat_timeout = heartbeat_timeout
+        self.seeds_per_lease = seeds_per_lease
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._next_seed = seed if seed is not None else random.randrange(2 ** 40)
+        self._requeued: List[int] = []
+        self._lock = threading.Lock()
+        self._weights: Optional[bytes] = None
+        self._version: Optional[int] = None
+        self.actors: Dict[str, Dict[str, Any]] = {}
+        self._stopping = threading.Event()
+        self._server = _Server((host, port), _Handler)
+        self._server.coordinator = self
+        self._thread = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="coordinator", daemon=True)
+        self._thread.start()
+        host, port = self.address
+        print(f"Coordinator listening on {host}:{port}")
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Tell actors to stop on their next request, then close the listener."""
+        self._stopping.set()
+        deadline = time.time() + timeout
+        while time.time() < deadline and self.alive():
+            # Unblock handlers waiting on a full queue
+            with contextlib.suppress(queue.Empty):
+                while True:
+                    self.queue.get_nowait()
+            time.sleep(0.1)
+        self._server.shutdown()
+        self._server.server_close()
+        print("Coordinator stopped")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # --- Learner side ---
+
+    def publish(self, state_dict: Dict[str, Any], version: int):
+        data = encode_weights(state_dict)
+        with self._lock:
+            self._weights, self._version = data, version
+
+    def get(self, timeout: Optional[float] = None):
+        self._expire()
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def alive(self) -> int:
+        self._expire()
+        with self._lock:
+            return sum(1 for a in self.actors.values() if a["alive"])
+
+    def health(self) -> List[Dict[str, Any]]:
+        self._expire()
+        now = time.time()
+        with self._lock:
+            return [{"actor_id": actor_id, "host": a["host"], "pid": a["pid"], "alive": a["alive"],
+                     "games": a["games"], "version": a["version"], "leased": len(a["leased"]),
+                     "last_seen": round(now - a["last_seen"], 1), "games_per_hour": a.get("games_per_hour")}
+                    for actor_id, a in self.actors.items()]
+
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            for actor_id, a in self.actors.items():
+                if a["alive"] and now - a["last_seen"] > self.heartbeat_timeout:
+                    a["alive"] = False
+                    self._requeued.extend(a["leased"])
+                    a["leased"] = []
+                    print(f"Actor {actor_id} missed heartbeats; re-queued its seeds")
+
+    # --- Actor requests ---
+
+    def _touch(self, header, address) -> Dict[str, Any]:
+        actor_id = str(header["actor_id"])
+        with self._lock:
+            actor = self.actors.get(actor_id)
+            if actor is None:
+                actor = self.actors[actor_id] = {"host": header.get("host", address[0]), "pid": header.get("pid"),
+                                                 "games": 0, "version": None, "leased": [], "alive": True}
+            actor["last_seen"] = time.time()
+            actor["alive"] = True
+            return actor
+
+    def _lease(self, actor) -> List[int]:
+        with self._lock:
+            seeds = self._requeued[:self.seeds_per_lease]
+            del self._requeued[:len(seeds)]
+            while len(seeds) < self.seeds_per_lease:
+                seeds.append(self._next_seed)
+                self._next_seed += 1
+            actor["leased"].extend(seeds)
+            return seeds
+
+    def dispatch(self, header: Dict[str, Any], payload: bytes, address) -> Tuple[Dict[str, Any], bytes]:
+        kind = header.get("type")
+        actor = self._touch(header, address)
+        if kind in ("hello", "heartbeat"):
+            if "games_per_hour" in header:
+                with self._lock:
+                    actor["games_per_hour"] = header["games_per_hour"]
+            return {"type": "ack", "version": self._version, "stop": self._stopping.is_set()}, b""
+        if kind == "bye":
+            with self._lock:
+                actor["alive"] = False
+                self._requeued.extend(actor["leased"])
+                actor["leased"] = []
+            return {"type": "ack"}, b""
+        if kind == "work":
+            if self._stopping.is_set():
+                return {"type": "stop"}, b""
+            if self._version is None:
+                return {"type": "wait", "retry_after": 1.0}, b""
+            return {"type": "work", "seeds": self._lease(actor), "version": self._version,
+                    "opponent_type": self.opponent_type, "config": self.config}, b""
+        if kind == "weights":
+            with self._lock:
+                data, version = self._weights, self._version
+            return {"type": "weights", "version": version}, data or b""
+        if kind == "result":
+            winner, samples, record, info = decode_result(header, payload)
+            seed, version = header.get("seed"), header.get("version")
+            with self._lock:
+                if seed in actor["leased"]:
+                    actor["leased"].remove(seed)
+                actor["games"] += 1
+                actor["version"] = version
+            item = (header["actor_id"], winner, samples, version, record, info)
+            # Back-pressure: the actor waits for this ack while the learner is behind
+            while not self._stopping.is_set():
+                try:
+                    self.queue.put(item, timeout=0.5)
+                    break
+                except queue.Full:
+                    self._touch(header, address)
+            return {"type": "ack", "stop": self._stopping.is_set()}, b""
+        return {"type": "error", "error": f"unknown message type {kind!r}"}, b""
+
+
+class ActorClient:
+    """
+    Self-play actor for a remote Coordinator: fetch seeds, pull weights when
+    the version changes, play the games, upload records and samples. A
+    background connection sends heartbeats while games are being played.
+    """
+
+    def __init__(self, host: str, port: int, actor_id: Optional[str] = None, heartbeat_interval: float = 5.0,
+                 quiet: bool = True):
+        self.address = (host, port)
+        self.actor_id = actor_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_interval = heartbeat_interval
+        self.quiet = quiet
+        self.model = None
+        self.games = 0
+        self._started = None
+        self._stop = threading.Event()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection(self.address, timeout=None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _header(self, kind: str, **fields) -> Dict[str, Any]:
+        return {"type": kind, "actor_id": self.actor_id, "host": socket.gethostname(), "pid": os.getpid(), **fields}
+
+    def _heartbeat(self):
+        try:
+            with self._connect() as sock:
+                while not self._stop.wait(self.heartbeat_interval):
+                    elapsed = max(time.time() - self._started, 1e-6)
+                    reply, _ = request(sock, self._header("heartbeat", games_per_hour=self.games / elapsed * 3600))
+                    if reply.get("stop"):
+                        break
+        except (ConnectionError, OSError):
+            pass
+
+    def _load_weights(self, sock):
+        from .numpy_net import NumpyValueNet
+        reply, payload = request(sock, self._header("weights"))
+        if reply.get("version") is None or not payload:
+            return
+        self.model = NumpyValueNet(decode_weights(payload), version=reply["version"])
+
+    def play(self, seed: int, opponent_type: str, config: Dict[str, Any]):
+        from .selfplay import self_play_game, ResignConfig
+        from .budget import SimulationBudget
+        resign = ResignConfig(**config["resign"]) if config.get("resign") else None
+        budget = SimulationBudget(**config.get("search_budget", {}))
+        out = open(os.devnull, "w") if self.quiet else None
+        try:
+            with contextlib.redirect_stdout(out) if out else contextlib.nullcontext():
+                return self_play_game(self.model, opponent_type=opponent_type, seed=seed, return_record=True,
+                                      resign=resign, return_info=True, budget=budget)
+        finally:
+            if out:
+                out.close()
+
+    def run(self, max_games: Optional[int] = None):
+        """Play until the coordinator says stop (or max_games). Returns games played."""
+        self._started = time.time()
+        heartbeat = threading.Thread(target=self._heartbeat, name="actor-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            with self._connect() as sock:
+                request(sock, self._header("hello"))
+                try:
+                    self._play_leases(sock, max_games)
+                finally:
+                    self._stop.set()
+                    # Hand back unplayed seeds; the coordinator may already be gone
+                    with contextlib.suppress(ConnectionError, OSError):
+                        request(sock, self._header("bye"))
+        finally:
+            self._stop.set()
+        return self.games
+
+    def _play_leases(self, sock, max_games: Optional[int]):
+        while max_games is None or self.games < max_games:
+            reply, _ = request(sock, self._header("work"))
+            if reply["type"] == "stop":
+                return
+            if reply["type"] == "wait":
+                time.sleep(reply.get("retry_after", 1.0))
+                continue
+            for seed in reply["seeds"]:
+                if self.model is None or self.model.version != reply["version"]:
+                    self._load_weights(sock)
+                winner, samples, record, info = self.play(seed, reply["opponent_type"], reply["config"])
+                header, payload = encode_result(winner, samples, record, info)
+                ack, _ = request(sock, self._header("result", seed=seed, version=self.model.version, **header),
+                                 payload)
+                self.games += 1
+                if ack.get("stop") or (max_games is not None and self.games >= max_games):
+                    return
+
+
+def actor_config(resign=None, search_budget: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """JSON-safe game settings the coordinator sends with every lease."""
+    return {"resign": asdict(resign) if resign is not None else None, "search_budget": search_budget or {}}
+
+
+def run_actor(host: str, port: int, actor_id: Optional[str] = None, max_games: Optional[int] = None) -> int:
+    """Process entry point (see actor.py)."""
+    client = ActorClient(host, port, actor_id=actor_id)
+    return client.run(max_games=max_games)
@@ -1,51 +1,86 @@
 
 import random
 import copy
+import numpy as np
 from typing import List, Dict, Any, Optional
-from GuandanAgent.engine.cards import Card, standard_deck, Rank, Suit
+from GuandanAgent.engine.cards import Card, standard_deck, Rank, Suit, card_id, card_from_id
 from GuandanAgent.engine.logic import get_legal_moves, sort_hand, get_rank_value, get_rank_from_card, get_suit_from_card
 
+# Random 64-bit key per card id. A hand's hash is the SUM of its card keys
+# (mod 2^64) rather than XOR, so duplicate cards from the second deck don't cancel.
+_HASH_MASK = (1 << 64) - 1
+_CARD_KEYS = [random.Random(0x5EED + i).getrandbits(64) for i in range(54)]
+
+def _hand_hash(cards: List[Any]) -> int:
+    h = 0
+    for c in cards:
+        h = (h + _CARD_KEYS[card_id(c)]) & _HASH_MASK
+    return h
+
+def _last_play_key(last_play: Optional[Dict[str, Any]]):
+    if not last_play or not last_play.get('cards'):
+        return None
+    return (last_play.get('type'), tuple(sorted(card_id(c) for c in last_play['cards'])))
+
+# --- Feature layout (FEATURE_DIM floats) ---
+# [0:15]   my hand rank counts (2..A, SJ, BJ), /4
+# [15:19]  cards left per seat, relative to me (me, next, partner, prev), /27
+# [19:29]  last play type one-hot (LAST_PLAY_TYPES)
+# [29]     last play rank (/21, level card counts as 15)
+# [30]     last play size, /10
+# [31:35]  who made the last play, relative seat one-hot
+# [35]     pass count, /3
+# [36]     free play flag (I lead)
+# [37:50]  current level one-hot (2..A)
+# [50]     wild cards (level hearts) in my hand, /2
+# [51:120] reserved, deliberately always zero. The only other state the env
+#          tracks incrementally is each opponent's rank counts, which is hidden
+#          information: player views re-deal it at random, so training and
+#          serving inputs would disagree. Played-card history is not available
+#          to player views either. Published models were trained with these
+#          slots at zero; filling them needs a new layout and retraining.
+FEATURE_DIM = 120
+F_HAND, F_SIZES, F_LP_TYPE, F_LP_RANK, F_LP_SIZE = 0, 15, 19, 29, 30
+F_LP_SEAT, F_PASS, F_FREE, F_LEVEL, F_WILDS = 31, 35, 36, 37, 50
+
+LAST_PLAY_TYPES = ["1", "2", "3", "3+2", "straight", "wooden_board", "steel_plate", "bomb", "straight_flush", "king_bomb"]
+_TYPE_ALIASES = {"single": "1", "pair": "2", "triple": "3", "full_house": "3+2"}
+_LAST_PLAY_TYPE_IDX = {t: i for i, t in enumerate(LAST_PLAY_TYPES)}
+_LEVEL_RANKS = {2: '2', 3: '3', 4: '4', 5: '5', 6: '6', 7: '7', 8: '8', 9: '9', 10: '10',
+                11: 'J', 12: 'Q', 13: 'K', 14: 'A'}
+
+def _rank_index(val: int) -> int:
+    # get_rank_value returns: 2->2 ... A->14, SJ->20, BJ->21
+    if 2 <= val <= 14:
+        return val - 2
+    if val == 20: # Small Joker
+        return 13
+    if val == 21: # Big Joker
+        return 14
+    return 0
+
+# card id -> rank slot, precomputed so per-card updates are a table lookup
+_CARD_RANK_IDX = [_rank_index(get_rank_value(card_from_id(i).rank.value)) for i in range(54)]
+
+# level -> id of its wild card (the level-rank heart)
+_WILD_CARD_ID = {lvl: card_id({'suit': 'H', 'rank': r}) for lvl, r in _LEVEL_RANKS.items()}
+
+def state_to_array(state: 'GuandanEnv') -> np.ndarray:
+    """Feature vector as a fresh float32 array (safe to keep)."""
+    return state.features().copy()
+
 def state_to_vector(state: 'GuandanEnv') -> List[float]:
     """
     Convert Game State to Feature Vector for Neural Network.
-    Dimension: 120 (approx)
+    Dimension: FEATURE_DIM (120). See the layout above; the env maintains it
+    incrementally, this only copies it out.
     """
-    vec = [0.0] * 120
-    
-    # 1. My Hand Rank Counts (15 features)
-    # Ranks: 2, 3, ..., A, LJ, BJ. 
-    # We map them to indices 0-14.
-    if state.my_hand:
-        for card in state.my_hand:
-            # Use helper to handle both Card objects and dicts
-            r_str = get_rank_from_card(card)
-            val = get_rank_value(r_str)
-            
-            # Map val to 0-14 index
-            # get_rank_value returns: 2->2 ... A->14, SJ->20, BJ->21
-            idx = 0
-            if 2 <= val <= 14:
-                idx = val - 2
-            elif val == 20: # Small Joker
-                idx = 13
-            elif val == 21: # Big Joker
-                idx = 14
-            
-            if 0 <= idx < 15:
-                vec[idx] += 1.0/4.0 # Normalize by max count 4 (approx)
-                
-    # 2. Last Play Info
-    # Type (one-hot 10), Rank (1), Size (1)
-    if state.last_play:
-        # Simplified: just put last play rank
-        # ...
-        pass
-        
-    return vec
+    return state.features().tolist()
 
 class GuandanEnv:
     def __init__(self, my_hand: List[Card], last_play: Optional[Dict[str, Any]] = None, 
-                 all_hands: Optional[List[List[Card]]] = None, current_player: int = 0, pass_count: int = 0, current_level: int = 2):
+                 all_hands: Optional[List[List[Card]]] = None, current_player: int = 0, pass_count: int = 0, current_level: int = 2,
+                 hand_sizes: Optional[List[int]] = None):
         """
         Initialize the environment.
         :param my_hand: List of cards for the current player (God View or Player View)
@@ -54,6 +89,8 @@ class GuandanEnv:
         :param current_player: Index of current player (0-3)
         :param pass_count: Current number of consecutive passes
         :param current_level: Current game level (Rank of Wild Card)
+        :param hand_sizes: (Optional) For Player View - public card counts per seat, so the
+                           re-dealt opponent hands have their true sizes
         """
         self.num_players = 4
         self.current_player = current_player
@@ -99,10 +136,20 @@ class GuandanEnv:
             n_rem = len(remaining_deck)
             chunk_size = n_rem // 3
             
-            self.hands[opponents[0]] = sort_hand(remaining_deck[:chunk_size])
-            self.hands[opponents[1]] = sort_hand(remaining_deck[chunk_size:chunk_size*2])
-            self.hands[opponents[2]] = sort_hand(remaining_deck[chunk_size*2:])
+            if hand_sizes is not None:
+                # Card counts are public: deal each opponent exactly what they hold.
+                # The rest of the unseen cards were already played.
+                start = 0
+                for p in opponents:
+                    end = start + min(hand_sizes[p], n_rem - start)
+                    self.hands[p] = sort_hand(remaining_deck[start:end])
+                    start = end
+            else:
+                self.hands[opponents[0]] = sort_hand(remaining_deck[:chunk_size])
+                self.hands[opponents[1]] = sort_hand(remaining_deck[chunk_size:chunk_size*2])
+                self.hands[opponents[2]] = sort_hand(remaining_deck[chunk_size*2:])
         
+
         # 2. Setup Game State
         self.last_play = last_play  # {cards: [], type: str}
         self.pass_count = pass_count
@@ -125,6 +172,69 @@ class GuandanEnv:
             self.last_player_idx = -1 # No one
             self.pass_count = 3 # Treat as free play
 
+        self._init_tracking()
+
+    def _init_tracking(self):
+        """Build the incremental state (hashes, counts, feature buffer) once from the hands."""
+        # Incremental hand hashes (kept in sync by step)
+        self._hand_hashes = [_hand_hash(h) for h in self.hands]
+
+        self._rank_counts = np.zeros((self.num_players, 15), dtype=np.float32)
+        self._wild_counts = [0] * self.num_players
+        self._wild_id = _WILD_CARD_ID.get(self.current_level, _WILD_CARD_ID[2])
+        for p, hand in enumerate(self.hands):
+            for c in hand:
+                cid = card_id(c)
+                self._rank_counts[p, _CARD_RANK_IDX[cid]] += 1
+                if cid == self._wild_id:
+                    self._wild_counts[p] += 1
+
+        self._features = np.zeros(FEATURE_DIM, dtype=np.float32)
+        level = self.current_level
+        if 2 <= level <= 14:
+            self._features[F_LEVEL + level - 2] = 1.0
+        self._write_last_play()
+        self._features_player = None # seat the buffer was last laid out for (None = stale)
+
+    def _write_last_play(self):
+        f = self._features
+        f[F_LP_TYPE:F_LP_SIZE + 1] = 0.0
+        lp = self.last_play
+        if not lp or not lp.get('cards'):
+            return
+        t = lp.get('type')
+        idx = _LAST_PLAY_TYPE_IDX.get(_TYPE_ALIASES.get(t, t))
+        if idx is not None:
+            f[F_LP_TYPE + idx] = 1.0
+        r_val = get_rank_value(get_rank_from_card(lp['cards'][0]))
+        if get_rank_from_card(lp['cards'][0]) == _LEVEL_RANKS.get(self.current_level):
+            r_val = 15
+        f[F_LP_RANK] = r_val / 21.0
+        f[F_LP_SIZE] = len(lp['cards']) / 10.0
+
+    def features(self) -> np.ndarray:
+        """
+        Preallocated feature buffer for the current player's seat (a view:
+        it changes as the env steps, copy it to keep it). Only the seat-relative
+        slots are rewritten here; card counts are maintained by step().
+        """
+        f = self._features
+        me = self.current_player
+        if self._features_player == me:
+            return f
+        f[F_HAND:F_HAND + 15] = self._rank_counts[me]
+        f[F_HAND:F_HAND + 15] *= 0.25 # Normalize by max count 4 (approx)
+        for rel in range(4):
+            f[F_SIZES + rel] = len(self.hands[(me + rel) % 4]) / 27.0
+        f[F_LP_SEAT:F_LP_SEAT + 4] = 0.0
+        if self.last_player_idx != -1:
+            f[F_LP_SEAT + (self.last_player_idx - me) % 4] = 1.0
+        f[F_PASS] = min(self.pass_count, 3) / 3.0
+        f[F_FREE] = 1.0 if (self.pass_count >= 3 or self.last_player_idx == me) else 0.0
+        f[F_WILDS] = self._wild_counts[me] / 2.0
+        self._features_player = me
+        return f
+
     @property
     def my_hand(self):
         return self.hands[self.current_player]
@@ -181,13 +291,25 @@ class GuandanEnv:
                     new_hand.append(c)
             
             self.hands[player] = new_hand
-            
+
+            # Incremental tracking: O(cards played)
+            h = self._hand_hashes[player]
+            for c in cards_to_play:
+                cid = card_id(c)
+                h -= _CARD_KEYS[cid]
+                self._rank_counts[player, _CARD_RANK_IDX[cid]] -= 1
+                if cid == self._wild_id:
+                    self._wild_counts[player] -= 1
+            self._hand_hashes[player] = h & _HASH_MASK
+
             # Update global state
             self.last_play = action
             self.last_player_idx = player
             self.pass_count = 0
+            self._write_last_play()
         else:
             self.pass_count += 1
+        self._features_player = None
             
         # Check Winner
         if len(self.hands[player]) == 0:
@@ -218,6 +340,22 @@ class GuandanEnv:
         
         return self, 0, False, {}
 
+    def state_key(self):
+        """
+        Hashable key covering everything the value network sees from the
+        current player's seat (own hand, hand sizes, last play, turn info).
+        Cheap: the hand hash is maintained incrementally by step().
+        """
+        return (
+            self.current_player,
+            self._hand_hashes[self.current_player],
+            tuple(len(h) for h in self.hands),
+            _last_play_key(self.last_play),
+            self.last_player_idx,
+            self.pass_count,
+            self.current_level,
+        )
+
     def is_done(self) -> bool:
         """Check if game is over (any player has empty hand)."""
         return any(len(h) == 0 for h in self.hands)
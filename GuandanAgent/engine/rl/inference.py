@@ -0,0 +1,212 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+
+class _Request:
+    __slots__ = ("vector", "future", "enqueued_at")
+
+    def __init__(self, vector):
+        self.vector = vector
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchingInferenceServer:
+    """
+    In-process micro-batching front end for a value network.
+
+    Callers (MCTS threads, request handlers, self-play loops) submit single
+    state vectors. A background thread drains the queue into dynamic batches
+    of up to `max_batch_size` vectors, waiting at most `max_wait_ms` for a
+    batch to fill, runs one forward pass and scatters the results back.
+
+    `model` only needs `predict_batch(vectors) -> List[float]` (ModelManager,
+    or any local stand-in). Models that only have `predict(vector)` are
+    evaluated one by one so the server still works with them.
+
+    The server exposes `predict(vector)`, so it can be passed to MCTS in place
+    of a ModelManager.
+    """
+
+    def __init__(self, model, max_batch_size: int = 64, max_wait_ms: float = 2.0, max_queue_size: int = 0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._batch_sizes = Counter()
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._max_queue_depth = 0
+        self._total_wait_s = 0.0
+        self._total_forward_s = 0.0
+
+    # --- Lifecycle ---
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return self
+            self._running = True
+            self._thread = threading.Thread(target=self._serve, name="value-net-batcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            thread = self._thread
+            self._thread = None
+        # Sentinel wakes the worker after what is already queued. If the queue
+        # stays full until `timeout` (model stuck), the queued requests are failed
+        # to make room. Anything still queued afterwards is failed below.
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                self._queue.put(None, timeout=0.05)
+                break
+            except queue.Full:
+                if time.perf_counter() >= deadline:
+                    self._drain_pending(RuntimeError("Inference server stopped"))
+        if thread is not None:
+            thread.join(max(0.0, deadline - time.perf_counter()))
+        self._drain_pending(RuntimeError("Inference server stopped"))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    # --- Client API ---
+
+    def submit(self, state_vector) -> Future:
+        """Queue one state vector. Returns a Future resolving to its value."""
+        req = _Request(state_vector)
+        while True:
+            # Checked and queued under stop()'s lock: once stop() has flipped
+            # _running, nothing can land behind its drain and never resolve
+            with self._lock:
+                if not self._running:
+                    raise RuntimeError("Inference server is not running")
+                try:
+                    self._queue.put_nowait(req)
+                    break
+                except queue.Full:
+                    pass
+            # Back-pressure: wait for room outside the lock, so a full queue
+            # never holds up stop() or the other submitters
+            time.sleep(0.0005)
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+        return req.future
+
+    def predict(self, state_vector, timeout: Optional[float] = None) -> float:
+        """Blocking single prediction (drop-in for ModelManager.predict)."""
+        return self.submit(state_vector).result(timeout)
+
+    def predict_batch(self, state_vectors, timeout: Optional[float] = None) -> List[float]:
+        """Submit several vectors and wait for all of them. They may be merged with other callers' requests."""
+        futures = [self.submit(v) for v in state_vectors]
+        return [f.result(timeout) for f in futures]
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._batches
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self._max_queue_depth,
+            "requests": self._requests,
+            "batches": batches,
+            "errors": self._errors,
+            "mean_batch_size": (self._requests / batches) if batches else 0.0,
+            "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            "mean_queue_wait_ms": (self._total_wait_s / self._requests * 1000.0) if self._requests else 0.0,
+            "mean_forward_ms": (self._total_forward_s / batches * 1000.0) if batches else 0.0,
+        }
+
+    # --- Worker ---
+
+    def _collect_batch(self, first: _Request) -> List[_Request]:
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    req = self._queue.get_nowait()
+                else:
+                    req = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if req is None:
+                # Stop requested: finish this batch, let the loop exit afterwards.
+                self._queue.put(None)
+                break
+            batch.append(req)
+        return batch
+
+    def _forward(self, vectors) -> List[float]:
+        if hasattr(self.model, "predict_batch"):
+            return list(self.model.predict_batch(vectors))
+        return [self.model.predict(v) for v in vectors]
+
+    def _serve(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect_batch(first)
+            # Skip requests whose caller already cancelled
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                values = self._forward([r.vector for r in batch])
+                if len(values) != len(batch):
+                    raise RuntimeError(f"Model returned {len(values)} values for a batch of {len(batch)}")
+            except Exception as e:
+                self._errors += 1
+                for r in batch:
+                    r.future.set_exception(e)
+                continue
+            end = time.perf_counter()
+
+            self._batches += 1
+            self._requests += len(batch)
+            self._batch_sizes[len(batch)] += 1
+            self._total_forward_s += end - start
+            for r, v in zip(batch, values):
+                self._total_wait_s += start - r.enqueued_at
+                r.future.set_result(v)
+
+    def _drain_pending(self, error: Exception):
+        while True:
+            try:
+                req = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if req is not None and req.future.set_running_or_notify_cancel():
+                req.future.set_exception(error)
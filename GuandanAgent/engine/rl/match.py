@@ -0,0 +1,148 @@
+import random
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .env import GuandanEnv, state_to_vector
+from .mcts import MCTS
+from .records import GameRecord
+from GuandanAgent.engine.cards import standard_deck, card_id
+
+# A policy maps the full-information env to the current player's action.
+# Policies must only look at what that player can see.
+Policy = Callable[[GuandanEnv], Dict[str, Any]]
+
+
+def deal(seed: int):
+    """Seeded deal: (hands, start_player, level), as used by self-play."""
+    rng = random.Random(seed)
+    deck = standard_deck() * 2
+    rng.shuffle(deck)
+    hands = [deck[i * 27:(i + 1) * 27] for i in range(4)]
+    start_player = rng.randint(0, 3)
+    level = rng.randint(2, 14)
+    return hands, start_player, level
+
+
+def player_view(env: GuandanEnv) -> GuandanEnv:
+    """The current player's view: own hand exact, other hands re-dealt at random (at their true sizes)."""
+    return GuandanEnv(my_hand=env.hands[env.current_player], last_play=env.last_play,
+                      current_player=env.current_player, pass_count=env.pass_count,
+                      current_level=env.current_level, hand_sizes=[len(h) for h in env.hands])
+
+
+def effective_last_play(env: GuandanEnv) -> Optional[Dict[str, Any]]:
+    """The play to beat, or None when the current player leads."""
+    if env.pass_count >= 3 or env.last_player_idx == env.current_player or not env.last_play:
+        return None
+    return env.last_play
+
+
+def _match_legal(actions: List[Dict[str, Any]], move: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if move.get('action') == 'pass':
+        return next((a for a in actions if a['action'] == 'pass'), None)
+    target = sorted(card_id(c) for c in move.get('cards', []))
+    for a in actions:
+        if a['action'] != 'pass' and sorted(card_id(c) for c in a['cards']) == target:
+            return a
+    return None
+
+
+def simple_policy(env: GuandanEnv) -> Dict[str, Any]:
+    """simple_strategy.decide_move (the HappyGuandan rules), checked against the legal moves."""
+    from GuandanAgent.engine.simple_strategy import decide_move
+    last_play = effective_last_play(env)
+    if last_play is not None and 'player_index' not in last_play:
+        last_play = dict(last_play, player_index=env.last_player_idx)
+    actions = env.get_legal_actions()
+    move = decide_move(env.hands[env.current_player], last_play, current_level=env.current_level,
+                       my_player_index=env.current_player)
+    action = _match_legal(actions, move)
+    if action is None:
+        # Illegal suggestion (e.g. a type the generator names differently): pass if allowed
+        action = next((a for a in actions if a['action'] == 'pass'), None) or MCTS(model=None)._heuristic_policy(actions, env)
+    return action
+
+
+def heuristic_policy(env: GuandanEnv) -> Dict[str, Any]:
+    """MCTS._heuristic_policy (the rollout policy, 30% random moves)."""
+    return MCTS(model=None)._heuristic_policy(env.get_legal_actions(), env)
+
+
+class ValueGreedyPolicy:
+    """
+    One-ply search with a value model: play the move whose resulting position
+    is best for the mover's team. All candidates are scored in one batch.
+    Works on the player's view, so hidden hands are never used.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, env: GuandanEnv) -> Dict[str, Any]:
+        actions = env.get_legal_actions()
+        if len(actions) == 1:
+            return actions[0]
+        view = player_view(env)
+        me = env.current_player
+        vectors, signs = [], []
+        for a in actions:
+            child = view.clone()
+            child.step(a)
+            vectors.append(state_to_vector(child))
+            # The value is from the next mover's seat: flip it for opponents
+            signs.append(1.0 if child.current_player % 2 == me % 2 else -1.0)
+        values = self.model.predict_batch(vectors)
+        scores = [s * v for s, v in zip(signs, values)]
+        return actions[max(range(len(actions)), key=scores.__getitem__)]
+
+
+class MCTSPolicy:
+    """Value-network MCTS from the player's view (what self-play uses)."""
+
+    def __init__(self, model, simulations: int = 50):
+        self.mcts = MCTS(model=model)
+        self.simulations = simulations
+
+    def __call__(self, env: GuandanEnv) -> Dict[str, Any]:
+        actions = env.get_legal_actions()
+        if len(actions) == 1:
+            return actions[0]
+        return self.mcts.search(player_view(env), num_simulations=self.simulations)
+
+
+def play_game(policies: Sequence[Policy], seed: int, max_steps: int = 200,
+              record: bool = False, observer: Optional[Callable[[GuandanEnv, Dict[str, Any]], None]] = None
+              ) -> Dict[str, Any]:
+    """
+    Play one seeded game, seat i using policies[i]. Returns
+    {"seed", "winner" (team 0/1, -1 if the step cap was hit), "steps",
+    "start_player", "level", "first_out"} plus "record" (GameRecord) if asked.
+    The same seed always gives the same deal; policy randomness is seeded too.
+    `observer(env, action)` is called before each move is applied.
+    """
+    hands, start_player, level = deal(seed)
+    env = GuandanEnv(my_hand=[], all_hands=hands, current_player=start_player, current_level=level)
+    game_record = GameRecord.from_hands(hands, level, start_player, seed=seed) if record else None
+
+    rng_state = random.getstate()
+    random.seed(seed)
+    try:
+        steps = 0
+        while not env.is_done() and steps < max_steps:
+            action = policies[env.current_player](env)
+            if observer is not None:
+                observer(env, action)
+            if game_record is not None:
+                game_record.add_move(action)
+            env.step(action)
+            steps += 1
+    finally:
+        random.setstate(rng_state)
+
+    first_out = next((i for i in range(4) if not env.hands[i]), -1)
+    winner = -1 if first_out == -1 else first_out % 2
+    result = {"seed": seed, "winner": winner, "steps": steps, "start_player": start_player,
+              "level": level, "first_out": first_out}
+    if game_record is not None:
+        game_record.winner = winner
+        result["record"] = game_record
+    return result
@@ -61,7 +61,16 @@ class MCTS:
         self.time_limit_ms = time_limit_ms
         self.model = model # Value Network (optional)
 
-    def search(self, root_state: GuandanEnv, num_simulations: int = None) -> Dict[str, Any]:
+    def search(self, root_state: GuandanEnv, num_simulations: int = None, min_simulations: int = None) -> Dict[str, Any]:
+        """
+        Best action for root_state after num_simulations iterations (or
+        time_limit_ms). With min_simulations, a fixed-count search stops once
+        the most visited root move can no longer be overtaken.
+        """
+        # Pin the model for the whole search: a hot-swapped model (registry.HotSwapModel)
+        # may move to a new version mid-search, this search keeps the weights it started with.
+        model = self.model.snapshot() if hasattr(self.model, 'snapshot') else self.model
+
         root_node = MCTSNode(root_state.clone())
         
         # Filter "Stupid Bombs" at Root (Pruning)
@@ -87,6 +96,8 @@ class MCTS:
             if num_simulations is not None:
                 if iterations >= num_simulations:
                     break
+                if min_simulations is not None and iterations >= min_simulations and self._decided(root_node, num_simulations - iterations):
+                    break
             elif time.time() - start_time > (self.time_limit_ms / 1000.0):
                  break
 
@@ -101,7 +112,7 @@ class MCTS:
                 node = self.expand(node)
                 
             # Rollout
-            result = self.rollout(node.state)
+            result = self.rollout(node.state, model)
             
             # Backpropagate
             self.backpropagate(node, result)
@@ -194,6 +205,14 @@ class MCTS:
         
         return action
 
+    @staticmethod
+    def _decided(root: MCTSNode, remaining: int) -> bool:
+        """True if the remaining iterations cannot change the most visited root move."""
+        if not root.is_fully_expanded() or len(root.children) < 2:
+            return root.is_fully_expanded() and len(root.children) == 1
+        visits = sorted((c.visits for c in root.children.values()), reverse=True)
+        return visits[0] - visits[1] > remaining
+
     def expand(self, node: MCTSNode) -> MCTSNode:
         action = node.untried_actions.pop()
         next_state = node.state.clone()
@@ -207,9 +226,10 @@ class MCTS:
         node.children[key] = child_node
         return child_node
 
-    def rollout(self, state: GuandanEnv) -> float:
+    def rollout(self, state: GuandanEnv, model=None) -> float:
+        model = model if model is not None else self.model
         # If we have a Value Network, use it to estimate value of this state
-        if self.model:
+        if model:
             from .env import state_to_vector # Local import to avoid circular dependency
             
             # Convert state to vector
@@ -217,8 +237,12 @@ class MCTS:
             # The model predicts value for the CURRENT player's team (or Team 0).
             # Model output: 1.0 means Team 0 wins. -1.0 means Team 1 wins.
             
+            if hasattr(model, 'predict_state'):
+                # ValueCache: keyed by the state hash, skips featurization on a hit
+                return model.predict_state(state)
+
             vec = state_to_vector(state)
-            value = self.model.predict(vec) # Returns scalar [-1, 1] (Team 0 perspective)
+            value = model.predict(vec) # Returns scalar [-1, 1] (Team 0 perspective)
             
             return value
 
@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional
+
+
+class DownsampledSeries:
+    """
+    Multi-resolution time series with bounded memory.
+
+    Level 0 keeps the last `points_per_level` raw points; level k keeps means
+    over blocks of factor**k points. add() is O(1) amortized, and points()
+    returns the recent past at full resolution and older history coarser.
+    """
+
+    def __init__(self, points_per_level: int = 200, factor: int = 10, levels: int = 5):
+        self.factor = factor
+        self.levels = [deque(maxlen=points_per_level) for _ in range(levels)]
+        # Running (sum, count) of the block being built for levels 1..
+        self._acc = [[0.0, 0] for _ in range(levels)]
+
+    def add(self, x, value: float):
+        self.levels[0].append((x, value))
+        for k in range(1, len(self.levels)):
+            acc = self._acc[k]
+            acc[0] += value
+            acc[1] += 1
+            if acc[1] < self.factor:
+                return
+            value = acc[0] / acc[1]
+            self.levels[k].append((x, value))
+            acc[0], acc[1] = 0.0, 0
+
+    def points(self) -> List[tuple]:
+        """All levels merged: each coarser level only covers what finer levels no longer hold."""
+        merged = []
+        start = None
+        for level in self.levels:
+            if not level:
+                continue
+            older = [p for p in level if start is None or p[0] < start]
+            merged = older + merged
+            start = level[0][0] if start is None else min(start, level[0][0])
+        return merged
+
+
+class TrainingMetrics:
+    """
+    In-memory training statistics built from metric records. Snapshots use
+    the same shape as the old training_stats.json ("trend" is downsampled).
+    """
+
+    HISTORY_SIZE = 100
+
+    def __init__(self):
+        self.games_played = 0
+        self.history = deque(maxlen=self.HISTORY_SIZE)
+        self.trend = DownsampledSeries()
+        self.model_version = None
+        self.last_train = None
+        self.updated = None
+        # Early-stop bookkeeping: outcome counts, steps played, playout checks of resignations
+        self.outcomes = Counter()
+        self.total_steps = 0
+        self.resign_checks = 0
+        self.false_resigns = 0
+
+    @property
+    def win_rate(self) -> float:
+        return sum(self.history) / len(self.history) if self.history else 0
+
+    def apply(self, record: Dict[str, Any]):
+        event = record.get("event", "game")
+        if event == "game":
+            self.games_played = record["game"]
+            self.history.append(record["win"])
+            self.trend.add(self.games_played, record.get("win_rate", self.win_rate))
+            if "model_version" in record:
+                self.model_version = record["model_version"]
+            if "outcome" in record:
+                self.outcomes[record["outcome"]] += 1
+                self.total_steps += record.get("steps", 0)
+            if "false_resign" in record:
+                self.resign_checks += 1
+                self.false_resigns += int(record["false_resign"])
+        elif event == "train":
+            self.last_train = {k: v for k, v in record.items() if k != "event"}
+        elif event == "import":
+            # One-off migration of a legacy training_stats.json
+            self.games_played = record.get("games_played", 0)
+            self.history.extend(record.get("history", []))
+            for point in record.get("trend", []):
+                self.trend.add(point["game"], point["win_rate"])
+            self.model_version = record.get("model_version", self.model_version)
+        self.updated = record.get("t", self.updated)
+
+    def snapshot(self) -> Dict[str, Any]:
+        snap = {
+            "games_played": self.games_played,
+            "current_win_rate": self.win_rate,
+            "model_version": self.model_version or f"Trained on {self.games_played} games",
+            "history": list(self.history),
+            "trend": [{"game": g, "win_rate": w} for g, w in self.trend.points()],
+            "updated": self.updated,
+        }
+        if self.last_train:
+            snap["last_train"] = self.last_train
+        if self.outcomes:
+            games = sum(self.outcomes.values())
+            snap["outcomes"] = dict(self.outcomes)
+            snap["mean_steps"] = self.total_steps / games
+            snap["false_resign_rate"] = self.false_resigns / self.resign_checks if self.resign_checks else None
+        return snap
+
+
+class MetricsLog:
+    """
+    Append-only JSON-lines metrics file: one line per game (plus training
+    events). Writing a game costs one small append regardless of run length.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def append(self, record: Dict[str, Any]):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        record.setdefault("t", time.time())
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def tell(self) -> int:
+        if self._file is not None:
+            self._file.flush()
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def truncate(self, offset: int):
+        """Drop records written after `offset` (from tell()), e.g. on resume."""
+        self.close()
+        if os.path.exists(self.path) and os.path.getsize(self.path) > offset:
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+
+class MetricsReader:
+    """
+    Follows a MetricsLog and keeps a TrainingMetrics snapshot in memory.
+    refresh() only parses lines appended since the last call (an unchanged
+    file costs one stat()); a truncated or replaced file is re-read from
+    the start.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.metrics = TrainingMetrics()
+        self._offset = 0
+        self._ino = None
+        self._snapshot = None
+
+    def refresh(self) -> bool:
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return False
+            if st.st_ino != self._ino or st.st_size < self._offset:
+                self._reset()
+                self._ino = st.st_ino
+            if st.st_size == self._offset:
+                return False
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(st.st_size - self._offset)
+            # Leave a partially written last line for the next refresh
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                try:
+                    self.metrics.apply(json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+            self._offset += end
+            self._snapshot = None
+            return end > 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def snapshot(self) -> Dict[str, Any]:
+        self.refresh()
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self.metrics.snapshot()
+            return self._snapshot
+
+
+def load_metrics(path: str) -> TrainingMetrics:
+    """Rebuild the in-memory metrics from a log file (once, at startup)."""
+    reader = MetricsReader(path)
+    reader.refresh()
+    return reader.metrics
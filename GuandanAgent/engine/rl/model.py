@@ -1,47 +1,134 @@
-
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
 import os
+import time
+import numpy as np
+from .numpy_net import NumpyValueNet, save_npz, npz_path_for
+
+# torch is only imported when a training-capable ModelManager is built (or
+# GuandanValueNet is accessed). Inference-only managers run on NumPy.
+_value_net_class = None
+
+
+def _get_value_net_class():
+    global _value_net_class
+    if _value_net_class is not None:
+        return _value_net_class
+
+    import torch
+    import torch.nn as nn
+    import torch.nn.functional as F
+
+    class GuandanValueNet(nn.Module):
+        def __init__(self, input_dim=120, hidden_dim=128):
+            """
+            Simple Value Network for Guandan.
+            Input: Feature vector of the game state.
+            Output: Value in [-1, 1] (1 = Team 0 wins, -1 = Team 1 wins).
+            """
+            super(GuandanValueNet, self).__init__()
+            self.fc1 = nn.Linear(input_dim, hidden_dim)
+            self.fc2 = nn.Linear(hidden_dim, hidden_dim)
+            self.fc3 = nn.Linear(hidden_dim, 1)
+
+        def forward(self, x):
+            x = F.relu(self.fc1(x))
+            x = F.relu(self.fc2(x))
+            x = torch.tanh(self.fc3(x)) # Output between -1 and 1
+            return x
+
+    _value_net_class = GuandanValueNet
+    return _value_net_class
+
+
+def __getattr__(name):
+    # Lazy attribute so `from engine.rl.model import GuandanValueNet` still works
+    if name == "GuandanValueNet":
+        return _get_value_net_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-class GuandanValueNet(nn.Module):
-    def __init__(self, input_dim=120, hidden_dim=128):
-        """
-        Simple Value Network for Guandan.
-        Input: Feature vector of the game state.
-        Output: Value in [-1, 1] (1 = Team 0 wins, -1 = Team 1 wins).
-        """
-        super(GuandanValueNet, self).__init__()
-        self.fc1 = nn.Linear(input_dim, hidden_dim)
-        self.fc2 = nn.Linear(hidden_dim, hidden_dim)
-        self.fc3 = nn.Linear(hidden_dim, 1)
-        
-    def forward(self, x):
-        x = F.relu(self.fc1(x))
-        x = F.relu(self.fc2(x))
-        x = torch.tanh(self.fc3(x)) # Output between -1 and 1
-        return x
 
 class ModelManager:
-    def __init__(self, model_path="model_v1.pth"):
+    def __init__(self, model_path="model_v1.pth", training=True, quantized=None):
+        """
+        training=True: torch model + Adam optimizer (train.py).
+        training=False: NumPy-only inference; loads the exported .npz next to
+        model_path and never imports torch unless only a .pth exists.
+        quantized="int8"/"float16" (inference only): serve the calibrated
+        quantize_model.py output (model_v1.int8.npz) when there is one, else
+        quantize the float weights on load.
+        """
+        if quantized is not None and training:
+            raise ValueError("quantized models are inference-only (training=False)")
         self.model_path = model_path
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model = GuandanValueNet().to(self.device)
-        self.optimizer = torch.optim.Adam(self.model.parameters(), lr=0.001)
+        self.npz_path = npz_path_for(model_path)
+        self.training = training
+        self.quantized = quantized
+        self.model = None
+        self.optimizer = None
+        self.numpy_model = None
+        # Bumped whenever the weights change, so caches keyed on it stay valid
+        self.version = 0
+
+        if training:
+            import torch
+            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            self.model = _get_value_net_class()().to(self.device)
+            self.optimizer = torch.optim.Adam(self.model.parameters(), lr=0.001)
+        else:
+            self.device = "cpu"
         self.load_model()
 
     def load_model(self):
+        if not self.training:
+            self._load_numpy_model()
+            return
+
+        import torch
         if os.path.exists(self.model_path):
             try:
                 self.model.load_state_dict(torch.load(self.model_path, map_location=self.device))
                 self.model.eval()
+                self.version += 1
                 print(f"Loaded model from {self.model_path}")
             except Exception as e:
                 print(f"Failed to load model: {e}")
         else:
             print("No existing model found. Starting fresh.")
 
+    def _load_numpy_model(self):
+        if self.quantized is not None:
+            from .quantize import QuantizedValueNet, quantized_path_for
+            quantized_path = quantized_path_for(self.model_path, self.quantized)
+            if os.path.exists(quantized_path):
+                self.numpy_model = QuantizedValueNet.load(quantized_path)
+                print(f"Loaded {self.quantized} inference model from {quantized_path}")
+                return
+        self._load_float_numpy_model()
+        if self.quantized is not None:
+            from .quantize import QuantizedValueNet
+            self.numpy_model = QuantizedValueNet.from_value_net(self.numpy_model, self.quantized)
+
+    def _load_float_numpy_model(self):
+        if os.path.exists(self.npz_path):
+            self.numpy_model = NumpyValueNet.from_npz(self.npz_path)
+            print(f"Loaded inference model from {self.npz_path}")
+            return
+
+        # No export yet: convert the checkpoint once (needs torch), then serve from NumPy
+        import torch
+        state_dict = None
+        if os.path.exists(self.model_path):
+            try:
+                state_dict = torch.load(self.model_path, map_location="cpu")
+                print(f"Loaded model from {self.model_path} (converted for NumPy inference)")
+            except Exception as e:
+                print(f"Failed to load model: {e}")
+        if state_dict is None:
+            print("No existing model found. Starting fresh.")
+            state_dict = _get_value_net_class()().state_dict()
+        self.numpy_model = NumpyValueNet(state_dict)
+
     def save_model(self):
+        import torch
         tmp_path = self.model_path + ".tmp"
         torch.save(self.model.state_dict(), tmp_path)
         try:
@@ -59,33 +146,164 @@ class ModelManager:
                      os.remove(tmp_path)
                  except:
                      pass
+        self.export_numpy()
+
+    def training_state(self):
+        """Weights, optimizer state and version, for full training checkpoints."""
+        return {
+            "model": self.model.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+            "version": self.version,
+        }
+
+    def load_training_state(self, state):
+        self.model.load_state_dict(state["model"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        self.model.eval()
+        self.version = state["version"]
+
+    def export_numpy(self, path=None):
+        """Export weights to .npz for the torch-free inference runtime."""
+        path = path or self.npz_path
+        try:
+            save_npz(self.model.state_dict(), path)
+        except OSError as e:
+            print(f"Error exporting NumPy weights: {e}")
+        return path
 
     def predict(self, state_vector):
         """
         Predict value for a single state vector.
         """
+        if self.numpy_model is not None:
+            return self.numpy_model.predict(state_vector)
+        import torch
         with torch.no_grad():
             tensor = torch.FloatTensor(state_vector).unsqueeze(0).to(self.device)
             value = self.model(tensor)
             return value.item()
 
-    def train(self, states, targets, epochs=1):
+    def predict_batch(self, state_vectors):
+        """
+        Predict values for a batch of state vectors in one forward pass.
+        Returns a list of floats in the same order as the input.
+        """
+        if len(state_vectors) == 0:
+            return []
+        if self.numpy_model is not None:
+            return self.numpy_model.predict_batch(state_vectors)
+        import torch
+        with torch.no_grad():
+            tensor = torch.FloatTensor(state_vectors).to(self.device)
+            values = self.model(tensor)
+            return values.squeeze(1).tolist()
+
+    def train(self, states, targets, epochs=1, weights=None, return_errors=False):
         """
         Train the model on a batch of data.
         states: List of feature vectors
         targets: List of values (-1 or 1)
+        weights: Optional per-sample loss weights (importance sampling)
+        return_errors: Also return the per-sample errors (prediction - target)
+                       of the last epoch, measured before its update step
         """
+        if not self.training:
+            raise RuntimeError("ModelManager was created with training=False")
+        import torch
+
         self.model.train()
-        
-        state_tensor = torch.FloatTensor(states).to(self.device)
-        target_tensor = torch.FloatTensor(targets).unsqueeze(1).to(self.device)
-        
+
+        state_tensor = torch.from_numpy(np.asarray(states, dtype=np.float32)).to(self.device)
+        target_tensor = torch.from_numpy(np.asarray(targets, dtype=np.float32)).unsqueeze(1).to(self.device)
+        weight_tensor = None
+        if weights is not None:
+            weight_tensor = torch.from_numpy(np.asarray(weights, dtype=np.float32)).unsqueeze(1).to(self.device)
+
         for _ in range(epochs):
             self.optimizer.zero_grad()
             outputs = self.model(state_tensor)
-            loss = F.mse_loss(outputs, target_tensor)
+            errors = outputs - target_tensor
+            sq = errors ** 2
+            loss = (sq * weight_tensor).mean() if weight_tensor is not None else sq.mean()
             loss.backward()
             self.optimizer.step()
-            
+
         self.model.eval()
+        self.version += 1
+        if return_errors:
+            return loss.item(), errors.detach().squeeze(1).cpu().numpy()
         return loss.item()
+
+    def train_from_buffer(self, buffer, batch_size=256, num_batches=10, accumulation_steps=1,
+                          prefetch=2, rng=None):
+        """
+        Minibatch training straight from a ReplayBuffer.
+
+        Batches are sampled, converted to tensors and moved to the device on a
+        background thread, `prefetch` batches ahead of the gradient steps.
+        Gradients are accumulated over `accumulation_steps` minibatches per
+        optimizer step (effective batch = batch_size * accumulation_steps).
+        Importance-sampling weights are applied, and for a prioritized buffer
+        the per-sample errors are written back as new priorities.
+
+        Returns {"loss", "batches", "samples", "optimizer_steps", "seconds", "samples_per_sec"}.
+        """
+        if not self.training:
+            raise RuntimeError("ModelManager was created with training=False")
+        import torch
+        from .replay import BatchPrefetcher
+
+        device = self.device
+        non_blocking = device.type == "cuda"
+
+        def to_tensors(batch):
+            states, rewards, indices, weights = batch
+            tensors = [torch.from_numpy(np.ascontiguousarray(a, dtype=np.float32))
+                       for a in (states, rewards, weights)]
+            if non_blocking:
+                tensors = [t.pin_memory() for t in tensors]
+            s, r, w = (t.to(device, non_blocking=non_blocking) for t in tensors)
+            return s, r.unsqueeze(1), w.unsqueeze(1), indices
+
+        update_priorities = getattr(buffer, "update_priorities", None)
+        accumulation_steps = max(1, accumulation_steps)
+        total_loss = 0.0
+        batches = samples = steps = 0
+        start = time.perf_counter()
+
+        self.model.train()
+        self.optimizer.zero_grad()
+        with BatchPrefetcher(buffer.iter_minibatches(batch_size, num_batches, rng), depth=prefetch,
+                             transform=to_tensors) as prefetcher:
+            for state_t, target_t, weight_t, indices in prefetcher:
+                outputs = self.model(state_t)
+                errors = outputs - target_t
+                loss = (errors ** 2 * weight_t).mean()
+                (loss / accumulation_steps).backward()
+                batches += 1
+                samples += len(indices)
+                total_loss += loss.item()
+                if batches % accumulation_steps == 0:
+                    self.optimizer.step()
+                    self.optimizer.zero_grad()
+                    steps += 1
+                if update_priorities is not None:
+                    update_priorities(indices, errors.detach().squeeze(1).cpu().numpy())
+        if batches % accumulation_steps:
+            self.optimizer.step()
+            self.optimizer.zero_grad()
+            steps += 1
+
+        self.model.eval()
+        if steps:
+            # Unchanged weights keep their version (and their value-cache entries)
+            self.version += 1
+        seconds = time.perf_counter() - start
+        return {
+            "loss": total_loss / batches if batches else 0.0,
+            "batches": batches,
+            "samples": samples,
+            "optimizer_steps": steps,
+            "seconds": seconds,
+            "samples_per_sec": samples / seconds if seconds > 0 else 0.0,
+        }
@@ -0,0 +1,108 @@
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Layer layout of GuandanValueNet (see model.py). Kept here so the inference
+# runtime can be built without importing torch.
+VALUE_NET_LAYERS = [("fc1", "relu"), ("fc2", "relu"), ("fc3", "tanh")]
+
+_ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0.0, out=x),
+    "tanh": lambda x: np.tanh(x, out=x),
+    "sigmoid": lambda x: np.divide(1.0, 1.0 + np.exp(-x, out=x), out=x),
+    "linear": lambda x: x,
+}
+
+
+def _to_numpy(value) -> np.ndarray:
+    """Accept numpy arrays, nested lists or torch tensors (without importing torch)."""
+    if hasattr(value, "detach"):
+        value = value.detach().cpu().numpy()
+    return np.asarray(value, dtype=np.float32)
+
+
+class NumpyMLP:
+    """
+    Inference-only multilayer perceptron running on NumPy matmuls.
+    layers: list of (weight [out, in], bias [out], activation name),
+    weights use the torch nn.Linear layout.
+    """
+
+    def __init__(self, layers: Sequence[Tuple[Any, Any, str]]):
+        self.layers = []
+        for weight, bias, activation in layers:
+            if activation not in _ACTIVATIONS:
+                raise ValueError(f"Unknown activation: {activation}")
+            w = _to_numpy(weight)
+            # Store W transposed and contiguous so forward is a plain x @ W
+            self.layers.append((np.ascontiguousarray(w.T), _to_numpy(bias), activation))
+
+    @property
+    def input_dim(self) -> int:
+        return self.layers[0][0].shape[0]
+
+    def forward(self, x) -> np.ndarray:
+        """x: [batch, input_dim] (or a single [input_dim] vector). Returns [batch, out]."""
+        h = np.asarray(x, dtype=np.float32)
+        if h.ndim == 1:
+            h = h[None, :]
+        for w_t, b, activation in self.layers:
+            h = h @ w_t
+            h += b
+            h = _ACTIVATIONS[activation](h)
+        return h
+
+    __call__ = forward
+
+    def nbytes(self) -> int:
+        return sum(w.nbytes + b.nbytes for w, b, _ in self.layers)
+
+
+class NumpyValueNet(NumpyMLP):
+    """
+    NumPy twin of GuandanValueNet. Exposes the same predict / predict_batch
+    interface as ModelManager so MCTS and the inference server can use it.
+    """
+
+    def __init__(self, state_dict: Dict[str, Any], version=None):
+        super().__init__([
+            (state_dict[f"{name}.weight"], state_dict[f"{name}.bias"], act)
+            for name, act in VALUE_NET_LAYERS
+        ])
+        self.version = version
+
+    @classmethod
+    def from_npz(cls, path: str, version=None) -> "NumpyValueNet":
+        with np.load(path) as data:
+            return cls({k: data[k] for k in data.files}, version=version)
+
+    def predict(self, state_vector) -> float:
+        return float(self.forward(state_vector)[0, 0])
+
+    def predict_batch(self, state_vectors) -> List[float]:
+        if len(state_vectors) == 0:
+            return []
+        return self.forward(state_vectors)[:, 0].tolist()
+
+    def state_dict(self) -> Dict[str, np.ndarray]:
+        out = {}
+        for (name, _), (w_t, b, _) in zip(VALUE_NET_LAYERS, self.layers):
+            out[f"{name}.weight"] = np.ascontiguousarray(w_t.T)
+            out[f"{name}.bias"] = b
+        return out
+
+
+def save_npz(state_dict: Dict[str, Any], path: str):
+    """Export a (torch or numpy) state dict to an .npz file, atomically."""
+    arrays = {k: _to_numpy(v) for k, v in state_dict.items()}
+    # np.savez appends .npz to names without it, so keep the suffix on the temp file
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def npz_path_for(model_path: str) -> str:
+    """model_v1.pth -> model_v1.npz"""
+    root, _ = os.path.splitext(model_path)
+    return root + ".npz"
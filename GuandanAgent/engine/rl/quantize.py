@@ -0,0 +1,211 @@
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .numpy_net import NumpyMLP, NumpyValueNet, VALUE_NET_LAYERS, _ACTIVATIONS
+
+QUANT_MODES = ("int8", "float16")
+
+# Candidate clipping percentiles tried per layer by calibrate(). 100 = plain max-abs scaling.
+DEFAULT_CLIP_PERCENTILES = (100.0, 99.99, 99.9, 99.5)
+
+
+def quantize_weight_int8(w: np.ndarray, clip_percentile: float = 100.0):
+    """
+    Symmetric per-output-channel int8 quantization.
+    w: [out, in] (nn.Linear layout). Returns (q [out, in] int8, scale [out] float32).
+    """
+    w = np.asarray(w, dtype=np.float32)
+    absw = np.abs(w)
+    if clip_percentile >= 100.0:
+        max_abs = absw.max(axis=1)
+    else:
+        max_abs = np.percentile(absw, clip_percentile, axis=1)
+    scale = (max_abs / 127.0).astype(np.float32)
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(w / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale
+
+
+class QuantizedMLP:
+    """
+    Weight-only quantized MLP. Weights are stored as per-channel int8 (+ float32
+    scales) or float16: that is what save() writes and nbytes() counts, 2-4x
+    smaller files to publish and ship. NumPy has no fast int8 matmul, so the
+    weights are dequantized once, when the model is built (scales folded in),
+    and forward runs float32 matmuls at the float net's speed with the
+    quantized model's values.
+    """
+
+    def __init__(self, layers: Sequence[Dict[str, Any]], mode: str):
+        if mode not in QUANT_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        self.mode = mode
+        # Each layer: {"weight": int8/float16 [in, out], "scale": [out] or None, "bias": float32 [out], "activation": str}
+        self.layers = list(layers)
+        self._compute = []
+        for layer in self.layers:
+            w = layer["weight"].astype(np.float32)
+            if layer["scale"] is not None:
+                w *= layer["scale"][None, :]
+            self._compute.append((np.ascontiguousarray(w), layer["bias"], layer["activation"]))
+
+    @classmethod
+    def from_mlp(cls, mlp: NumpyMLP, mode: str = "int8", clip_percentiles: Optional[Sequence[float]] = None):
+        if mode not in QUANT_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        layers = []
+        for i, (w_t, b, activation) in enumerate(mlp.layers):
+            w = w_t.T
+            if mode == "int8":
+                pct = clip_percentiles[i] if clip_percentiles else 100.0
+                q, scale = quantize_weight_int8(w, pct)
+                layers.append({"weight": np.ascontiguousarray(q.T), "scale": scale, "bias": b, "activation": activation})
+            else:
+                layers.append({"weight": np.ascontiguousarray(w_t.astype(np.float16)), "scale": None,
+                               "bias": b, "activation": activation})
+        return cls(layers, mode)
+
+    def forward(self, x) -> np.ndarray:
+        h = np.asarray(x, dtype=np.float32)
+        if h.ndim == 1:
+            h = h[None, :]
+        for w, b, activation in self._compute:
+            h = h @ w
+            h += b
+            h = _ACTIVATIONS[activation](h)
+        return h
+
+    __call__ = forward
+
+    def nbytes(self) -> int:
+        total = 0
+        for layer in self.layers:
+            total += layer["weight"].nbytes + layer["bias"].nbytes
+            if layer["scale"] is not None:
+                total += layer["scale"].nbytes
+        return total
+
+    def to_arrays(self, names: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Flatten to named arrays (nn.Linear layout) for saving."""
+        out = {"__mode__": np.array(self.mode)}
+        for name, layer in zip(names, self.layers):
+            out[f"{name}.weight"] = np.ascontiguousarray(layer["weight"].T)
+            out[f"{name}.bias"] = layer["bias"]
+            if layer["scale"] is not None:
+                out[f"{name}.scale"] = layer["scale"]
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], layer_spec: Sequence[tuple]):
+        mode = str(arrays["__mode__"])
+        layers = []
+        for name, activation in layer_spec:
+            scale_key = f"{name}.scale"
+            layers.append({
+                "weight": np.ascontiguousarray(arrays[f"{name}.weight"].T),
+                "scale": arrays[scale_key].astype(np.float32) if scale_key in arrays else None,
+                "bias": arrays[f"{name}.bias"].astype(np.float32),
+                "activation": activation,
+            })
+        return cls(layers, mode)
+
+
+class QuantizedValueNet(QuantizedMLP):
+    """Quantized GuandanValueNet with the ModelManager predict interface."""
+
+    version = None
+
+    @classmethod
+    def from_value_net(cls, net: NumpyValueNet, mode: str = "int8", clip_percentiles=None):
+        qnet = cls.from_mlp(net, mode, clip_percentiles)
+        qnet.version = net.version
+        return qnet
+
+    def predict(self, state_vector) -> float:
+        return float(self.forward(state_vector)[0, 0])
+
+    def predict_batch(self, state_vectors) -> List[float]:
+        if len(state_vectors) == 0:
+            return []
+        return self.forward(state_vectors)[:, 0].tolist()
+
+    def save(self, path: str):
+        arrays = self.to_arrays([name for name, _ in VALUE_NET_LAYERS])
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "QuantizedValueNet":
+        with np.load(path) as data:
+            return cls.from_arrays({k: data[k] for k in data.files}, VALUE_NET_LAYERS)
+
+
+def quantized_path_for(model_path: str, mode: str) -> str:
+    """model_v1.pth / model_v1.npz -> model_v1.int8.npz (where quantize_model.py saves)."""
+    root, _ = os.path.splitext(model_path)
+    return f"{root}.{mode}.npz"
+
+
+def calibrate(mlp: NumpyMLP, samples, mode: str = "int8",
+              percentiles: Sequence[float] = DEFAULT_CLIP_PERCENTILES, quantized_cls=QuantizedMLP):
+    """
+    Pick a clipping percentile per layer (int8) that minimizes the output MSE
+    against the float model on representative samples. Layers are tuned greedily
+    front to back. float16 needs no calibration and is returned directly.
+    """
+    if mode == "float16":
+        return quantized_cls.from_mlp(mlp, "float16")
+
+    samples = np.asarray(samples, dtype=np.float32)
+    reference = mlp.forward(samples)
+    chosen = [100.0] * len(mlp.layers)
+    for i in range(len(mlp.layers)):
+        best_pct, best_err = chosen[i], None
+        for pct in percentiles:
+            trial = list(chosen)
+            trial[i] = pct
+            err = float(np.mean((quantized_cls.from_mlp(mlp, mode, trial).forward(samples) - reference) ** 2))
+            if best_err is None or err < best_err:
+                best_pct, best_err = pct, err
+        chosen[i] = best_pct
+
+    qmodel = quantized_cls.from_mlp(mlp, mode, chosen)
+    qmodel.clip_percentiles = chosen
+    return qmodel
+
+
+def accuracy_report(float_model, quant_model, samples) -> Dict[str, Any]:
+    """Compare a quantized model to its float reference on the given samples."""
+    samples = np.asarray(samples, dtype=np.float32)
+    ref = float_model.forward(samples)
+    out = quant_model.forward(samples)
+    diff = out - ref
+    report = {
+        "mode": quant_model.mode,
+        "samples": int(samples.shape[0]),
+        "max_abs_error": float(np.abs(diff).max()),
+        "mean_abs_error": float(np.abs(diff).mean()),
+        "rmse": float(np.sqrt(np.mean(diff ** 2))),
+        "float_bytes": int(float_model.nbytes()),
+        "quantized_bytes": int(quant_model.nbytes()),
+    }
+    report["compression_ratio"] = report["float_bytes"] / max(report["quantized_bytes"], 1)
+    if ref.shape[1] == 1:
+        # Value net: does the quantized model still agree on who is winning?
+        report["sign_agreement"] = float(np.mean(np.sign(ref) == np.sign(out)))
+    else:
+        report["argmax_agreement"] = float(np.mean(ref.argmax(axis=1) == out.argmax(axis=1)))
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"Quantization report ({report['mode']}, {report['samples']} samples)"]
+    for key in ("max_abs_error", "mean_abs_error", "rmse", "sign_agreement", "argmax_agreement"):
+        if key in report:
+            lines.append(f"  {key}: {report[key]:.6f}")
+    lines.append(f"  size: {report['float_bytes'] / 1024:.1f} KB -> {report['quantized_bytes'] / 1024:.1f} KB "
+                 f"({report['compression_ratio']:.2f}x)")
+    return "\n".join(lines)
@@ -0,0 +1,246 @@
+import glob
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from .env import GuandanEnv, LAST_PLAY_TYPES, state_to_array
+from GuandanAgent.engine.cards import card_id, card_from_id
+
+# Move type codes: 0 = pass, 1.. = LAST_PLAY_TYPES
+MOVE_TYPES = ["pass"] + LAST_PLAY_TYPES
+_MOVE_TYPE_CODE = {t: i for i, t in enumerate(MOVE_TYPES)}
+_MOVE_TYPE_ALIASES = {"single": "1", "pair": "2", "triple": "3", "full_house": "3+2"}
+
+
+def move_type_code(action: Dict[str, Any]) -> int:
+    """Index into MOVE_TYPES (0 = pass)."""
+    if action['action'] == 'pass':
+        return 0
+    t = action.get('type')
+    return _MOVE_TYPE_CODE[_MOVE_TYPE_ALIASES.get(t, t)]
+
+
+RECORD_VERSION = 1
+# version, seed, model_version, level, start_player, winner, num_moves
+_HEADER = struct.Struct("<BQIBBbH")
+# Framing: payload length + crc32, so a torn tail write is detected and skipped
+_FRAME = struct.Struct("<II")
+DEAL_SIZE = 108
+SEGMENT_PATTERN = "games_{:06d}.bin"
+
+
+@dataclass
+class GameRecord:
+    """
+    Everything needed to replay a game exactly: the 108-card deal (4 hands of
+    27 card ids, seat order), level, start player and the move sequence as
+    (type code, card ids). About 350 bytes per game.
+    """
+    deal: List[int]
+    level: int
+    start_player: int
+    seed: int = 0
+    winner: int = -1 # Winning team, -1 if unfinished
+    model_version: int = 0
+    moves: List[Tuple[int, Tuple[int, ...]]] = field(default_factory=list)
+
+    @classmethod
+    def from_hands(cls, hands, level: int, start_player: int, seed: int = 0, model_version: int = 0):
+        deal = [card_id(c) for h in hands for c in h]
+        if len(deal) != DEAL_SIZE:
+            raise ValueError(f"Expected {DEAL_SIZE} dealt cards, got {len(deal)}")
+        return cls(deal=deal, level=level, start_player=start_player, seed=seed, model_version=model_version)
+
+    def add_move(self, action: Dict[str, Any]):
+        code = move_type_code(action)
+        self.moves.append((code, () if code == 0 else tuple(card_id(c) for c in action['cards'])))
+
+    def hands(self) -> List[List[Any]]:
+        return [[card_from_id(cid) for cid in self.deal[i * 27:(i + 1) * 27]] for i in range(4)]
+
+
+def encode_record(record: GameRecord) -> bytes:
+    parts = [
+        _HEADER.pack(RECORD_VERSION, record.seed, record.model_version, record.level,
+                     record.start_player, record.winner, len(record.moves)),
+        bytes(record.deal),
+    ]
+    for code, cids in record.moves:
+        parts.append(bytes((code, len(cids))))
+        parts.append(bytes(cids))
+    return b"".join(parts)
+
+
+def decode_record(data: bytes) -> GameRecord:
+    version, seed, model_version, level, start_player, winner, num_moves = _HEADER.unpack_from(data, 0)
+    if version != RECORD_VERSION:
+        raise ValueError(f"Unsupported game record version: {version}")
+    pos = _HEADER.size
+    deal = list(data[pos:pos + DEAL_SIZE])
+    pos += DEAL_SIZE
+    moves = []
+    for _ in range(num_moves):
+        code, n = data[pos], data[pos + 1]
+        moves.append((code, tuple(data[pos + 2:pos + 2 + n])))
+        pos += 2 + n
+    return GameRecord(deal=deal, level=level, start_player=start_player, seed=seed, winner=winner,
+                      model_version=model_version, moves=moves)
+
+
+class GameRecordLog:
+    """
+    Append-only log of game records split into numbered segment files
+    (games_000000.bin, ...). A new segment starts once the active one reaches
+    `segment_bytes`, so old segments can be archived or deleted as a unit.
+
+    Each record is framed as <length, crc32, payload>; readers stop at a
+    truncated or corrupt tail (e.g. after a crash mid-write).
+    Only one process should append to a given directory.
+    """
+
+    def __init__(self, root_dir: str, segment_bytes: int = 64 * 1024 * 1024):
+        self.root_dir = root_dir
+        self.segment_bytes = segment_bytes
+        self._file = None
+        self._segment = None
+
+    def segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.root_dir, "games_[0-9]*.bin")))
+
+    def _open_segment(self):
+        segments = self.segments()
+        index = int(os.path.basename(segments[-1])[6:12]) if segments else 0
+        path = os.path.join(self.root_dir, SEGMENT_PATTERN.format(index))
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+            index += 1
+            path = os.path.join(self.root_dir, SEGMENT_PATTERN.format(index))
+        self._segment = index
+        self._file = open(path, "ab")
+
+    def append(self, record: GameRecord):
+        self.append_encoded(encode_record(record))
+
+    def append_encoded(self, payload: bytes):
+        """Append a record already serialized with encode_record()."""
+        if self._file is None:
+            os.makedirs(self.root_dir, exist_ok=True)
+            self._open_segment()
+        elif self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._segment += 1
+            self._file = open(os.path.join(self.root_dir, SEGMENT_PATTERN.format(self._segment)), "ab")
+        self._file.write(_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def tell(self) -> Tuple[int, int]:
+        """(segment index, byte offset) of the end of the log."""
+        if self._file is not None:
+            self._file.flush()
+            return self._segment, self._file.tell()
+        segments = self.segments()
+        if not segments:
+            return 0, 0
+        return int(os.path.basename(segments[-1])[6:12]), os.path.getsize(segments[-1])
+
+    def truncate(self, position: Tuple[int, int]):
+        """Drop everything written after `position` (from tell()), e.g. on resume."""
+        self.close()
+        segment, offset = position
+        for path in self.segments():
+            index = int(os.path.basename(path)[6:12])
+            if index > segment:
+                os.remove(path)
+            elif index == segment and os.path.getsize(path) > offset:
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        self.flush()
+        for path in self.segments():
+            yield from read_segment(path)
+
+
+def read_segment(path: str) -> Iterator[GameRecord]:
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, pos)
+        payload = data[pos + _FRAME.size:pos + _FRAME.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            print(f"Stopping at corrupt or truncated record in {path} (offset {pos})")
+            return
+        yield decode_record(payload)
+        pos += _FRAME.size + length
+
+
+# --- Replay ---
+
+def _match_action(legal: List[Dict[str, Any]], code: int, cids: Tuple[int, ...]) -> Dict[str, Any]:
+    """Pick the legal action the record refers to (same type and cards)."""
+    if code == 0:
+        for a in legal:
+            if a['action'] == 'pass':
+                return a
+        return {'action': 'pass', 'cards': []}
+    move_type = MOVE_TYPES[code]
+    target = sorted(cids)
+    for a in legal:
+        if a['action'] != 'pass' and _MOVE_TYPE_ALIASES.get(a.get('type'), a.get('type')) == move_type \
+                and sorted(card_id(c) for c in a['cards']) == target:
+            return a
+    # Move generator changed since recording: rebuild the action from the record
+    return {'action': 'play', 'type': move_type, 'cards': [card_from_id(c) for c in cids]}
+
+
+def _initial_env(record: GameRecord) -> GuandanEnv:
+    return GuandanEnv(my_hand=[], all_hands=record.hands(), current_player=record.start_player,
+                      current_level=record.level)
+
+
+def replay(record: GameRecord) -> Iterator[Tuple[GuandanEnv, Dict[str, Any]]]:
+    """
+    Re-run a recorded game. Yields (env, action) before each move; the env is
+    the live full-information state, so copy anything you keep (or clone()).
+    """
+    env = _initial_env(record)
+    for code, cids in record.moves:
+        action = _match_action(env.get_legal_actions(), code, cids)
+        yield env, action
+        env.step(action)
+
+
+def final_state(record: GameRecord) -> GuandanEnv:
+    env = _initial_env(record)
+    for code, cids in record.moves:
+        env.step(_match_action(env.get_legal_actions(), code, cids))
+    return env
+
+
+def featurize(record: GameRecord,
+              featurizer: Callable[[GuandanEnv], np.ndarray] = state_to_array) -> List[Tuple[Any, float]]:
+    """
+    (features, reward) for every position of a finished game, from the mover's
+    seat, labelled like self-play data (+1 if the mover's team won).
+    Features come from the full-information env, so hand sizes are exact.
+    Pass a different `featurizer` to regenerate data for a new feature set.
+    """
+    if record.winner == -1:
+        return []
+    samples = []
+    for env, _ in replay(record):
+        team = 0 if env.current_player in (0, 2) else 1
+        samples.append((featurizer(env), 1.0 if team == record.winner else -1.0))
+    return samples
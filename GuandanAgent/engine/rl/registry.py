@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .numpy_net import NumpyValueNet, save_npz
+
+MANIFEST_NAME = "manifest.json"
+
+
+class ModelRegistry:
+    """
+    Versioned, append-only model store.
+
+    Every published version gets its own immutable files
+    (model_v000001.npz, plus model_v000001.pth when the weights come from torch)
+    and manifest.json names the "current" version. Files are never rewritten;
+    the manifest is replaced atomically, so readers only ever see complete
+    versions.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.manifest_path = os.path.join(root_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+
+    # --- Paths ---
+
+    def _stem(self, version: int) -> str:
+        return os.path.join(self.root_dir, f"model_v{version:06d}")
+
+    def npz_path(self, version: int) -> str:
+        return self._stem(version) + ".npz"
+
+    def pth_path(self, version: int) -> str:
+        return self._stem(version) + ".pth"
+
+    # --- Manifest ---
+
+    def read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"current": None, "versions": []}
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def current_version(self) -> Optional[int]:
+        return self.read_manifest().get("current")
+
+    def versions(self) -> List[int]:
+        return [v["version"] for v in self.read_manifest().get("versions", [])]
+
+    # --- Writing ---
+
+    def _write_immutable(self, final_path: str, write_fn):
+        if os.path.exists(final_path):
+            raise FileExistsError(f"Model version file already exists: {final_path}")
+        tmp_path = final_path + ".tmp"
+        write_fn(tmp_path)
+        # link() refuses to overwrite, unlike replace()
+        os.link(tmp_path, final_path)
+        os.remove(tmp_path)
+
+    def publish(self, state_dict: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None,
+                make_current: bool = True) -> int:
+        """Store a new immutable version and (by default) point "current" at it."""
+        os.makedirs(self.root_dir, exist_ok=True)
+        with self._lock:
+            manifest = self.read_manifest()
+            version = max([0] + [v["version"] for v in manifest.get("versions", [])]) + 1
+
+            self._write_immutable(self.npz_path(version), lambda p: save_npz(state_dict, p))
+            files = {"npz": os.path.basename(self.npz_path(version))}
+
+            if any(hasattr(v, "detach") for v in state_dict.values()):
+                import torch
+                self._write_immutable(self.pth_path(version), lambda p: torch.save(state_dict, p))
+                files["pth"] = os.path.basename(self.pth_path(version))
+
+            entry = {"version": version, "created": time.time(), "files": files}
+            if metadata:
+                entry["metadata"] = metadata
+            manifest.setdefault("versions", []).append(entry)
+            if make_current:
+                manifest["current"] = version
+            self._write_manifest(manifest)
+        print(f"Published model version {version} to {self.root_dir}")
+        return version
+
+    def set_current(self, version: int):
+        """Point "current" at an existing version (e.g. rollback)."""
+        with self._lock:
+            manifest = self.read_manifest()
+            if version not in [v["version"] for v in manifest.get("versions", [])]:
+                raise KeyError(f"Unknown model version: {version}")
+            manifest["current"] = version
+            self._write_manifest(manifest)
+
+    def prune(self, keep: int = 10, protect: Iterable[int] = ()):
+        """Delete the oldest versions beyond `keep`, never the current one or those in `protect`."""
+        protect = set(protect)
+        with self._lock:
+            manifest = self.read_manifest()
+            entries = manifest.get("versions", [])
+            current = manifest.get("current")
+            if len(entries) <= keep:
+                return []
+            excess = len(entries) - keep
+            removable = [e for e in entries if e["version"] != current and e["version"] not in protect][:excess]
+            removed = []
+            for e in removable:
+                for name in e.get("files", {}).values():
+                    try:
+                        os.remove(os.path.join(self.root_dir, name))
+                    except OSError:
+                        pass
+                removed.append(e["version"])
+            manifest["versions"] = [e for e in entries if e["version"] not in removed]
+            self._write_manifest(manifest)
+            return removed
+
+    # --- Reading ---
+
+    def load_numpy(self, version: Optional[int] = None, quantized: Optional[str] = None):
+        """NumpyValueNet of a version; quantized="int8"/"float16" gives a QuantizedValueNet of it."""
+        version = version if version is not None else self.current_version()
+        if version is None:
+            return None
+        net = NumpyValueNet.from_npz(self.npz_path(version), version=version)
+        if quantized is not None:
+            from .quantize import QuantizedValueNet
+            net = QuantizedValueNet.from_value_net(net, quantized)
+        return net
+
+    def load_state_dict(self, version: Optional[int] = None):
+        """torch state dict for training (needs torch)."""
+        version = version if version is not None else self.current_version()
+        if version is None:
+            return None
+        import torch
+        if os.path.exists(self.pth_path(version)):
+            return torch.load(self.pth_path(version), map_location="cpu")
+        net = NumpyValueNet.from_npz(self.npz_path(version))
+        return {k: torch.from_numpy(v) for k, v in net.state_dict().items()}
+
+
+class HotSwapModel:
+    """
+    Serving handle that follows the registry's "current" version.
+
+    The active model is an immutable NumpyValueNet held in a single attribute.
+    A new version is loaded on the side (by refresh() or the watcher thread)
+    and then swapped in with one reference assignment, so predictions never
+    block on a reload. Callers that need consistent weights for a whole search
+    take `snapshot()` once and keep using it.
+    """
+
+    def __init__(self, registry: ModelRegistry, poll_interval: float = 2.0, loader=None,
+                 quantized: Optional[str] = None):
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self._loader = loader or (lambda version: registry.load_numpy(version, quantized=quantized))
+        self._current = None
+        self._manifest_mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.swaps = 0
+        self.refresh()
+
+    @property
+    def version(self):
+        current = self._current
+        return current.version if current is not None else None
+
+    def snapshot(self):
+        return self._current
+
+    def predict(self, state_vector) -> float:
+        return self._current.predict(state_vector)
+
+    def predict_batch(self, state_vectors):
+        return self._current.predict_batch(state_vectors)
+
+    def refresh(self) -> bool:
+        """Load and swap in a newer current version if the manifest changed."""
+        try:
+            st = os.stat(self.registry.manifest_path)
+        except OSError:
+            return False
+        # The manifest is replaced (new inode) on every write
+        mtime = (st.st_mtime_ns, st.st_ino, st.st_size)
+        if mtime == self._manifest_mtime:
+            return False
+        self._manifest_mtime = mtime
+
+        version = self.registry.current_version()
+        if version is None or version == self.version:
+            return False
+        try:
+            model = self._loader(version)
+        except Exception as e:
+            print(f"Failed to load model version {version}: {e}")
+            # Retry on the next poll
+            self._manifest_mtime = None
+            return False
+        self._current = model
+        self.swaps += 1
+        print(f"Serving model version {version}")
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.poll_interval + 1)
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
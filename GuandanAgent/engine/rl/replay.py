@@ -0,0 +1,477 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .env import FEATURE_DIM
+
+# uint8 storage: feature value x is stored as round(x * UINT8_SCALE), so the
+# representable range is [0, 255 / UINT8_SCALE]. Card-count features are
+# multiples of 1/4 and stay exact; the /27 hand-size slots are rounded.
+UINT8_SCALE = 64.0
+STORAGE_DTYPES = ("float16", "float32", "uint8")
+META_NAME = "meta.json"
+
+
+def hash_state(state_vector) -> int:
+    """64-bit content hash of a feature vector (float16 precision)."""
+    data = np.asarray(state_vector, dtype=np.float16).tobytes()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring buffer of (state, reward) samples backed by NumPy arrays.
+
+    With `path`, the arrays live in .npy files opened as memory maps, so the
+    buffer survives restarts (call flush() to persist the cursor) and other
+    processes can open it read-only with ReplayBuffer.open_readonly(path).
+
+    Appends are O(1). With dedup=True, a state whose hash is already stored
+    is skipped.
+    """
+
+    def __init__(self, capacity: int, feature_dim: int = FEATURE_DIM, path: Optional[str] = None,
+                 dtype: str = "float16", dedup: bool = False, readonly: bool = False):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"dtype must be one of {STORAGE_DTYPES}")
+        self.path = path
+        self.readonly = readonly
+        self.dedup = dedup
+        self.size = 0
+        self.cursor = 0
+        self.total_added = 0
+
+        meta = self._read_meta() if path else None
+        if meta:
+            # Existing buffer on disk: its layout wins
+            capacity, feature_dim, dtype = meta["capacity"], meta["feature_dim"], meta["dtype"]
+        elif readonly:
+            raise FileNotFoundError(f"No replay buffer at {path}")
+        self.capacity = capacity
+        self.feature_dim = feature_dim
+        self.dtype = dtype
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self.states = self._open_array("states", (capacity, feature_dim), dtype, meta)
+            self.rewards = self._open_array("rewards", (capacity,), "float32", meta)
+            self.hashes = self._open_array("hashes", (capacity,), "uint64", meta)
+            if meta:
+                self.size, self.cursor = meta["size"], meta["cursor"]
+                self.total_added = meta.get("total_added", self.size)
+        else:
+            self.states = np.zeros((capacity, feature_dim), dtype=dtype)
+            self.rewards = np.zeros(capacity, dtype=np.float32)
+            self.hashes = np.zeros(capacity, dtype=np.uint64)
+
+        self._hash_counts = {}
+        if dedup:
+            for h in self.hashes[:self.size].tolist():
+                self._hash_counts[h] = self._hash_counts.get(h, 0) + 1
+
+    @classmethod
+    def open_readonly(cls, path: str) -> "ReplayBuffer":
+        return cls(0, path=path, readonly=True)
+
+    # --- Storage ---
+
+    def _open_array(self, name, shape, dtype, meta):
+        file_path = os.path.join(self.path, f"{name}.npy")
+        if meta and os.path.exists(file_path):
+            return np.load(file_path, mmap_mode="r" if self.readonly else "r+")
+        return np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=shape)
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.path, META_NAME), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def flush(self):
+        """Persist array contents and the ring cursor (atomic meta update)."""
+        if not self.path or self.readonly:
+            return
+        for arr in (self.states, self.rewards, self.hashes):
+            arr.flush()
+        meta = {
+            "capacity": self.capacity, "feature_dim": self.feature_dim, "dtype": self.dtype,
+            "size": self.size, "cursor": self.cursor, "total_added": self.total_added,
+        }
+        meta_path = os.path.join(self.path, META_NAME)
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def refresh(self):
+        """Read-only views: pick up the writer's latest flushed size/cursor."""
+        meta = self._read_meta()
+        if meta:
+            self.size, self.cursor = meta["size"], meta["cursor"]
+            self.total_added = meta.get("total_added", self.size)
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Copy of the stored samples and ring position (for training checkpoints)."""
+        n = self.size
+        return {
+            "capacity": self.capacity, "feature_dim": self.feature_dim, "dtype": self.dtype,
+            "size": n, "cursor": self.cursor, "total_added": self.total_added,
+            "states": np.array(self.states[:n]), "rewards": np.array(self.rewards[:n]),
+            "hashes": np.array(self.hashes[:n]),
+        }
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        if self.readonly:
+            raise RuntimeError("Replay buffer is read-only")
+        self._check_layout(state)
+        n = state["size"]
+        self.states[:n] = state["states"]
+        self.rewards[:n] = state["rewards"]
+        self.hashes[:n] = state["hashes"]
+        self._set_position(state)
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """
+        Ring position only, for periodic training checkpoints. A memory-mapped
+        buffer is flushed instead of copied (its samples are already on disk);
+        an in-memory one falls back to the full state_dict().
+        """
+        if not self.path:
+            return self.state_dict()
+        self.flush()
+        return {
+            "capacity": self.capacity, "feature_dim": self.feature_dim, "dtype": self.dtype,
+            "size": self.size, "cursor": self.cursor, "total_added": self.total_added,
+        }
+
+    def load_checkpoint_state(self, state: Dict[str, Any]):
+        """
+        Restore from checkpoint_state() (or a full state_dict()). Samples the
+        memory-mapped files received after the checkpoint are dropped by
+        rewinding the cursor; if the ring wrapped since, the overwritten slots
+        keep their newer samples.
+        """
+        if "states" in state:
+            self.load_state_dict(state)
+            return
+        if self.readonly:
+            raise RuntimeError("Replay buffer is read-only")
+        self._check_layout(state)
+        self._set_position(state)
+
+    def _check_layout(self, state: Dict[str, Any]):
+        if (state["capacity"], state["feature_dim"], state["dtype"]) != (self.capacity, self.feature_dim, self.dtype):
+            raise ValueError("Replay buffer layout does not match the checkpoint")
+
+    def _set_position(self, state: Dict[str, Any]):
+        n = state["size"]
+        self.size, self.cursor, self.total_added = n, state["cursor"], state["total_added"]
+        self._hash_counts = {}
+        if self.dedup:
+            for h in self.hashes[:n].tolist():
+                self._hash_counts[h] = self._hash_counts.get(h, 0) + 1
+        self.flush()
+
+    # --- Writing ---
+
+    def _encode(self, state_vector) -> np.ndarray:
+        vec = np.asarray(state_vector, dtype=np.float32)
+        if self.dtype == "uint8":
+            return np.clip(np.rint(vec * UINT8_SCALE), 0, 255).astype(np.uint8)
+        return vec
+
+    def append(self, state_vector, reward: float, state_hash: Optional[int] = None) -> bool:
+        """Store one sample. Returns False if it was skipped as a duplicate."""
+        if self.readonly:
+            raise RuntimeError("Replay buffer is read-only")
+        if self.dedup:
+            h = state_hash if state_hash is not None else hash_state(state_vector)
+            if h in self._hash_counts:
+                return False
+        else:
+            h = state_hash or 0
+
+        i = self.cursor
+        if self.dedup and self.size == self.capacity:
+            old = int(self.hashes[i])
+            n = self._hash_counts.get(old, 0) - 1
+            if n > 0:
+                self._hash_counts[old] = n
+            else:
+                self._hash_counts.pop(old, None)
+
+        self.states[i] = self._encode(state_vector)
+        self.rewards[i] = reward
+        self.hashes[i] = h
+        if self.dedup:
+            self._hash_counts[h] = self._hash_counts.get(h, 0) + 1
+
+        self.cursor = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.total_added += 1
+        return True
+
+    def extend(self, samples: Iterable[Tuple[List[float], float]]) -> int:
+        """Append (state_vector, reward) pairs. Returns how many were stored."""
+        return sum(1 for vec, reward in samples if self.append(vec, reward))
+
+    # --- Reading ---
+
+    def __len__(self):
+        return self.size
+
+    def _decode(self, rows: np.ndarray) -> np.ndarray:
+        if self.dtype == "uint8":
+            return rows.astype(np.float32) / UINT8_SCALE
+        return rows.astype(np.float32)
+
+    def get(self, indices) -> Tuple[np.ndarray, np.ndarray]:
+        indices = np.asarray(indices)
+        return self._decode(self.states[indices]), np.array(self.rewards[indices], dtype=np.float32)
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None):
+        """
+        Uniform random minibatch: (states float32 [B, D], rewards [B], indices [B],
+        weights [B]). Weights are all 1; see PrioritizedReplayBuffer.
+        """
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        rng = rng or np.random.default_rng()
+        indices = rng.integers(0, self.size, size=batch_size)
+        states, rewards = self.get(indices)
+        return states, rewards, indices, np.ones(batch_size, dtype=np.float32)
+
+    def iter_minibatches(self, batch_size: int, num_batches: int,
+                         rng: Optional[np.random.Generator] = None) -> Iterator[tuple]:
+        """
+        `num_batches` minibatches in sample() format, drawn without replacement
+        from a fresh shuffle of the buffer each time it is exhausted.
+        """
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        rng = rng or np.random.default_rng()
+        order = np.empty(0, dtype=np.int64)
+        ones = np.ones(batch_size, dtype=np.float32)
+        for _ in range(num_batches):
+            while len(order) < batch_size:
+                order = np.concatenate([order, rng.permutation(self.size)])
+            indices, order = order[:batch_size], order[batch_size:]
+            states, rewards = self.get(indices)
+            yield states, rewards, indices, ones
+
+    def latest(self, n: int) -> np.ndarray:
+        """Indices of the n most recently added samples, oldest first."""
+        n = min(n, self.size)
+        return (self.cursor - n + np.arange(n)) % self.capacity
+
+
+class SumTree:
+    """
+    Binary tree over `capacity` leaf priorities where each node holds the sum
+    of its children. find() and update() are O(log n) and vectorized over a
+    whole batch (one NumPy op per tree level).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.leaf_offset = 1
+        while self.leaf_offset < capacity:
+            self.leaf_offset *= 2
+        self.depth = self.leaf_offset.bit_length() - 1
+        # Node 1 is the root, leaves live at [leaf_offset, leaf_offset + capacity)
+        self.tree = np.zeros(2 * self.leaf_offset, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def get(self, indices) -> np.ndarray:
+        return self.tree[np.asarray(indices) + self.leaf_offset]
+
+    def update(self, indices, priorities):
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaf_offset
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values) -> np.ndarray:
+        """Leaf indices whose cumulative-priority intervals contain `values`."""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values -= np.where(go_right, self.tree[left], 0.0)
+            nodes = left + go_right
+        return np.minimum(nodes - self.leaf_offset, self.capacity - 1)
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer that samples index i with probability p_i^alpha / sum(p^alpha),
+    where p_i = |error| + eps from the last time the sample was trained on.
+
+    New samples get the current max priority so they are seen at least once.
+    sample() returns importance-sampling weights (N * P(i))^-beta normalized
+    by their max, to be used as per-sample loss weights.
+
+    Priorities are kept in memory only: after a restart, stored samples start
+    again at the max priority unless a training checkpoint restores them.
+    """
+
+    def __init__(self, capacity: int, alpha: float = 0.6, beta: float = 0.4, eps: float = 1e-3, **kwargs):
+        super().__init__(capacity, **kwargs)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.max_priority = 1.0
+        self.tree = SumTree(self.capacity)
+        # Batches may be sampled on a prefetch thread while the trainer updates priorities
+        self._tree_lock = threading.Lock()
+        if self.size:
+            self.tree.update(np.arange(self.size), np.full(self.size, self.max_priority ** alpha))
+
+    def append(self, state_vector, reward: float, state_hash: Optional[int] = None) -> bool:
+        i = self.cursor
+        stored = super().append(state_vector, reward, state_hash)
+        if stored:
+            with self._tree_lock:
+                self.tree.update([i], [self.max_priority ** self.alpha])
+        return stored
+
+    def refresh(self):
+        old_size = self.size
+        super().refresh()
+        if self.size > old_size:
+            new = np.arange(old_size, self.size)
+            with self._tree_lock:
+                self.tree.update(new, np.full(len(new), self.max_priority ** self.alpha))
+
+    def _with_priorities(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        with self._tree_lock:
+            state["priorities"] = self.tree.get(np.arange(self.size)).copy()
+            state["max_priority"] = self.max_priority
+        return state
+
+    def state_dict(self) -> Dict[str, Any]:
+        return self._with_priorities(super().state_dict())
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        if not self.path:
+            return self.state_dict()
+        return self._with_priorities(super().checkpoint_state())
+
+    def load_state_dict(self, state: Dict[str, Any]):
+        super().load_state_dict(state)
+        self._load_priorities(state)
+
+    def load_checkpoint_state(self, state: Dict[str, Any]):
+        super().load_checkpoint_state(state)
+        if "states" not in state:
+            self._load_priorities(state)
+
+    def _load_priorities(self, state: Dict[str, Any]):
+        with self._tree_lock:
+            self.tree = SumTree(self.capacity)
+            if "priorities" in state:
+                self.max_priority = state["max_priority"]
+                self.tree.update(np.arange(self.size), state["priorities"])
+            elif self.size:
+                # Checkpoint from a uniform buffer
+                self.tree.update(np.arange(self.size), np.full(self.size, self.max_priority ** self.alpha))
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None, beta: Optional[float] = None):
+        """Stratified proportional sample: (states, rewards, indices, IS weights)."""
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        rng = rng or np.random.default_rng()
+        beta = self.beta if beta is None else beta
+
+        with self._tree_lock:
+            total = self.tree.total
+            segment = total / batch_size
+            indices = self.tree.find((np.arange(batch_size) + rng.random(batch_size)) * segment)
+            indices = np.minimum(indices, self.size - 1)
+            probs = self.tree.get(indices) / total
+        weights = (self.size * probs) ** -beta
+        weights /= weights.max()
+        states, rewards = self.get(indices)
+        return states, rewards, indices, weights.astype(np.float32)
+
+    def update_priorities(self, indices, errors):
+        priorities = np.abs(np.asarray(errors, dtype=np.float64)) + self.eps
+        with self._tree_lock:
+            self.max_priority = max(self.max_priority, float(priorities.max()))
+            self.tree.update(indices, priorities ** self.alpha)
+
+    def iter_minibatches(self, batch_size: int, num_batches: int,
+                         rng: Optional[np.random.Generator] = None) -> Iterator[tuple]:
+        """Independent prioritized samples (priorities change between batches)."""
+        rng = rng or np.random.default_rng()
+        for _ in range(num_batches):
+            yield self.sample(batch_size, rng)
+
+
+class BatchPrefetcher:
+    """
+    Runs a batch iterator on a background thread, up to `depth` batches ahead
+    of the consumer, applying `transform` (e.g. tensor conversion) there too.
+    Exceptions raised while producing are re-raised in the consumer.
+    """
+
+    _DONE = object()
+
+    def __init__(self, batches: Iterable, depth: int = 2, transform: Optional[Callable] = None):
+        self._batches = batches
+        self._transform = transform
+        self._queue = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, name="batch-prefetch", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for batch in self._batches:
+                if self._transform is not None:
+                    batch = self._transform(batch)
+                if not self._put(batch):
+                    return
+        except BaseException as e:
+            self._put(e)
+            return
+        self._put(self._DONE)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(1.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
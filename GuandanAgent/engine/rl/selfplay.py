@@ -0,0 +1,268 @@
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .env import GuandanEnv, state_to_vector
+from .mcts import MCTS
+from .value_cache import ValueCache
+from .records import GameRecord
+from .match import deal
+from .budget import SimulationBudget
+
+
+@dataclass
+class ResignConfig:
+    """
+    Early stop for decided games. An estimate of team 0's outcome in [-1, 1]
+    is taken before every move; once |estimate| >= threshold with the same
+    sign for `consecutive` moves, the trailing team resigns.
+
+    signal: "value"    the learner's value net on the mover's view
+            "strength" hand-size margin (fewest cards left per team) / strength_scale
+    A `playout_fraction` of games ignores resignation and plays on, to
+    measure how often a resignation would have been wrong.
+    """
+    threshold: float = 0.9
+    consecutive: int = 6
+    min_steps: int = 20
+    playout_fraction: float = 0.1
+    signal: str = "value"
+    strength_scale: float = 0.3
+    adjudicate: bool = True # Score games that hit max_steps by the last estimate
+
+
+def hand_strength_margin(env: GuandanEnv) -> float:
+    """Team 0's lead in cards to shed: (fewest left in team 1 - fewest left in team 0) / 27."""
+    team0 = min(len(env.hands[0]), len(env.hands[2]))
+    team1 = min(len(env.hands[1]), len(env.hands[3]))
+    return (team1 - team0) / 27.0
+
+
+class ResignMonitor:
+    """Tracks the per-move estimates of one game (see ResignConfig)."""
+
+    def __init__(self, config: ResignConfig, value_model=None, rng: Optional[random.Random] = None):
+        self.config = config
+        self.value_model = value_model if config.signal == "value" else None
+        self.playout = (rng or random).random() < config.playout_fraction
+        self.estimate = 0.0
+        self.streak = 0
+        self.resign_winner = -1 # Team that was ahead when resignation triggered
+        self.resign_step = None
+
+    def _estimate(self, env: GuandanEnv, view_vector, mover: int) -> float:
+        if self.value_model is not None:
+            # The value is for the mover's team
+            value = float(self.value_model.predict(view_vector))
+            return value if mover % 2 == 0 else -value
+        margin = hand_strength_margin(env) / self.config.strength_scale
+        return max(-1.0, min(1.0, margin))
+
+    def update(self, env: GuandanEnv, view_vector, mover: int, step: int) -> bool:
+        """Record the estimate before a move; True when the game should stop here."""
+        estimate = self._estimate(env, view_vector, mover)
+        decisive = abs(estimate) >= self.config.threshold
+        same_side = (estimate > 0) == (self.estimate > 0)
+        self.streak = self.streak + 1 if decisive and same_side and self.streak else int(decisive)
+        self.estimate = estimate
+        if self.resign_winner == -1 and step >= self.config.min_steps and self.streak >= self.config.consecutive:
+            self.resign_winner = 0 if estimate > 0 else 1
+            self.resign_step = step
+            return not self.playout
+        return False
+
+    def adjudicate(self, env: GuandanEnv) -> int:
+        """Winner of a game stopped at the step cap: the last estimate, else the hand-size margin."""
+        if not self.config.adjudicate:
+            return -1
+        estimate = self.estimate or hand_strength_margin(env)
+        if estimate == 0:
+            return -1
+        return 0 if estimate > 0 else 1
+
+
+def self_play_game(model_manager, opponent_type='mcts', seed=None, return_record=False,
+                   resign: Optional[ResignConfig] = None, max_steps: int = 200, return_info=False,
+                   budget: Optional[SimulationBudget] = None, opponent_model=None):
+    """
+    Play one game. Returns (winner_team, [(state_vector, reward), ...]), plus
+    the GameRecord of the game when return_record=True and an info dict
+    ({"steps", "outcome", "playout", "resign_winner", "resign_step"}) when
+    return_info=True. The deal, level and start player are drawn from `seed`
+    (random if None).
+
+    With `resign`, decided games stop early and capped games are
+    adjudicated instead of discarded; outcome is one of "finished",
+    "resigned", "adjudicated" or "unfinished".
+
+    MCTS simulations per move come from `budget` (a fresh SimulationBudget
+    by default): single-move positions are played without search.
+    `opponent_model` gives team 1's MCTS its own value model (e.g. a past
+    snapshot); by default both teams share model_manager.
+    """
+    if seed is None:
+        seed = random.getrandbits(63)
+
+    # 1. Deal Cards: 27 per player, random start player and level (2-14,
+    # to train with different wild cards), all from the seed
+    hands, start_player, current_level = deal(seed)
+    
+    # 2. Initialize God View Environment
+    env = GuandanEnv(my_hand=[], all_hands=hands, current_player=start_player, current_level=current_level)
+    record = GameRecord.from_hands(hands, current_level, start_player, seed=seed,
+                                   model_version=getattr(model_manager, "version", None) or 0)
+    
+    # 3. Game Loop
+    # Agent Config:
+    # Team 0 (Player 0, 2): MCTS with Model (The "Learner")
+    # Team 1 (Player 1, 3): Opponent (Heuristic or MCTS)
+    
+    # Both sides share one value cache: identical positions are evaluated once
+    value_model = ValueCache(model_manager)
+    learner_mcts = MCTS(model=value_model)
+    
+    if opponent_type == 'heuristic':
+        # Pure Heuristic (No MCTS Search, just policy)
+        opponent_mcts = MCTS(model=None) 
+    elif opponent_model is not None:
+        # Fixed older snapshot: its own cache, its values differ from the learner's
+        opponent_mcts = MCTS(model=ValueCache(opponent_model))
+    else: # mcts or self_play
+        # Opponent uses MCTS too
+        # If 'self_play', it shares the same model? 
+        # Yes, AlphaGo Zero self-play uses same model for both sides.
+        opponent_mcts = MCTS(model=value_model)
+
+    if budget is None:
+        budget = SimulationBudget()
+
+    def search(mcts, view_env, legal):
+        sims = budget.allocate(env, len(legal))
+        if sims == 0:
+            # Forced move, or the team's game budget is spent
+            return legal[0] if len(legal) == 1 else mcts._heuristic_policy(legal, view_env)
+        action = mcts.search(view_env, num_simulations=sims, min_simulations=budget.min_sims)
+        budget.spend(env.current_player % 2, action.get('iterations', sims) if action else sims)
+        return action
+
+    monitor = ResignMonitor(resign, value_model, random.Random(seed)) if resign else None
+    resigned = False
+
+    steps = 0
+    
+    # Data Collection
+    game_data = [] # List of (state_vector, value_target) tuples (simplification)
+    
+    while not env.is_done() and steps < max_steps:
+        steps += 1
+        current_p = env.current_player
+        
+        legal_moves = env.get_legal_actions()
+        if not legal_moves:
+            break
+            
+        action = None
+        
+        # Create Player View Env (PARTIAL OBSERVABILITY)
+        player_view_env = GuandanEnv(
+            my_hand=env.hands[current_p],
+            last_play=env.last_play,
+            current_player=current_p,
+            pass_count=env.pass_count,
+            current_level=current_level,
+            hand_sizes=[len(h) for h in env.hands]
+        )
+        vec = state_to_vector(player_view_env)
+        if monitor is not None and monitor.update(env, vec, current_p, steps - 1):
+            resigned = True
+            steps -= 1
+            break
+
+        # Select Agent based on Team
+        if current_p in [0, 2]: # Team 0 (Learner)
+            action = search(learner_mcts, player_view_env, legal_moves)
+            
+            # Collect Data only for Learner?
+            # AlphaGo collects for ALL moves in self-play.
+            # But if opponent is Heuristic, maybe we shouldn't learn from Heuristic's moves?
+            # Actually, we learn from the *Outcome* of the state.
+            # If Heuristic made a move, and Lost, we learn that state was Bad.
+            # So yes, collect all data.
+            game_data.append((current_p, vec))
+            
+        else: # Team 1 (Opponent)
+            if opponent_type == 'heuristic':
+                # Direct Heuristic Policy (Fast, no Search)
+                # We need access to _heuristic_policy. 
+                # MCTS class has it.
+                lm = player_view_env.get_legal_actions()
+                # Mock state object required by _heuristic_policy
+                # Or just use MCTS with 1 simulation? 
+                # MCTS with 0 simulations runs rollout policy (heuristic).
+                # But search() forces at least 1.
+                # Let's call _heuristic_policy directly.
+                class MockState:
+                    def __init__(self, lp, cl, cp, lpi):
+                        self.last_play = lp
+                        self.current_level = cl
+                        self.current_player = cp
+                        self.last_player_idx = lpi
+                
+                s = MockState(player_view_env.last_play, player_view_env.current_level, player_view_env.current_player, player_view_env.last_player_idx)
+                action = opponent_mcts._heuristic_policy(lm, s)
+                
+                # We also collect data for Heuristic moves?
+                # If we want to learn "Heuristic moves lead to Loss/Win", yes.
+                game_data.append((current_p, vec))
+                
+            else:
+                # MCTS Opponent
+                action = search(opponent_mcts, player_view_env, legal_moves)
+                
+                game_data.append((current_p, vec))
+                 
+        record.add_move(action)
+        env.step(action)
+        
+    # 4. Determine Winner
+    winner_team = -1
+    for i in range(4):
+        if len(env.hands[i]) == 0:
+            winner_team = 0 if i in [0, 2] else 1
+            break
+    
+    outcome = "finished"
+    if resigned:
+        winner_team = monitor.resign_winner
+        outcome = "resigned"
+    elif winner_team == -1:
+        winner_team = monitor.adjudicate(env) if monitor is not None else -1
+        outcome = "adjudicated" if winner_team != -1 else "unfinished"
+
+    # Debug Log
+    if outcome == "unfinished":
+        print(f"Game Terminated (Max Steps). Winner: None")
+        
+    # Return Data
+    if winner_team == -1:
+        labeled_data = [] # Discard draws/incomplete
+    else:
+        labeled_data = []
+        for p, vec in game_data:
+            player_team = 0 if p in [0, 2] else 1
+            if player_team == winner_team:
+                reward = 1.0
+            else:
+                reward = -1.0
+            labeled_data.append((vec, reward))
+    
+    record.winner = winner_team
+    result = (winner_team, labeled_data)
+    if return_record:
+        result += (record,)
+    if return_info:
+        info: Dict[str, Any] = {"steps": steps, "outcome": outcome, "playout": bool(monitor and monitor.playout),
+                                "resign_winner": monitor.resign_winner if monitor else -1,
+                                "resign_step": monitor.resign_step if monitor else None, **budget.stats()}
+        result += (info,)
+    return result
@@ -0,0 +1,223 @@
+import random
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .numpy_net import NumpyValueNet, VALUE_NET_LAYERS, _to_numpy
+
+# Header (int64 words): global seqlock, current slot, slot count, floats per slot
+_SEQ, _CURRENT, _SLOTS, _PARAMS = range(4)
+_HEADER_WORDS = 4
+
+
+def weight_layout(state_dict: Dict[str, Any]) -> List[Tuple[str, Tuple[int, ...]]]:
+    """(name, shape) per tensor as stored: weights transposed to [in, out], like NumpyMLP keeps them."""
+    layout = []
+    for name, _ in VALUE_NET_LAYERS:
+        out_dim, in_dim = _to_numpy(state_dict[f"{name}.weight"]).shape
+        layout.append((f"{name}.weight", (in_dim, out_dim)))
+        layout.append((f"{name}.bias", (out_dim,)))
+    return layout
+
+
+class SharedValueNet(NumpyValueNet):
+    """NumpyValueNet whose weights are views into a SharedWeightStore slot (no copy)."""
+
+    def __init__(self, state_dict, version, slot: int, slot_seq: int):
+        super().__init__(state_dict, version=version)
+        self.slot = slot
+        self.slot_seq = slot_seq
+
+
+class SharedWeightStore:
+    """
+    Value-network weights in one shared memory segment, for self-play workers.
+
+    The segment holds `slots` weight slots used as a ring: publish() writes
+    the next version into the oldest slot, so the last `slots` versions stay
+    readable (the current weights plus a pool of past snapshots to play
+    against). Every worker maps the same pages, so memory per worker and
+    the cost of picking up a version do not grow with the number of workers.
+
+    Consistency is seqlock style: the header and each slot carry a counter
+    that is odd while being written. Readers retry the header read on a
+    change, and check a slot's counter after use (SharedModel.valid) to
+    detect the rare case of a slot reused while they still held it.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout, slots: int, owner: bool):
+        self.shm = shm
+        self.layout = [(name, tuple(shape)) for name, shape in layout]
+        self.slots = slots
+        self.owner = owner
+        self.param_count = sum(int(np.prod(shape)) for _, shape in self.layout)
+        words = _HEADER_WORDS + 2 * slots
+        self._header = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=shm.buf)
+        self._slot_versions = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf, offset=_HEADER_WORDS * 8)
+        self._slot_seq = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf, offset=(_HEADER_WORDS + slots) * 8)
+        # Float data starts on a 64-byte boundary
+        self._data_offset = -(-words * 8 // 64) * 64
+        self._data = np.ndarray((slots, self.param_count), dtype=np.float32, buffer=shm.buf,
+                                offset=self._data_offset)
+
+    @staticmethod
+    def _size(layout, slots: int) -> int:
+        params = sum(int(np.prod(shape)) for _, shape in layout)
+        header = -(-(_HEADER_WORDS + 2 * slots) * 8 // 64) * 64
+        return header + slots * params * 4
+
+    @classmethod
+    def create(cls, template: Dict[str, Any], slots: int = 8, name: Optional[str] = None) -> "SharedWeightStore":
+        """New segment sized for models shaped like `template` (a state dict)."""
+        layout = weight_layout(template)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls._size(layout, slots))
+        store = cls(shm, layout, slots, owner=True)
+        store._header[:] = [0, -1, slots, store.param_count]
+        store._slot_versions[:] = -1
+        store._slot_seq[:] = 0
+        return store
+
+    @classmethod
+    def attach(cls, spec) -> "SharedWeightStore":
+        """Map an existing segment from its spec() (in a worker process)."""
+        name, layout, slots = spec
+        # Worker processes started by the owner share its resource tracker, so
+        # the segment stays registered once and is unlinked by the owner only
+        shm = shared_memory.SharedMemory(name=name, create=False)
+        return cls(shm, layout, slots, owner=False)
+
+    def spec(self):
+        """Picklable handle for attach()."""
+        return (self.shm.name, self.layout, self.slots)
+
+    @property
+    def nbytes(self) -> int:
+        return self.shm.size
+
+    # --- Writer (learner) ---
+
+    def publish(self, state_dict: Dict[str, Any], version: int) -> int:
+        """Copy weights into the next ring slot and make it current. Returns the slot."""
+        current = int(self._header[_CURRENT])
+        slot = (current + 1) % self.slots
+        self._slot_seq[slot] += 1 # odd: slot being written
+        flat = self._data[slot]
+        offset = 0
+        for name, shape in self.layout:
+            size = int(np.prod(shape))
+            value = _to_numpy(state_dict[name])
+            flat[offset:offset + size] = (value.T if name.endswith(".weight") else value).reshape(-1)
+            offset += size
+        self._slot_versions[slot] = version
+        self._slot_seq[slot] += 1
+        self._header[_SEQ] += 1 # odd: header being written
+        self._header[_CURRENT] = slot
+        self._header[_SEQ] += 1
+        return slot
+
+    # --- Readers ---
+
+    def read_header(self) -> Tuple[int, np.ndarray, np.ndarray]:
+        """Consistent (current slot, slot versions, slot counters)."""
+        while True:
+            seq = int(self._header[_SEQ])
+            if seq % 2:
+                continue
+            current = int(self._header[_CURRENT])
+            versions = self._slot_versions.copy()
+            slot_seq = self._slot_seq.copy()
+            if int(self._header[_SEQ]) == seq:
+                return current, versions, slot_seq
+
+    def current_version(self) -> Optional[int]:
+        current, versions, _ = self.read_header()
+        return int(versions[current]) if current >= 0 else None
+
+    def versions(self) -> List[int]:
+        _, versions, _ = self.read_header()
+        return sorted(int(v) for v in versions if v >= 0)
+
+    def slot_seq(self, slot: int) -> int:
+        return int(self._slot_seq[slot])
+
+    def model(self, slot: int, version: int, slot_seq: int) -> SharedValueNet:
+        """Zero-copy model on a slot's weights."""
+        flat = self._data[slot]
+        state_dict = {}
+        offset = 0
+        for name, shape in self.layout:
+            size = int(np.prod(shape))
+            view = flat[offset:offset + size].reshape(shape)
+            # Weights are stored [in, out]; hand NumpyMLP the [out, in] view it transposes back
+            state_dict[name] = view.T if name.endswith(".weight") else view
+            offset += size
+        return SharedValueNet(state_dict, version, slot, slot_seq)
+
+    def close(self):
+        self._header = self._slot_versions = self._slot_seq = self._data = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Models mapped from this store are still alive: the mapping goes with them
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedModel:
+    """
+    Worker handle on a SharedWeightStore, with the HotSwapModel interface
+    (version / snapshot / predict / predict_batch / refresh). refresh() is a
+    header read; a new version is picked up by mapping its slot, no disk I/O
+    and no copy.
+    """
+
+    def __init__(self, store: SharedWeightStore):
+        self.store = store
+        self._current: Optional[SharedValueNet] = None
+        self.swaps = 0
+        self.refresh()
+
+    @property
+    def version(self):
+        current = self._current
+        return current.version if current is not None else None
+
+    def snapshot(self):
+        return self._current
+
+    def predict(self, state_vector) -> float:
+        return self._current.predict(state_vector)
+
+    def predict_batch(self, state_vectors):
+        return self._current.predict_batch(state_vectors)
+
+    def refresh(self) -> bool:
+        current, versions, slot_seq = self.store.read_header()
+        if current < 0 or slot_seq[current] % 2:
+            return False
+        version = int(versions[current])
+        if self._current is not None and version == self._current.version and self.valid(self._current):
+            return False
+        self._current = self.store.model(current, version, int(slot_seq[current]))
+        self.swaps += 1
+        return True
+
+    def valid(self, model: Optional[SharedValueNet] = None) -> bool:
+        """False if the model's slot was rewritten since it was mapped."""
+        model = model if model is not None else self._current
+        return model is not None and self.store.slot_seq(model.slot) == model.slot_seq
+
+    def opponent(self, rng: Optional[random.Random] = None, exclude_current: bool = True) -> Optional[SharedValueNet]:
+        """A past snapshot from the pool (uniform), or the current model if there is none."""
+        current, versions, slot_seq = self.store.read_header()
+        candidates = [s for s in range(self.store.slots)
+                      if versions[s] >= 0 and slot_seq[s] % 2 == 0 and not (exclude_current and s == current)]
+        if not candidates:
+            return self._current
+        slot = (rng or random).choice(candidates)
+        return self.store.model(slot, int(versions[slot]), int(slot_seq[slot]))
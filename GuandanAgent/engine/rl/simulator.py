@@ -0,0 +1,146 @@
+import multiprocessing as mp
+import os
+import time
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from .env import FEATURE_DIM
+from .match import play_game, simple_policy, heuristic_policy
+from .records import GameRecordLog, encode_record, move_type_code
+
+POLICIES = {"simple": simple_policy, "heuristic": heuristic_policy}
+
+# One fixed-size row per game (19 bytes); read back with read_outcomes()
+OUTCOME_DTYPE = np.dtype([
+    ("seed", "<u8"),
+    ("winner", "i1"),      # team 0/1, -1 if the step cap was hit
+    ("first_out", "i1"),   # seat that finished first, -1 if none
+    ("steps", "<u2"),
+    ("start_player", "u1"),
+    ("level", "u1"),
+    ("swapped", "u1"),     # 1: policy B sat in seats 0/2
+    ("duration_us", "<u4"),
+])
+
+
+def simulate_chunk(task) -> Dict[str, Any]:
+    """
+    Worker: play the games for a list of seeds. Returns outcomes as an
+    OUTCOME_DTYPE array, plus encoded game records and/or samples
+    (features float16, move type codes, rewards for the mover's team).
+    """
+    seeds, policy_a, policy_b, mirrored, want_records, want_samples, max_steps = task
+    pa, pb = POLICIES[policy_a], POLICIES[policy_b]
+    games = [(s, False) for s in seeds] + ([(s, True) for s in seeds] if mirrored else [])
+
+    outcomes = np.zeros(len(games), dtype=OUTCOME_DTYPE)
+    records: List[bytes] = []
+    states, moves, rewards = [], [], []
+    for i, (seed, swapped) in enumerate(games):
+        seats = [pb, pa, pb, pa] if swapped else [pa, pb, pa, pb]
+        game_states, game_moves, movers = [], [], []
+        observer = None
+        if want_samples:
+            def observer(env, action):
+                game_states.append(env.features().astype(np.float16))
+                game_moves.append(move_type_code(action))
+                movers.append(env.current_player % 2)
+        start = time.perf_counter()
+        result = play_game(seats, seed, max_steps=max_steps, record=want_records, observer=observer)
+        row = outcomes[i]
+        row["seed"] = seed
+        row["winner"] = result["winner"]
+        row["first_out"] = result["first_out"]
+        row["steps"] = result["steps"]
+        row["start_player"] = result["start_player"]
+        row["level"] = result["level"]
+        row["swapped"] = swapped
+        row["duration_us"] = min(int((time.perf_counter() - start) * 1e6), 2 ** 32 - 1)
+        if want_records:
+            records.append(encode_record(result["record"]))
+        if want_samples and result["winner"] != -1:
+            states.extend(game_states)
+            moves.extend(game_moves)
+            rewards.extend(1.0 if team == result["winner"] else -1.0 for team in movers)
+
+    chunk = {"outcomes": outcomes, "records": records}
+    if want_samples:
+        chunk["samples"] = {
+            "states": np.array(states, dtype=np.float16).reshape(-1, FEATURE_DIM),
+            "moves": np.array(moves, dtype=np.uint8),
+            "rewards": np.array(rewards, dtype=np.int8),
+        }
+    return chunk
+
+
+def iter_chunks(seeds: Sequence[int], chunk_size: int) -> Iterator[List[int]]:
+    for i in range(0, len(seeds), chunk_size):
+        yield list(seeds[i:i + chunk_size])
+
+
+def run_simulation(num_games: int, policy_a: str = "simple", policy_b: str = "heuristic", seed: int = 0,
+                   workers: int = 0, chunk_size: int = 50, mirrored: bool = True, records: bool = False,
+                   samples: bool = False, max_steps: int = 200) -> Iterator[Dict[str, Any]]:
+    """
+    Yield finished chunks (see simulate_chunk) in completion order. With
+    `mirrored`, every deal seed is played twice with the seats swapped, so
+    num_games deals give 2 * num_games games.
+    """
+    seeds = range(seed, seed + num_games)
+    tasks = ((chunk, policy_a, policy_b, mirrored, records, samples, max_steps)
+             for chunk in iter_chunks(seeds, chunk_size))
+    if workers <= 0:
+        for task in tasks:
+            yield simulate_chunk(task)
+        return
+    # spawn: the same start method as the self-play workers and arena
+    with mp.get_context("spawn").Pool(workers) as pool:
+        yield from pool.imap_unordered(simulate_chunk, tasks)
+
+
+class SimulationWriter:
+    """
+    Output directory layout:
+      outcomes.bin    OUTCOME_DTYPE rows, appended per chunk
+      games/          GameRecordLog segments (with records=True)
+      samples_NNNNNN.npz  one shard per chunk (with samples=True)
+    """
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self._outcomes = open(os.path.join(out_dir, "outcomes.bin"), "ab")
+        self._log = GameRecordLog(os.path.join(out_dir, "games"))
+        self._shards = len([n for n in os.listdir(out_dir) if n.startswith("samples_")])
+
+    def write(self, chunk: Dict[str, Any]):
+        self._outcomes.write(chunk["outcomes"].tobytes())
+        for data in chunk["records"]:
+            self._log.append_encoded(data)
+        samples = chunk.get("samples")
+        if samples is not None and len(samples["moves"]):
+            np.savez(os.path.join(self.out_dir, f"samples_{self._shards:06d}.npz"), **samples)
+            self._shards += 1
+
+    def close(self):
+        self._outcomes.close()
+        self._log.close()
+
+
+def read_outcomes(path: str) -> np.ndarray:
+    return np.fromfile(path, dtype=OUTCOME_DTYPE)
+
+
+def summarize(outcomes: np.ndarray) -> Dict[str, Any]:
+    """Win rate of policy A (seat-swap aware) and game length stats."""
+    finished = outcomes[outcomes["winner"] >= 0]
+    a_team = np.where(finished["swapped"] == 1, 1, 0)
+    a_wins = int((finished["winner"] == a_team).sum())
+    return {
+        "games": int(len(outcomes)),
+        "unfinished": int(len(outcomes) - len(finished)),
+        "a_win_rate": a_wins / len(finished) if len(finished) else 0.0,
+        "mean_steps": float(outcomes["steps"].mean()) if len(outcomes) else 0.0,
+        "mean_game_ms": float(outcomes["duration_us"].mean() / 1000) if len(outcomes) else 0.0,
+    }
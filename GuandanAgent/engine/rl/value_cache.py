@@ -0,0 +1,143 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def vector_key(state_vector) -> bytes:
+    """Digest of the float32 feature vector (exact model input)."""
+    data = np.asarray(state_vector, dtype=np.float32).tobytes()
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class ValueCache:
+    """
+    Bounded LRU cache in front of a value model (ModelManager, NumpyValueNet,
+    HotSwapModel, BatchingInferenceServer...).
+
+    - predict(vec): keyed by a digest of the feature vector.
+    - predict_state(env): keyed by GuandanEnv.state_key(), so a hit skips
+      featurization as well as the forward pass.
+
+    Entries are keyed by the model version they were computed with as well,
+    so searches pinned to an older snapshot and callers on the current model
+    share the cache without clearing each other's entries; values of retired
+    versions are never hit again and age out through the LRU.
+    """
+
+    def __init__(self, model, capacity: int = 100_000):
+        self.model = model
+        self.capacity = capacity
+        self._entries: "OrderedDict[Any, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = getattr(model, "version", None)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def version(self):
+        return getattr(self.model, "version", None)
+
+    def _check_version(self):
+        # Counts publishes of the live model; nothing is cleared
+        version = self.version
+        if version != self._version:
+            self._version = version
+            self.invalidations += 1
+
+    def _get(self, key, version):
+        key = (version, key)
+        with self._lock:
+            self._check_version()
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return value
+
+    def _put(self, key, value, version):
+        key = (version, key)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _lookup(self, model, key, compute):
+        version = getattr(model, "version", None)
+        value = self._get(key, version)
+        if value is None:
+            value = compute()
+            self._put(key, value, version)
+        return value
+
+    def predict(self, state_vector) -> float:
+        return self._lookup(self.model, ("v", vector_key(state_vector)), lambda: self.model.predict(state_vector))
+
+    def predict_state(self, state) -> float:
+        from .env import state_to_vector
+        return self._lookup(self.model, ("s", state.state_key()),
+                            lambda: self.model.predict(state_to_vector(state)))
+
+    def predict_batch(self, state_vectors) -> List[float]:
+        """Only the vectors that miss are sent to the model, in one batch."""
+        version = getattr(self.model, "version", None)
+        keys = [("v", vector_key(v)) for v in state_vectors]
+        values = [self._get(k, version) for k in keys]
+        missing = [i for i, v in enumerate(values) if v is None]
+        if missing:
+            if hasattr(self.model, "predict_batch"):
+                computed = self.model.predict_batch([state_vectors[i] for i in missing])
+            else:
+                computed = [self.model.predict(state_vectors[i]) for i in missing]
+            for i, v in zip(missing, computed):
+                values[i] = v
+                self._put(keys[i], v, version)
+        return values
+
+    def snapshot(self):
+        """Pin the underlying model version for one search (see MCTS.search)."""
+        model = self.model.snapshot() if hasattr(self.model, "snapshot") else self.model
+        return _PinnedValueCache(self, model)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "version": self._version,
+        }
+
+
+class _PinnedValueCache:
+    """ValueCache view bound to one model snapshot."""
+
+    def __init__(self, cache: ValueCache, model):
+        self.cache = cache
+        self.model = model
+        self.version = getattr(model, "version", None)
+
+    def predict(self, state_vector) -> float:
+        return self.cache._lookup(self.model, ("v", vector_key(state_vector)),
+                                  lambda: self.model.predict(state_vector))
+
+    def predict_state(self, state) -> float:
+        from .env import state_to_vector
+        return self.cache._lookup(self.model, ("s", state.state_key()),
+                                  lambda: self.model.predict(state_to_vector(state)))
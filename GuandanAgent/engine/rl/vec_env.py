@@ -0,0 +1,288 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .env import (
+    GuandanEnv, FEATURE_DIM, F_HAND, F_SIZES, F_LP_TYPE, F_LP_RANK, F_LP_SIZE, F_LP_SEAT,
+    F_PASS, F_FREE, F_LEVEL, F_WILDS, _CARD_RANK_IDX, _WILD_CARD_ID, _LEVEL_RANKS,
+    _LAST_PLAY_TYPE_IDX, _TYPE_ALIASES,
+)
+from .match import deal
+from GuandanAgent.engine.cards import card_id, card_from_id
+from GuandanAgent.engine.logic import get_legal_moves, sort_hand, get_rank_value, get_rank_from_card
+
+# (54, 15): card id -> rank slot, so rank counts are one matmul over the count tensor
+_RANK_MATRIX = np.zeros((54, 15), dtype=np.float32)
+_RANK_MATRIX[np.arange(54), _CARD_RANK_IDX] = 1.0
+_WILD_IDS = np.array([_WILD_CARD_ID.get(lvl, _WILD_CARD_ID[2]) for lvl in range(15)], dtype=np.int64)
+
+
+@dataclass
+class VecState:
+    """Array form of N games (one row per game)."""
+    counts: np.ndarray        # (N, 4, 54) int8 cards held per seat
+    current: np.ndarray       # (N,) int8 seat to move
+    pass_count: np.ndarray    # (N,) int8
+    last_player: np.ndarray   # (N,) int8, -1 = nobody yet
+    level: np.ndarray         # (N,) int8
+    lp_type: np.ndarray       # (N,) int8 index into LAST_PLAY_TYPES, -1 = none
+    lp_rank: np.ndarray       # (N,) float32 rank feature of the last play
+    lp_size: np.ndarray       # (N,) int8 cards in the last play
+    lp_counts: np.ndarray     # (N, 54) int8 last-play key (which cards)
+
+    @classmethod
+    def zeros(cls, n: int) -> "VecState":
+        return cls(
+            counts=np.zeros((n, 4, 54), dtype=np.int8),
+            current=np.zeros(n, dtype=np.int8),
+            pass_count=np.full(n, 3, dtype=np.int8),
+            last_player=np.full(n, -1, dtype=np.int8),
+            level=np.full(n, 2, dtype=np.int8),
+            lp_type=np.full(n, -1, dtype=np.int8),
+            lp_rank=np.zeros(n, dtype=np.float32),
+            lp_size=np.zeros(n, dtype=np.int8),
+            lp_counts=np.zeros((n, 54), dtype=np.int8),
+        )
+
+    def take(self, rows) -> "VecState":
+        return VecState(**{k: v[rows] for k, v in self.__dict__.items()})
+
+
+@dataclass
+class MoveBatch:
+    """Array form of one move per row."""
+    is_pass: np.ndarray   # (K,) bool
+    counts: np.ndarray    # (K, 54) int8
+    type_idx: np.ndarray  # (K,) int8
+    rank: np.ndarray      # (K,) float32
+    size: np.ndarray      # (K,) int8
+
+
+def encode_moves(actions: List[Dict[str, Any]], levels) -> MoveBatch:
+    k = len(actions)
+    batch = MoveBatch(np.zeros(k, dtype=bool), np.zeros((k, 54), dtype=np.int8),
+                      np.full(k, -1, dtype=np.int8), np.zeros(k, dtype=np.float32), np.zeros(k, dtype=np.int8))
+    for j, (a, level) in enumerate(zip(actions, levels)):
+        if a['action'] == 'pass':
+            batch.is_pass[j] = True
+            continue
+        cards = a['cards']
+        for c in cards:
+            batch.counts[j, card_id(c)] += 1
+        t = a.get('type')
+        batch.type_idx[j] = _LAST_PLAY_TYPE_IDX.get(_TYPE_ALIASES.get(t, t), -1)
+        # Same rank rule as GuandanEnv._write_last_play: first card, level rank counts as 15
+        rank = get_rank_from_card(cards[0])
+        batch.rank[j] = (15 if rank == _LEVEL_RANKS.get(int(level)) else get_rank_value(rank)) / 21.0
+        batch.size[j] = len(cards)
+    return batch
+
+
+def apply_moves(state: VecState, moves: MoveBatch) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Apply one move per row in place, with GuandanEnv.step's rules.
+    Returns (done, first_out seat or -1).
+    """
+    rows = np.arange(len(state.current))
+    player = state.current.astype(np.int64)
+    play = ~moves.is_pass
+
+    state.counts[rows[play], player[play]] -= moves.counts[play]
+    state.last_player[play] = player[play]
+    state.pass_count[play] = 0
+    state.lp_type[play] = moves.type_idx[play]
+    state.lp_rank[play] = moves.rank[play]
+    state.lp_size[play] = moves.size[play]
+    state.lp_counts[play] = moves.counts[play]
+    state.pass_count[~play] += 1
+
+    hand_sizes = state.counts.sum(axis=2, dtype=np.int16)
+    done = play & (hand_sizes[rows, player] == 0)
+
+    next_player = (player + 1) % 4
+    # Jie Feng: the round ends on a finished player's play -> their partner leads
+    lp = state.last_player.astype(np.int64)
+    jie_feng = (state.pass_count == 3) & (lp != -1) & (hand_sizes[rows, np.maximum(lp, 0)] == 0)
+    next_player = np.where(jie_feng, (lp + 2) % 4, next_player)
+    state.current[~done] = next_player[~done]
+    first_out = np.where(done, player, -1)
+    return done, first_out
+
+
+def featurize(state: VecState, seats: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (N, FEATURE_DIM) features, the same layout as GuandanEnv.features().
+    `seats` picks the perspective per row (default: the seat to move).
+    """
+    n = len(state.current)
+    rows = np.arange(n)
+    me = (state.current if seats is None else seats).astype(np.int64)
+    f = np.zeros((n, FEATURE_DIM), dtype=np.float32)
+
+    my_counts = state.counts[rows, me].astype(np.float32)
+    f[:, F_HAND:F_HAND + 15] = (my_counts @ _RANK_MATRIX) * 0.25
+    sizes = state.counts.sum(axis=2, dtype=np.int16).astype(np.float32) / 27.0
+    for rel in range(4):
+        f[:, F_SIZES + rel] = sizes[rows, (me + rel) % 4]
+
+    has_lp = state.lp_type >= 0
+    f[rows[has_lp], F_LP_TYPE + state.lp_type[has_lp]] = 1.0
+    has_cards = state.lp_size > 0
+    f[:, F_LP_RANK] = np.where(has_cards, state.lp_rank, 0.0)
+    f[:, F_LP_SIZE] = state.lp_size / 10.0
+
+    lp = state.last_player.astype(np.int64)
+    seen = lp != -1
+    f[rows[seen], F_LP_SEAT + (lp[seen] - me[seen]) % 4] = 1.0
+    f[:, F_PASS] = np.minimum(state.pass_count, 3) / 3.0
+    f[:, F_FREE] = ((state.pass_count >= 3) | (lp == me)).astype(np.float32)
+
+    level = state.level.astype(np.int64)
+    ok = (level >= 2) & (level <= 14)
+    f[rows[ok], F_LEVEL + level[ok] - 2] = 1.0
+    f[:, F_WILDS] = my_counts[rows, _WILD_IDS[np.clip(level, 0, 14)]] / 2.0
+    return f
+
+
+class VectorGuandanEnv:
+    """
+    N self-play games stepped in lockstep, held as arrays (see VecState).
+
+    - legal_actions(): per-game move lists plus an (N, M) mask, from the
+      existing move generator (cached until the game moves)
+    - step(actions): batched apply; finished games are reset in place
+    - features() / afterstate_features(): batched featurization, so one
+      network batch can cover every game each tick
+    """
+
+    def __init__(self, num_envs: int, seed: int = 0, max_steps: int = 200):
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.state = VecState.zeros(num_envs)
+        self.steps = np.zeros(num_envs, dtype=np.int32)
+        self.seeds = np.zeros(num_envs, dtype=np.int64)
+        self._next_seed = seed
+        self._last_play: List[Optional[Dict[str, Any]]] = [None] * num_envs
+        self._legal: List[Optional[List[Dict[str, Any]]]] = [None] * num_envs
+        for i in range(num_envs):
+            self.reset_env(i)
+
+    # --- Game slots ---
+
+    def reset_env(self, i: int, seed: Optional[int] = None):
+        if seed is None:
+            seed = self._next_seed
+            self._next_seed += 1
+        hands, start_player, level = deal(seed)
+        s = self.state
+        s.counts[i] = 0
+        for seat, hand in enumerate(hands):
+            for c in hand:
+                s.counts[i, seat, card_id(c)] += 1
+        s.current[i] = start_player
+        s.pass_count[i] = 3
+        s.last_player[i] = -1
+        s.level[i] = level
+        s.lp_type[i] = -1
+        s.lp_rank[i] = 0.0
+        s.lp_size[i] = 0
+        s.lp_counts[i] = 0
+        self.steps[i] = 0
+        self.seeds[i] = seed
+        self._last_play[i] = None
+        self._legal[i] = None
+
+    def hand(self, i: int, seat: int) -> List[Any]:
+        counts = self.state.counts[i, seat]
+        return sort_hand([card_from_id(cid) for cid in np.repeat(np.arange(54), counts)])
+
+    def env_at(self, i: int) -> GuandanEnv:
+        """Game i as a (full-information) GuandanEnv, e.g. for MCTS."""
+        s = self.state
+        last_play = self._last_play[i]
+        if last_play is not None:
+            last_play = dict(last_play, player_index=int(s.last_player[i]))
+        env = GuandanEnv(my_hand=[], all_hands=[self.hand(i, p) for p in range(4)], last_play=last_play,
+                         current_player=int(s.current[i]), current_level=int(s.level[i]))
+        env.pass_count = int(s.pass_count[i])
+        env.last_player_idx = int(s.last_player[i])
+        return env
+
+    # --- Moves ---
+
+    def legal_actions(self) -> Tuple[List[List[Dict[str, Any]]], np.ndarray]:
+        """(moves per game, (N, M) bool mask of valid slots)."""
+        s = self.state
+        for i in range(self.num_envs):
+            if self._legal[i] is None:
+                me = int(s.current[i])
+                free = s.pass_count[i] >= 3 or s.last_player[i] == me
+                self._legal[i] = get_legal_moves(self.hand(i, me), None if free else self._last_play[i],
+                                                 current_level=int(s.level[i]))
+        width = max(len(m) for m in self._legal)
+        mask = np.zeros((self.num_envs, width), dtype=bool)
+        for i, moves in enumerate(self._legal):
+            mask[i, :len(moves)] = True
+        return list(self._legal), mask
+
+    def step(self, action_indices) -> Tuple[np.ndarray, np.ndarray, List[Optional[Dict[str, Any]]]]:
+        """
+        Play legal_actions()[i][action_indices[i]] in every game.
+        Returns (rewards, dones, infos): reward is +1/-1 for team 0 when a
+        game ends (0 if it hit max_steps); finished games are reset, and
+        infos[i] then holds {"seed", "winner", "steps", "first_out"}.
+        """
+        legal, _ = self.legal_actions()
+        actions = [legal[i][int(a)] for i, a in enumerate(action_indices)]
+        done, first_out = apply_moves(self.state, encode_moves(actions, self.state.level))
+        self.steps += 1
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        capped = ~done & (self.steps >= self.max_steps)
+        infos: List[Optional[Dict[str, Any]]] = [None] * self.num_envs
+        for i, a in enumerate(actions):
+            if a['action'] != 'pass':
+                self._last_play[i] = a
+            self._legal[i] = None
+            if done[i] or capped[i]:
+                winner = int(first_out[i] % 2) if done[i] else -1
+                rewards[i] = 0.0 if winner == -1 else (1.0 if winner == 0 else -1.0)
+                infos[i] = {"seed": int(self.seeds[i]), "winner": winner, "steps": int(self.steps[i]),
+                            "first_out": int(first_out[i])}
+                self.reset_env(i)
+        return rewards, done | capped, infos
+
+    # --- Features ---
+
+    def features(self) -> np.ndarray:
+        return featurize(self.state)
+
+    def afterstate_features(self) -> Tuple[np.ndarray, np.ndarray, List[List[Dict[str, Any]]]]:
+        """
+        Features of the position after each legal move, from the mover's own
+        seat (no hidden hands involved): (N, M, FEATURE_DIM), the (N, M)
+        mask and the move lists. One predict_batch covers every game.
+        """
+        legal, mask = self.legal_actions()
+        game_idx, _ = np.nonzero(mask)
+        flat = [m for moves in legal for m in moves]
+        after = self.state.take(game_idx)
+        movers = after.current.copy()
+        apply_moves(after, encode_moves(flat, after.level))
+        out = np.zeros(mask.shape + (FEATURE_DIM,), dtype=np.float32)
+        out[mask] = featurize(after, seats=movers)
+        return out, mask, legal
+
+
+def greedy_actions(values: np.ndarray, mask: np.ndarray, epsilon: float = 0.0,
+                   rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Best valid slot per game for afterstate values (mover's perspective), epsilon-greedy."""
+    scores = np.where(mask, values, -np.inf)
+    choice = scores.argmax(axis=1)
+    if epsilon > 0:
+        rng = rng or np.random.default_rng()
+        explore = rng.random(len(choice)) < epsilon
+        counts = mask.sum(axis=1)
+        choice[explore] = (rng.random(explore.sum()) * counts[explore]).astype(np.int64)
+    return choice
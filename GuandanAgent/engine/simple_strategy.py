@@ -97,12 +97,21 @@ def get_happy_rank_value(card: Any) -> int:
     """
     return get_rank_value(get_rank_from_card(card))
 
+# Level-promoted rank values for all 13 levels (2..A), by rank string
+LEVEL_RANK_VALUES: Dict[int, Dict[str, int]] = {
+    level: {r.value: (15 if get_rank_value(r.value) == level else get_rank_value(r.value)) for r in Rank}
+    for level in range(2, 15)
+}
+
 def get_guandan_rank_value(card: Any, current_level: int) -> int:
     """
     Get rank value considering Level Card promotion.
     Normal: 2..14, SJ=20, BJ=21
     Level Card: Promoted to 15 (Between A and SJ).
     """
+    table = LEVEL_RANK_VALUES.get(current_level)
+    if table is not None:
+        return table.get(get_rank_from_card(card), 0)
     val = get_rank_value(get_rank_from_card(card))
     if val == current_level:
         return 15
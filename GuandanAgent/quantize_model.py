@@ -0,0 +1,79 @@
+import sys
+import os
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import json
+import random
+import argparse
+import contextlib
+from GuandanAgent.engine.rl.env import GuandanEnv, state_to_vector
+from GuandanAgent.engine.rl.mcts import MCTS
+from GuandanAgent.engine.rl.numpy_net import NumpyValueNet
+from GuandanAgent.engine.rl.quantize import QuantizedValueNet, calibrate, accuracy_report, format_report, quantized_path_for
+from GuandanAgent.engine.cards import standard_deck
+
+
+def collect_calibration_states(num_games=20, seed=0):
+    """Play fast heuristic games and record the player-view feature vectors."""
+    rng_state = random.getstate()
+    random.seed(seed)
+    policy = MCTS(model=None)
+    states = []
+    try:
+        for _ in range(num_games):
+            deck = standard_deck() * 2
+            random.shuffle(deck)
+            hands = [deck[i * 27:(i + 1) * 27] for i in range(4)]
+            env = GuandanEnv(my_hand=[], all_hands=hands, current_player=random.randint(0, 3),
+                             current_level=random.randint(2, 14))
+            steps = 0
+            while not env.is_done() and steps < 200:
+                actions = env.get_legal_actions()
+                if not actions:
+                    break
+                view = GuandanEnv(my_hand=env.hands[env.current_player], last_play=env.last_play,
+                                  current_player=env.current_player, pass_count=env.pass_count,
+                                  current_level=env.current_level,
+                                  hand_sizes=[len(h) for h in env.hands])
+                states.append(state_to_vector(view))
+                env.step(policy._heuristic_policy(actions, env))
+                steps += 1
+    finally:
+        random.setstate(rng_state)
+    return states
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Quantize the Guandan value network for CPU serving')
+    parser.add_argument('--model', type=str, default=os.path.join(os.path.dirname(__file__), 'model_v1.npz'),
+                        help='Float weights (.npz export, or .pth which needs torch)')
+    parser.add_argument('--mode', type=str, default='int8', choices=['int8', 'float16'])
+    parser.add_argument('--games', type=int, default=20, help='Heuristic games used for calibration')
+    parser.add_argument('--out', type=str, default=None, help='Output path (default: <model>.<mode>.npz)')
+    parser.add_argument('--report', type=str, default=None, help='Optional path for the JSON accuracy report')
+    args = parser.parse_args()
+
+    if args.model.endswith('.npz'):
+        float_net = NumpyValueNet.from_npz(args.model)
+    else:
+        import torch
+        float_net = NumpyValueNet(torch.load(args.model, map_location='cpu'))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        samples = collect_calibration_states(args.games)
+    print(f"Calibrating on {len(samples)} states from {args.games} heuristic games...")
+
+    qnet = calibrate(float_net, samples, mode=args.mode, quantized_cls=QuantizedValueNet)
+    report = accuracy_report(float_net, qnet, samples)
+    print(format_report(report))
+
+    out_path = args.out or quantized_path_for(args.model, args.mode)
+    qnet.save(out_path)
+    print(f"Saved quantized model to {out_path} ({os.path.getsize(out_path) / 1024:.1f} KB)")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,52 @@
+import sys
+import os
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import argparse
+from GuandanAgent.engine.rl.simulator import POLICIES, run_simulation, SimulationWriter, read_outcomes, summarize
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Headless heuristic-vs-heuristic Guandan simulator')
+    parser.add_argument('--games', type=int, default=1000, help='Number of deals (x2 games when mirrored)')
+    parser.add_argument('--a', type=str, default='simple', choices=sorted(POLICIES), help='Policy A (default: simple)')
+    parser.add_argument('--b', type=str, default='heuristic', choices=sorted(POLICIES), help='Policy B (default: heuristic)')
+    parser.add_argument('--seed', type=int, default=0, help='First deal seed')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (0 = in process)')
+    parser.add_argument('--chunk-size', type=int, default=50, help='Deals per worker task')
+    parser.add_argument('--no-mirror', action='store_true', help='Play each deal once instead of twice with seats swapped')
+    parser.add_argument('--out', type=str, default='sim_output', help='Output directory (default: sim_output)')
+    parser.add_argument('--records', action='store_true', help='Also write full game records (deal + moves)')
+    parser.add_argument('--samples', action='store_true', help='Also write (features, move type, reward) sample shards')
+    args = parser.parse_args()
+
+    writer = SimulationWriter(args.out)
+    games_per_deal = 1 if args.no_mirror else 2
+    total = args.games * games_per_deal
+    print(f"Simulating {total} games ({args.a} vs {args.b}) on {args.workers} workers -> {args.out}")
+    start = time.time()
+    done = 0
+    last_report = start
+    try:
+        for chunk in run_simulation(args.games, args.a, args.b, seed=args.seed, workers=args.workers,
+                                    chunk_size=args.chunk_size, mirrored=not args.no_mirror,
+                                    records=args.records, samples=args.samples):
+            writer.write(chunk)
+            done += len(chunk["outcomes"])
+            now = time.time()
+            if now - last_report >= 5 or done == total:
+                print(f"  {done}/{total} games ({done / (now - start):.1f} games/sec)")
+                last_report = now
+    except KeyboardInterrupt:
+        print("Interrupted.")
+    finally:
+        writer.close()
+
+    elapsed = time.time() - start
+    summary = summarize(read_outcomes(os.path.join(args.out, "outcomes.bin")))
+    print(f"Done: {done} games in {elapsed:.1f}s ({done / max(elapsed, 1e-9):.1f} games/sec)")
+    print(f"Totals in {args.out}: {summary['games']} games, {args.a} win rate {summary['a_win_rate'] * 100:.1f}%, "
+          f"{summary['mean_steps']:.0f} moves/game, {summary['unfinished']} unfinished")
@@ -0,0 +1,30 @@
+import unittest
+
+from engine.rl.arena import schedule, run_games, fit_elo, elo_ratings
+
+
+class TestArena(unittest.TestCase):
+    def test_schedule_mirrors_every_deal(self):
+        tasks = schedule(3, games_per_pair=4, seed=10)
+        self.assertEqual(len(tasks), 3 * 4)
+        for a, b, seed, swapped in tasks:
+            self.assertIn((a, b, seed, not swapped), tasks)
+
+    def test_fit_elo_orders_by_strength(self):
+        # 0 beats 1 75% of the time, 1 beats 2 75% of the time
+        units = [(0, 1, 75, 100), (1, 2, 75, 100)]
+        ratings = fit_elo(units, 3, prior_games=0)
+        self.assertEqual(ratings[0], 1000.0)
+        self.assertAlmostEqual(ratings[0] - ratings[1], 400 * 0.4771, delta=2)  # log10(3)
+        self.assertAlmostEqual(ratings[1] - ratings[2], 400 * 0.4771, delta=2)
+
+    def test_baseline_games_in_process(self):
+        results = run_games(["simple", "heuristic"], schedule(2, 2, seed=3), workers=0)
+        self.assertEqual(len(results), 2)
+        self.assertEqual({r["swapped"] for r in results}, {False, True})
+        table = elo_ratings(results, ["simple", "heuristic"], bootstrap=10)
+        self.assertEqual(sum(r["games"] for r in table), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
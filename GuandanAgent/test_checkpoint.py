@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import torch
+
+from engine.rl.checkpoint import capture_rng_state, restore_rng_state, save_checkpoint, load_checkpoint
+from engine.rl.model import ModelManager
+from engine.rl.records import GameRecord, GameRecordLog
+from engine.rl.replay import PrioritizedReplayBuffer
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ckpt", "session.pt")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self, name):
+        mgr = ModelManager(os.path.join(self.tmp.name, f"{name}.pth"))
+        buf = PrioritizedReplayBuffer(128, path=os.path.join(self.tmp.name, name))
+        return mgr, buf
+
+    def test_resume_continues_exactly(self):
+        torch.manual_seed(0)
+        mgr, buf = self.make("a")
+        data_rng = np.random.default_rng(0)
+        for _ in range(100):
+            buf.append(data_rng.random(120), float(data_rng.choice([-1.0, 1.0])))
+        sampler = np.random.default_rng(1)
+        mgr.train_from_buffer(buf, batch_size=32, num_batches=3, rng=sampler)
+
+        save_checkpoint(self.path, {
+            "model_mgr": mgr.training_state(), "replay_buffer": buf.state_dict(),
+            "rng": capture_rng_state(), "sampler_rng": sampler.bit_generator.state,
+        })
+        expected = mgr.train_from_buffer(buf, batch_size=32, num_batches=3, rng=sampler)["loss"]
+        torch.rand(3)  # advance the global RNGs past the checkpoint
+
+        mgr2, buf2 = self.make("b")
+        state = load_checkpoint(self.path)
+        mgr2.load_training_state(state["model_mgr"])
+        buf2.load_state_dict(state["replay_buffer"])
+        restore_rng_state(state["rng"])
+        sampler2 = np.random.default_rng()
+        sampler2.bit_generator.state = state["sampler_rng"]
+
+        self.assertEqual(mgr2.train_from_buffer(buf2, batch_size=32, num_batches=3, rng=sampler2)["loss"], expected)
+        for k, v in mgr.model.state_dict().items():
+            self.assertTrue(torch.equal(v, mgr2.model.state_dict()[k]))
+
+    def test_buffer_checkpoint_stores_position_not_samples(self):
+        _, buf = self.make("a")
+        data_rng = np.random.default_rng(0)
+        for _ in range(100):
+            buf.append(data_rng.random(120), 1.0)
+        buf.update_priorities(np.arange(10), np.linspace(0.5, 5.0, 10))
+        state = buf.checkpoint_state()
+        self.assertNotIn("states", state)
+        expected = buf.get(np.arange(100))[0]
+        for _ in range(10):
+            buf.append(data_rng.random(120), -1.0)
+        buf.flush()
+
+        # Resume: reopen the memory-mapped files, rewind to the checkpoint
+        reopened = PrioritizedReplayBuffer(128, path=os.path.join(self.tmp.name, "a"))
+        self.assertEqual(len(reopened), 110)
+        reopened.load_checkpoint_state(state)
+        self.assertEqual((len(reopened), reopened.cursor, reopened.total_added), (100, 100, 100))
+        np.testing.assert_array_equal(reopened.get(np.arange(100))[0], expected)
+        np.testing.assert_allclose(reopened.tree.get(np.arange(100)), state["priorities"])
+        self.assertEqual(reopened.max_priority, state["max_priority"])
+
+    def test_game_log_truncated_to_checkpoint(self):
+        record = GameRecord(deal=list(range(54)) * 2, level=2, start_player=0, winner=0)
+        log = GameRecordLog(os.path.join(self.tmp.name, "games"), segment_bytes=1)
+        log.append(record)
+        position = log.tell()
+        log.append(record)
+        log.append(record)
+        log.truncate(position)
+        self.assertEqual(len(list(log)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
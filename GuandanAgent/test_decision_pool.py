@@ -0,0 +1,209 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from engine.cards import standard_deck
+from engine.logic import get_rank_value
+from backend.decisions import (
+    DecisionCache, DecisionPool, DecisionBusy, DecisionTimeout, InvalidCards, decide, get_decision_service
+)
+
+
+def _hand(n=10):
+    return [{"suit": c.suit.value, "rank": c.rank.value} for c in standard_deck()[:n]]
+
+
+class TestDecisionService(unittest.TestCase):
+    def test_cards_are_interned_across_spellings(self):
+        service = get_decision_service()
+        hearts_ace = service.card({"suit": "H", "rank": "A"})
+        self.assertIs(service.card({"suit": "HEARTS", "rank": "A"}), hearts_ace)
+        self.assertIs(service.card({"suit": "hearts", "rank": "a"}), hearts_ace)
+        self.assertEqual(len(set(map(id, service.cards.values()))), 54)
+        with self.assertRaises(InvalidCards):
+            service.card({"suit": "X", "rank": "3"})
+
+    def test_level_tables_promote_the_level_rank(self):
+        service = get_decision_service()
+        self.assertEqual(sorted(service.level_tables), list(range(2, 15)))
+        for level in range(2, 15):
+            for card in service.deck:
+                plain = get_rank_value(card.rank.value)
+                self.assertEqual(service.rank_value(card, level), 15 if plain == level else plain)
+        five = service.card({"suit": "S", "rank": "5"})
+        self.assertEqual(service.rank_value(five, 5), 15)
+        self.assertEqual(service.rank_value(five), 5)
+
+
+class TestDeadlines(unittest.TestCase):
+    def test_search_gives_way_to_decide_move_near_the_deadline(self):
+        payload = {"hand": _hand(12), "last_play": None, "level": 2, "player_index": 0,
+                   "algorithm": "MCTS", "deadline": time.time() + 0.05}
+        move = decide(payload)
+        self.assertEqual(move["algorithm"], "HappyGuandan")
+        self.assertIn("MCTS skipped", move["reasoning"])
+        self.assertEqual(move["cards"], decide(dict(payload, algorithm=None))["cards"])
+
+    def test_mcts_answers_within_its_budget(self):
+        started = time.time()
+        move = decide({"hand": _hand(12), "last_play": None, "level": 2, "player_index": 0,
+                       "algorithm": "MCTS", "deadline": started + 0.6})
+        self.assertEqual(move["algorithm"], "MCTS")
+        self.assertTrue(move["cards"])
+        self.assertLess(time.time() - started, 0.7)
+
+
+class TestDecisionCache(unittest.TestCase):
+    def test_key_ignores_order_and_spelling_but_not_partner(self):
+        hand = _hand(8)
+        spelled = [{"suit": {"H": "HEARTS", "S": "spades"}.get(c["suit"], c["suit"]), "rank": c["rank"]}
+                   for c in reversed(hand)]
+        play = {"type": "single", "cards": [{"suit": "H", "rank": "4"}], "player_index": 2}
+        base = {"hand": hand, "last_play": play, "level": 2, "player_index": 0}
+        key = DecisionCache.key("HappyGuandan", base)
+        self.assertEqual(DecisionCache.key("HappyGuandan", dict(base, hand=spelled)), key)
+        self.assertNotEqual(DecisionCache.key("HappyGuandan", dict(base, last_play=dict(play, player_index=1))), key)
+        self.assertNotEqual(DecisionCache.key("HappyGuandan", dict(base, level=3)), key)
+        self.assertIsNone(DecisionCache.key("MCTS", base))
+        self.assertIsNone(DecisionCache.key("HappyGuandan", dict(base, hand=[{"suit": "X", "rank": "3"}])))
+
+    def test_lru_and_ttl(self):
+        cache = DecisionCache(capacity=2, ttl=60)
+        cache.put(("a",), {"action": "pass"})
+        cache.put(("b",), {"action": "pass"})
+        self.assertIsNotNone(cache.get(("a",)))
+        cache.put(("c",), {"action": "pass"})  # evicts b, the least recently used
+        self.assertIsNone(cache.get(("b",)))
+        cache.ttl = -1
+        cache.put(("d",), {"action": "pass"})
+        self.assertIsNone(cache.get(("d",)))
+        cache.get(None)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 2, 2))
+        self.assertEqual((stats["expired"], stats["uncacheable"]), (1, 1))
+
+
+class TestDecisionPool(unittest.TestCase):
+    def test_decide_returns_plain_move_from_hand(self):
+        move = decide({"hand": _hand(), "last_play": None, "level": 2, "player_index": 0})
+        self.assertEqual(move["action"], "play")
+        self.assertTrue(move["cards"])
+        for card in move["cards"]:
+            self.assertIn(card, _hand())
+
+    def test_worker_process_matches_inline_decision(self):
+        payload = {"hand": _hand(), "last_play": None, "level": 2, "player_index": 0}
+        pool = DecisionPool(workers=1, queue_size=1, timeout=30).start()
+        try:
+            move = asyncio.run(pool.decide(payload))
+        finally:
+            pool.shutdown()
+        self.assertEqual(move, decide(payload))
+
+    def test_full_pool_rejects_and_slow_decision_times_out(self):
+        release = threading.Event()
+        pool = DecisionPool(workers=0, queue_size=1, timeout=0.1).start(warm=False)
+
+        async def scenario():
+            # 1 running + 1 queued fill the pool
+            first = asyncio.ensure_future(pool.run(release.wait, timeout=5))
+            second = asyncio.ensure_future(pool.run(release.wait, timeout=5))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(DecisionBusy):
+                await pool.run(release.wait)
+            release.set()
+            await asyncio.gather(first, second)
+            release.clear()
+            with self.assertRaises(DecisionTimeout):
+                await pool.run(release.wait)
+            release.set()
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+        self.assertEqual(pool.stats()["rejected"], 1)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        self.assertEqual(pool.stats()["completed"], 2)
+
+    def test_batch_yields_every_index_once(self):
+        payloads = [{"hand": _hand(n), "last_play": None, "level": 2, "player_index": 0} for n in range(3, 13)]
+        payloads[4] = {"hand": [{"suit": "X", "rank": "3"}]}
+        pool = DecisionPool(workers=2, queue_size=0, timeout=30).start()
+
+        async def collect():
+            return [item async for item in pool.decide_batch(payloads, chunk_size=3)]
+
+        try:
+            results = dict(asyncio.run(collect()))
+        finally:
+            pool.shutdown()
+        self.assertEqual(sorted(results), list(range(len(payloads))))
+        self.assertIsInstance(results[4], InvalidCards)
+        for i, payload in enumerate(payloads):
+            if i != 4:
+                self.assertEqual(results[i], decide(payload))
+
+    def test_batch_honours_deadlines(self):
+        import backend.decisions
+        now = time.time()
+        payloads = [{"hand": _hand(n), "last_play": None, "level": 2, "player_index": 0, "deadline": now + 30}
+                    for n in range(3, 7)]
+        payloads[1]["deadline"] = now - 1
+        pool = DecisionPool(workers=0, queue_size=0, timeout=30).start(warm=False)
+        release = threading.Event()
+
+        async def collect(items):
+            return dict([item async for item in pool.decide_batch(items, chunk_size=4)])
+
+        real_decide_many = backend.decisions.decide_many
+        try:
+            results = asyncio.run(collect(payloads))
+            # A stuck chunk gives up at its deadline, not after timeout * len(chunk)
+            backend.decisions.decide_many = lambda items: release.wait() and real_decide_many(items)
+            started = time.time()
+            stuck = asyncio.run(collect([dict(p, deadline=started + 0.2) for p in payloads]))
+            elapsed = time.time() - started
+        finally:
+            backend.decisions.decide_many = real_decide_many
+            release.set()
+            pool.shutdown()
+        self.assertIsInstance(results[1], DecisionTimeout)
+        for i in (0, 2, 3):
+            self.assertEqual(results[i], decide(payloads[i]))
+        self.assertLess(elapsed, 1.0)
+        self.assertTrue(all(isinstance(r, DecisionTimeout) for r in stuck.values()))
+
+
+class TestSuggestMovesEndpoint(unittest.TestCase):
+    def test_batch_matches_single_requests(self):
+        from fastapi.testclient import TestClient
+        import backend.decisions
+        from backend.app import create_app
+
+        backend.decisions._pool = DecisionPool(workers=0, queue_size=2, timeout=30)
+        backend.decisions._cache = DecisionCache()
+        states = [{"player_index": 0, "my_hand": _hand(n), "current_hand": []} for n in range(4, 10)]
+        try:
+            with TestClient(create_app()) as client:
+                singles = [client.post("/api/suggest_move", json=s).json() for s in states]
+                batch = client.post("/api/suggest_moves", json=states).json()
+                streamed = [json.loads(line) for line in
+                            client.post("/api/suggest_moves?stream=true", json=states).text.splitlines()]
+                stats = client.get("/api/decision_stats").json()
+        finally:
+            backend.decisions._pool = backend.decisions._cache = None
+        for move in singles + batch + streamed:
+            self.assertGreaterEqual(move.pop("elapsed_ms"), 0)
+        self.assertEqual(batch, singles)
+        # Singles filled the cache; both batches were answered from it
+        self.assertEqual(stats["cache"]["hits"], 2 * len(states))
+        self.assertEqual(stats["pool"]["completed"], len(states))
+        self.assertEqual(sorted(m.pop("index") for m in streamed), list(range(len(states))))
+        self.assertEqual(sorted(map(json.dumps, streamed)), sorted(map(json.dumps, singles)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import multiprocessing as mp
+import time
+import unittest
+
+import numpy as np
+
+from engine.rl.distributed import Coordinator, actor_config, encode_result, decode_result, run_actor
+from engine.rl.env import FEATURE_DIM
+from engine.rl.records import GameRecord
+from engine.rl.match import deal
+
+
+def _state_dict(seed=0):
+    rng = np.random.default_rng(seed)
+    sd = {}
+    for name, (out_dim, in_dim) in zip(["fc1", "fc2", "fc3"], [(128, 120), (64, 128), (1, 64)]):
+        sd[f"{name}.weight"] = rng.standard_normal((out_dim, in_dim)).astype(np.float32) * 0.1
+        sd[f"{name}.bias"] = np.zeros(out_dim, dtype=np.float32)
+    return sd
+
+
+class TestDistributed(unittest.TestCase):
+    def test_result_round_trip(self):
+        hands, start, level = deal(1)
+        record = GameRecord.from_hands(hands, level, start, seed=1)
+        samples = [(np.full(FEATURE_DIM, i, dtype=np.float32), 1.0 if i % 2 else -1.0) for i in range(3)]
+        header, payload = encode_result(0, samples, record, {"outcome": "finished"})
+        winner, decoded, rec, info = decode_result(header, payload)
+        self.assertEqual((winner, info), (0, {"outcome": "finished"}))
+        self.assertEqual(rec.deal, record.deal)
+        self.assertEqual([r for _, r in decoded], [-1.0, 1.0, -1.0])
+        np.testing.assert_array_equal(decoded[2][0], samples[2][0])
+
+    def test_local_actors(self):
+        config = actor_config(search_budget={"base": 2, "min_sims": 1, "max_sims": 2})
+        coordinator = Coordinator("127.0.0.1", 0, opponent_type="heuristic", config=config, seed=100,
+                                  seeds_per_lease=2).start()
+        try:
+            coordinator.publish(_state_dict(), 3)
+            host, port = coordinator.address
+            ctx = mp.get_context("spawn")
+            # Two local processes stand in for two hosts
+            procs = [ctx.Process(target=run_actor, args=(host, port, f"node-{i}", 2)) for i in range(2)]
+            for p in procs:
+                p.start()
+            items = [coordinator.get(timeout=120) for _ in range(4)]
+            for p in procs:
+                p.join(30)
+            self.assertTrue(all(item is not None for item in items))
+            self.assertEqual({item[0] for item in items}, {"node-0", "node-1"})
+            self.assertTrue(all(item[3] == 3 for item in items))
+            self.assertEqual(sorted(item[4].seed for item in items), [100, 101, 102, 103])
+            health = {h["actor_id"]: h for h in coordinator.health()}
+            self.assertEqual(health["node-0"]["games"], 2)
+            self.assertFalse(health["node-0"]["alive"])  # said bye
+            self.assertEqual(coordinator.alive(), 0)
+        finally:
+            coordinator.stop(timeout=1)
+
+    def test_dead_actor_seeds_are_requeued(self):
+        coordinator = Coordinator("127.0.0.1", 0, heartbeat_timeout=0.2, seed=7, seeds_per_lease=3).start()
+        try:
+            coordinator.publish(_state_dict(), 1)
+            reply, _ = coordinator.dispatch({"type": "work", "actor_id": "a"}, b"", ("127.0.0.1", 0))
+            self.assertEqual(reply["seeds"], [7, 8, 9])
+            time.sleep(0.3)
+            self.assertEqual(coordinator.alive(), 0)
+            reply, _ = coordinator.dispatch({"type": "work", "actor_id": "b"}, b"", ("127.0.0.1", 0))
+            self.assertEqual(reply["seeds"], [7, 8, 9])
+        finally:
+            coordinator.stop(timeout=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
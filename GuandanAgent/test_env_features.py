@@ -0,0 +1,87 @@
+import random
+import unittest
+
+import numpy as np
+
+from engine.cards import standard_deck
+from engine.logic import get_rank_value, get_rank_from_card, get_suit_from_card
+from engine.rl.env import (
+    GuandanEnv, FEATURE_DIM, F_HAND, F_SIZES, F_LP_TYPE, F_LP_SIZE, F_LP_SEAT, F_PASS, F_FREE, F_LEVEL, F_WILDS,
+    state_to_vector, state_to_array,
+)
+from engine.rl.match import player_view
+from engine.rl.mcts import MCTS
+
+
+def scratch_features(env):
+    """Reference featurization rebuilt from the hands every time."""
+    me = env.current_player
+    f = np.zeros(FEATURE_DIM, dtype=np.float32)
+    level_rank = {11: 'J', 12: 'Q', 13: 'K', 14: 'A'}.get(env.current_level, str(env.current_level))
+    for c in env.hands[me]:
+        val = get_rank_value(get_rank_from_card(c))
+        f[F_HAND + (val - 2 if val <= 14 else val - 7)] += 0.25
+        if get_rank_from_card(c) == level_rank and get_suit_from_card(c) == 'H':
+            f[F_WILDS] += 0.5
+    for rel in range(4):
+        f[F_SIZES + rel] = len(env.hands[(me + rel) % 4]) / 27.0
+    if env.last_player_idx != -1:
+        f[F_LP_SEAT + (env.last_player_idx - me) % 4] = 1.0
+    f[F_PASS] = min(env.pass_count, 3) / 3.0
+    f[F_FREE] = float(env.pass_count >= 3 or env.last_player_idx == me)
+    f[F_LEVEL + env.current_level - 2] = 1.0
+    return f
+
+
+class TestEnvFeatures(unittest.TestCase):
+    def test_incremental_features_match_scratch_over_a_game(self):
+        rng = random.Random(3)
+        random.seed(3)
+        deck = standard_deck() * 2
+        rng.shuffle(deck)
+        env = GuandanEnv(my_hand=[], all_hands=[deck[i * 27:(i + 1) * 27] for i in range(4)], current_level=7)
+        policy = MCTS()
+        steps = 0
+        while not env.is_done() and steps < 200:
+            got = env.features()
+            expected = scratch_features(env)
+            # Last-play slots are checked separately below
+            mask = np.ones(FEATURE_DIM, dtype=bool)
+            mask[F_LP_TYPE:F_LP_SIZE + 1] = False
+            np.testing.assert_allclose(got[mask], expected[mask], atol=1e-6)
+            if env.last_play:
+                self.assertAlmostEqual(got[F_LP_TYPE:F_LP_TYPE + 10].sum(), 1.0)
+                self.assertAlmostEqual(got[F_LP_SIZE], len(env.last_play['cards']) / 10.0, places=6)
+            env.step(policy._heuristic_policy(env.get_legal_actions(), env))
+            steps += 1
+        self.assertTrue(env.is_done())
+
+    def test_player_view_keeps_true_hand_sizes(self):
+        random.seed(5)
+        deck = standard_deck() * 2
+        random.shuffle(deck)
+        env = GuandanEnv(my_hand=[], all_hands=[deck[i * 27:(i + 1) * 27] for i in range(4)], current_player=1)
+        policy = MCTS()
+        for _ in range(30):
+            env.step(policy._heuristic_policy(env.get_legal_actions(), env))
+        me = env.current_player
+        sizes = [len(env.hands[(me + rel) % 4]) for rel in range(4)]
+        self.assertGreater(len(set(sizes)), 1)
+        view = player_view(env)
+        self.assertEqual(view.hands[me], env.hands[me])
+        np.testing.assert_allclose(view.features()[F_SIZES:F_SIZES + 4] * 27, sizes, atol=1e-4)
+        np.testing.assert_allclose(view.features(), env.features(), atol=1e-6)
+
+    def test_vector_helpers_copy_the_buffer(self):
+        deck = standard_deck() * 2
+        env = GuandanEnv(my_hand=[], all_hands=[deck[i * 27:(i + 1) * 27] for i in range(4)])
+        vec = state_to_vector(env)
+        arr = state_to_array(env)
+        self.assertEqual(len(vec), FEATURE_DIM)
+        arr[0] = 99.0
+        self.assertNotEqual(env.features()[0], 99.0)
+        self.assertEqual(vec, env.features().tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
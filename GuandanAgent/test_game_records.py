@@ -0,0 +1,67 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from engine.cards import standard_deck, card_id
+from engine.rl.env import GuandanEnv, state_to_array
+from engine.rl.mcts import MCTS
+from engine.rl.records import GameRecord, GameRecordLog, encode_record, decode_record, replay, final_state, featurize
+
+
+def heuristic_game(seed):
+    rng = random.Random(seed)
+    deck = standard_deck() * 2
+    rng.shuffle(deck)
+    hands = [deck[i * 27:(i + 1) * 27] for i in range(4)]
+    env = GuandanEnv(my_hand=[], all_hands=hands, current_player=rng.randint(0, 3), current_level=rng.randint(2, 14))
+    record = GameRecord.from_hands(hands, env.current_level, env.current_player, seed=seed)
+    policy = MCTS(model=None)
+    states = []
+    while not env.is_done() and len(record.moves) < 200:
+        states.append(state_to_array(env))
+        action = policy._heuristic_policy(env.get_legal_actions(), env)
+        record.add_move(action)
+        env.step(action)
+    winner = next(i for i in range(4) if not env.hands[i])
+    record.winner = 0 if winner in (0, 2) else 1
+    return record, env, states
+
+
+class TestGameRecords(unittest.TestCase):
+    def setUp(self):
+        self.record, self.env, self.states = heuristic_game(7)
+
+    def test_round_trip_and_replay(self):
+        data = encode_record(self.record)
+        self.assertLess(len(data), 1024)
+        decoded = decode_record(data)
+        self.assertEqual(decoded, self.record)
+
+        replayed = [state_to_array(env) for env, _ in replay(decoded)]
+        np.testing.assert_array_equal(np.array(replayed), np.array(self.states))
+        ids = lambda hands: [sorted(card_id(c) for c in h) for h in hands]
+        self.assertEqual(ids(final_state(decoded).hands), ids(self.env.hands))
+
+        samples = featurize(decoded)
+        self.assertEqual(len(samples), len(self.record.moves))
+        self.assertEqual({r for _, r in samples}, {1.0, -1.0})
+
+    def test_segmented_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = GameRecordLog(tmp, segment_bytes=1)  # one record per segment
+            for _ in range(3):
+                log.append(self.record)
+            log.close()
+            self.assertEqual(len(log.segments()), 3)
+
+            # A torn write at the tail is skipped, earlier records survive
+            with open(log.segments()[-1], "r+b") as f:
+                f.truncate(os.path.getsize(log.segments()[-1]) - 5)
+            self.assertEqual(len(list(GameRecordLog(tmp))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
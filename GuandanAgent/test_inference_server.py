@@ -0,0 +1,126 @@
+import threading
+import time
+import unittest
+
+from engine.rl.inference import BatchingInferenceServer
+
+
+class SumModel:
+    """CPU stand-in for the value network: value = sum of the vector."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_batch(self, vectors):
+        self.calls.append(len(vectors))
+        return [float(sum(v)) for v in vectors]
+
+
+class TestBatchingInferenceServer(unittest.TestCase):
+    def test_results_are_scattered_to_callers(self):
+        model = SumModel()
+        with BatchingInferenceServer(model, max_batch_size=8, max_wait_ms=20) as server:
+            futures = [server.submit([i, 1.0]) for i in range(20)]
+            values = [f.result(timeout=5) for f in futures]
+        self.assertEqual(values, [i + 1.0 for i in range(20)])
+
+    def test_concurrent_callers_share_batches(self):
+        model = SumModel()
+        results = {}
+        with BatchingInferenceServer(model, max_batch_size=16, max_wait_ms=50) as server:
+            def worker(i):
+                results[i] = server.predict([i])
+
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            stats = server.stats()
+
+        self.assertEqual(results, {i: float(i) for i in range(16)})
+        self.assertEqual(stats["requests"], 16)
+        self.assertLess(stats["batches"], 16)
+        self.assertEqual(sum(k * v for k, v in stats["batch_size_histogram"].items()), 16)
+        self.assertTrue(all(n <= 16 for n in model.calls))
+
+    def test_model_errors_propagate(self):
+        class Broken:
+            def predict_batch(self, vectors):
+                raise ValueError("boom")
+
+        with BatchingInferenceServer(Broken()) as server:
+            with self.assertRaises(ValueError):
+                server.predict([0.0])
+            self.assertEqual(server.stats()["errors"], 1)
+
+    def test_submit_requires_running_server(self):
+        server = BatchingInferenceServer(SumModel())
+        with self.assertRaises(RuntimeError):
+            server.submit([1.0])
+
+    def test_submit_racing_stop_never_hangs(self):
+        server = BatchingInferenceServer(SumModel()).start()
+        in_put = threading.Event()
+        real_put = server._queue.put
+
+        def slow_put(item, *args, **kwargs):
+            # Widen the window between the running check and the enqueue
+            if item is not None:
+                in_put.set()
+                time.sleep(0.1)
+            real_put(item, *args, **kwargs)
+
+        server._queue.put = slow_put
+        stopper = threading.Thread(target=lambda: (in_put.wait(), server.stop()))
+        stopper.start()
+        future = server.submit([1.0])
+        stopper.join()
+        # Served before the stop, or failed by its drain; never left pending
+        try:
+            self.assertEqual(future.result(timeout=2), 1.0)
+        except RuntimeError:
+            pass
+
+    def test_full_queue_does_not_block_stop(self):
+        entered, release = threading.Event(), threading.Event()
+
+        class Stuck:
+            def predict_batch(self, vectors):
+                entered.set()
+                release.wait(10)
+                return [0.0] * len(vectors)
+
+        server = BatchingInferenceServer(Stuck(), max_batch_size=1, max_queue_size=1).start()
+        first = server.submit([1.0])
+        entered.wait(5)
+        queued = server.submit([2.0])  # fills the queue
+        errors = []
+        blocked = threading.Thread(target=lambda: errors.append(self._submit_error(server)), daemon=True)
+        blocked.start()
+        time.sleep(0.05)
+        self.assertTrue(blocked.is_alive())  # waiting for room
+
+        stopper = threading.Thread(target=server.stop, kwargs={"timeout": 0.2}, daemon=True)
+        stopper.start()
+        stopper.join(3)
+        blocked.join(3)
+        release.set()
+        self.assertFalse(stopper.is_alive())
+        self.assertFalse(blocked.is_alive())
+        self.assertIsInstance(errors[0], RuntimeError)
+        with self.assertRaises(RuntimeError):
+            queued.result(timeout=2)
+        self.assertEqual(first.result(timeout=5), 0.0)
+
+    @staticmethod
+    def _submit_error(server):
+        try:
+            server.submit([3.0])
+        except RuntimeError as e:
+            return e
+        return None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import torch
+
+from engine.rl.model import ModelManager
+from engine.rl.replay import ReplayBuffer, PrioritizedReplayBuffer, BatchPrefetcher
+
+
+def filled(buffer_cls, n=64, **kwargs):
+    rng = np.random.default_rng(0)
+    buf = buffer_cls(n, **kwargs)
+    for _ in range(n):
+        buf.append(rng.random(120), float(rng.choice([-1.0, 1.0])))
+    return buf
+
+
+class TestMinibatchTraining(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.mgr = ModelManager(os.path.join(self.tmp.name, "model.pth"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_shuffled_epochs_cover_buffer(self):
+        buf = filled(ReplayBuffer, n=10)
+        seen = [idx for _, _, idx, _ in buf.iter_minibatches(5, 4, rng=np.random.default_rng(1))]
+        self.assertEqual(sorted(np.concatenate(seen[:2]).tolist()), list(range(10)))
+        self.assertEqual(sorted(np.concatenate(seen[2:]).tolist()), list(range(10)))
+
+    def test_prefetcher_reraises_producer_errors(self):
+        def batches():
+            yield 1
+            raise ValueError("boom")
+        with BatchPrefetcher(batches()) as it:
+            got = []
+            with self.assertRaises(ValueError):
+                for b in it:
+                    got.append(b)
+        self.assertEqual(got, [1])
+
+    def test_accumulation_and_throughput(self):
+        buf = filled(ReplayBuffer)
+        version = self.mgr.version
+        result = self.mgr.train_from_buffer(buf, batch_size=16, num_batches=5, accumulation_steps=2)
+        self.assertEqual((result["batches"], result["samples"], result["optimizer_steps"]), (5, 80, 3))
+        self.assertGreater(result["samples_per_sec"], 0)
+        self.assertEqual(self.mgr.version, version + 1)
+
+    def test_no_optimizer_step_keeps_version(self):
+        buf = filled(ReplayBuffer)
+        version = self.mgr.version
+        result = self.mgr.train_from_buffer(buf, batch_size=16, num_batches=0)
+        self.assertEqual((result["batches"], result["optimizer_steps"]), (0, 0))
+        self.assertEqual(self.mgr.version, version)
+
+    def test_prioritized_buffer_gets_new_priorities(self):
+        buf = filled(PrioritizedReplayBuffer)
+        self.mgr.train_from_buffer(buf, batch_size=32, num_batches=3)
+        self.assertFalse(np.allclose(buf.tree.get(np.arange(len(buf))), 1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
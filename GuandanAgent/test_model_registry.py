@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from engine.rl.registry import ModelRegistry, HotSwapModel
+
+
+def state_dict(scale):
+    return {
+        "fc1.weight": np.full((128, 120), scale, dtype=np.float32), "fc1.bias": np.zeros(128, dtype=np.float32),
+        "fc2.weight": np.full((128, 128), scale, dtype=np.float32), "fc2.bias": np.zeros(128, dtype=np.float32),
+        "fc3.weight": np.full((1, 128), scale, dtype=np.float32), "fc3.bias": np.zeros(1, dtype=np.float32),
+    }
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(os.path.join(self.tmp.name, "models"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_publish_creates_numbered_immutable_versions(self):
+        self.assertIsNone(self.registry.current_version())
+        v1 = self.registry.publish(state_dict(0.01), {"games_played": 20})
+        v2 = self.registry.publish(state_dict(0.02))
+        self.assertEqual((v1, v2), (1, 2))
+        self.assertEqual(self.registry.current_version(), 2)
+        self.assertTrue(os.path.exists(self.registry.npz_path(1)))
+        self.assertEqual(self.registry.read_manifest()["versions"][0]["metadata"], {"games_played": 20})
+
+        self.registry.set_current(1)
+        self.assertEqual(self.registry.load_numpy().version, 1)
+
+    def test_hot_swap_keeps_old_snapshot(self):
+        self.registry.publish(state_dict(0.01))
+        model = HotSwapModel(self.registry)
+        pinned = model.snapshot()
+        old_value = pinned.predict([1.0] * 120)
+
+        self.registry.publish(state_dict(-0.01))
+        self.assertTrue(model.refresh())
+        self.assertEqual(model.version, 2)
+        self.assertEqual(pinned.version, 1)
+        self.assertEqual(pinned.predict([1.0] * 120), old_value)
+        self.assertLess(model.predict([1.0] * 120), 0.5)
+        self.assertFalse(model.refresh())
+
+    def test_prune_keeps_current(self):
+        for i in range(5):
+            self.registry.publish(state_dict(0.01 * (i + 1)))
+        self.registry.set_current(1)
+        removed = self.registry.prune(keep=2)
+        self.assertEqual(removed, [2, 3, 4])
+        self.assertEqual(self.registry.versions(), [1, 5])
+        self.assertFalse(os.path.exists(self.registry.npz_path(2)))
+
+    def test_prune_spares_protected_versions(self):
+        for i in range(6):
+            self.registry.publish(state_dict(0.01 * (i + 1)))
+        # e.g. versions still held by the shared memory opponent pool
+        removed = self.registry.prune(keep=3, protect=[1, 2])
+        self.assertEqual(removed, [3, 4, 5])
+        self.assertEqual(self.registry.versions(), [1, 2, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()
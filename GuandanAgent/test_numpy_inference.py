@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import torch
+
+from engine.rl.model import ModelManager, GuandanValueNet
+from engine.rl.numpy_net import NumpyValueNet, save_npz
+
+
+class TestNumpyInference(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.net = GuandanValueNet().eval()
+        self.x = np.random.RandomState(0).rand(32, 120).astype(np.float32)
+
+    def test_matches_torch_forward(self):
+        np_net = NumpyValueNet(self.net.state_dict())
+        with torch.no_grad():
+            expected = self.net(torch.from_numpy(self.x)).numpy()[:, 0]
+        got = np.array(np_net.predict_batch(self.x))
+        np.testing.assert_allclose(got, expected, atol=1e-6)
+        self.assertAlmostEqual(np_net.predict(self.x[0]), float(expected[0]), places=6)
+
+    def test_npz_round_trip_and_inference_manager(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = os.path.join(tmp, "model.pth")
+            torch.save(self.net.state_dict(), model_path)
+            save_npz(self.net.state_dict(), os.path.join(tmp, "model.npz"))
+
+            mgr = ModelManager(model_path, training=False)
+            self.assertIsNone(mgr.optimizer)
+            with torch.no_grad():
+                expected = self.net(torch.from_numpy(self.x)).numpy()[:, 0]
+            np.testing.assert_allclose(mgr.predict_batch(self.x), expected, atol=1e-6)
+            with self.assertRaises(RuntimeError):
+                mgr.train(self.x.tolist(), [1.0] * len(self.x))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import timeit
+import unittest
+
+import numpy as np
+
+from engine.rl.model import ModelManager
+from engine.rl.numpy_net import NumpyValueNet, save_npz, npz_path_for
+from engine.rl.quantize import (
+    QuantizedValueNet, calibrate, accuracy_report, quantize_weight_int8, quantized_path_for
+)
+from engine.rl.registry import ModelRegistry, HotSwapModel
+
+
+def random_value_net(seed=0):
+    rng = np.random.RandomState(seed)
+    return NumpyValueNet({
+        "fc1.weight": rng.randn(128, 120) * 0.1, "fc1.bias": rng.randn(128) * 0.01,
+        "fc2.weight": rng.randn(128, 128) * 0.1, "fc2.bias": rng.randn(128) * 0.01,
+        "fc3.weight": rng.randn(1, 128) * 0.1, "fc3.bias": rng.randn(1) * 0.01,
+    })
+
+
+class TestQuantize(unittest.TestCase):
+    def setUp(self):
+        self.net = random_value_net()
+        self.samples = np.random.RandomState(1).rand(256, 120).astype(np.float32)
+
+    def test_int8_is_per_channel(self):
+        w = np.array([[1.0, -0.5], [0.01, 0.02]], dtype=np.float32)
+        q, scale = quantize_weight_int8(w)
+        self.assertEqual(q.dtype, np.int8)
+        self.assertEqual(q[0].tolist(), [127, -64])
+        self.assertEqual(q[1, 1], 127)  # small row keeps full resolution
+        np.testing.assert_allclose(q * scale[:, None], w, atol=scale.max())
+
+    def test_calibrated_int8_stays_close_to_float(self):
+        qnet = calibrate(self.net, self.samples, mode="int8", quantized_cls=QuantizedValueNet)
+        report = accuracy_report(self.net, qnet, self.samples)
+        self.assertLess(report["max_abs_error"], 0.05)
+        self.assertGreater(report["compression_ratio"], 3.5)
+        self.assertEqual(len(qnet.clip_percentiles), 3)
+
+    def test_float16_save_and_load(self):
+        qnet = QuantizedValueNet.from_value_net(self.net, mode="float16")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "q.npz")
+            qnet.save(path)
+            loaded = QuantizedValueNet.load(path)
+        self.assertEqual(loaded.mode, "float16")
+        np.testing.assert_allclose(loaded.predict_batch(self.samples), qnet.predict_batch(self.samples))
+        np.testing.assert_allclose(loaded.predict_batch(self.samples), self.net.predict_batch(self.samples), atol=2e-3)
+
+    def test_forward_costs_no_more_than_float(self):
+        qnet = QuantizedValueNet.from_value_net(self.net, mode="int8")
+        single, batch = self.samples[0], self.samples[:64]
+
+        def best_of(fn, repeats=5, number=200):
+            return min(timeit.repeat(fn, repeat=repeats, number=number))
+
+        # Weights are dequantized at load: no per-call upcast of the matrices
+        for x in (single, batch):
+            self.assertLess(best_of(lambda: qnet.forward(x)), 1.5 * best_of(lambda: self.net.forward(x)))
+
+    def test_serving_paths_load_quantized_weights(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = os.path.join(tmp, "model_v1.pth")
+            save_npz(self.net.state_dict(), npz_path_for(model_path))
+            manager = ModelManager(model_path, training=False, quantized="int8")
+            self.assertIsInstance(manager.numpy_model, QuantizedValueNet)
+
+            # A calibrated quantize_model.py export takes precedence
+            calibrated = calibrate(self.net, self.samples, mode="float16", quantized_cls=QuantizedValueNet)
+            calibrated.save(quantized_path_for(model_path, "float16"))
+            manager = ModelManager(model_path, training=False, quantized="float16")
+            self.assertEqual(manager.numpy_model.mode, "float16")
+
+            registry = ModelRegistry(os.path.join(tmp, "registry"))
+            version = registry.publish(self.net.state_dict())
+            served = HotSwapModel(registry, quantized="int8")
+            self.assertIsInstance(served.snapshot(), QuantizedValueNet)
+            self.assertEqual(served.version, version)
+        np.testing.assert_allclose(served.predict_batch(self.samples), self.net.predict_batch(self.samples), atol=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from engine.rl.replay import ReplayBuffer, PrioritizedReplayBuffer, SumTree
+
+
+def vec(i, dim=8):
+    v = np.zeros(dim, dtype=np.float32)
+    v[i % dim] = 0.25 * (1 + i // dim)
+    return v
+
+
+class TestReplayBuffer(unittest.TestCase):
+    def test_ring_overwrites_oldest(self):
+        buf = ReplayBuffer(4, feature_dim=8)
+        for i in range(6):
+            buf.append(vec(i), float(i))
+        self.assertEqual(len(buf), 4)
+        _, rewards = buf.get(buf.latest(4))
+        self.assertEqual(rewards.tolist(), [2.0, 3.0, 4.0, 5.0])
+
+        states, rewards, idx, weights = buf.sample(16, rng=np.random.default_rng(0))
+        self.assertEqual(states.shape, (16, 8))
+        self.assertEqual(states.dtype, np.float32)
+        self.assertTrue(set(rewards.tolist()) <= {2.0, 3.0, 4.0, 5.0})
+        self.assertTrue(np.all(weights == 1.0))
+
+    def test_memmap_survives_reopen_and_shares_readonly(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "buf")
+            buf = ReplayBuffer(10, feature_dim=8, path=path, dtype="uint8")
+            buf.extend([(vec(i), 1.0) for i in range(3)])
+            buf.flush()
+
+            reader = ReplayBuffer.open_readonly(path)
+            self.assertEqual(len(reader), 3)
+            np.testing.assert_array_equal(reader.get([2])[0][0], vec(2))
+            with self.assertRaises(RuntimeError):
+                reader.append(vec(0), 0.0)
+
+            buf.append(vec(3), -1.0)
+            buf.flush()
+            reader.refresh()
+            self.assertEqual(len(reader), 4)
+            del buf, reader
+
+            reopened = ReplayBuffer(999, path=path)  # on-disk layout wins
+            self.assertEqual((reopened.capacity, reopened.dtype, len(reopened)), (10, "uint8", 4))
+            self.assertEqual(reopened.get([3])[1].tolist(), [-1.0])
+
+    def test_dedup_by_state_hash(self):
+        buf = ReplayBuffer(3, feature_dim=8, dedup=True)
+        self.assertTrue(buf.append(vec(0), 1.0))
+        self.assertFalse(buf.append(vec(0), -1.0))
+        buf.extend([(vec(1), 1.0), (vec(2), 1.0), (vec(3), 1.0)])  # vec(0) is overwritten
+        self.assertTrue(buf.append(vec(0), 1.0))
+
+
+class TestPrioritizedReplay(unittest.TestCase):
+    def test_sum_tree(self):
+        tree = SumTree(5)
+        tree.update([0, 1, 2, 3, 4], [1.0, 2.0, 3.0, 0.0, 4.0])
+        self.assertEqual(tree.total, 10.0)
+        self.assertEqual(tree.find([0.5, 1.5, 3.0, 5.99, 6.0, 9.99]).tolist(), [0, 1, 2, 2, 4, 4])
+        tree.update([2, 2], [0.5, 0.5])
+        self.assertEqual(tree.total, 7.5)
+
+    def test_sampling_follows_priorities(self):
+        buf = PrioritizedReplayBuffer(4, feature_dim=8, alpha=1.0, beta=1.0, eps=0.0)
+        for i in range(4):
+            buf.append(vec(i), 0.0)
+        buf.update_priorities([0, 1, 2, 3], [0.1, 0.1, 0.1, 9.7])
+
+        rng = np.random.default_rng(0)
+        _, _, idx, weights = buf.sample(1000, rng=rng)
+        self.assertAlmostEqual(np.mean(idx == 3), 0.97, delta=0.02)
+        # Rare samples get the largest correction; weights are max-normalized
+        self.assertEqual(weights.max(), 1.0)
+        self.assertGreater(weights[idx == 0].min(), weights[idx == 3].max())
+
+        # New samples enter at the max priority seen so far
+        buf.append(vec(4), 0.0)
+        self.assertAlmostEqual(buf.tree.get([0])[0], 9.7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import random
+import unittest
+
+from engine.rl.env import GuandanEnv
+from engine.rl.match import deal
+from engine.rl.selfplay import ResignConfig, ResignMonitor, hand_strength_margin
+
+
+class ConstantModel:
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, state_vector):
+        return self.value
+
+
+def _env(seed=3):
+    hands, start_player, level = deal(seed)
+    return GuandanEnv(my_hand=[], all_hands=hands, current_player=start_player, current_level=level)
+
+
+class TestResignation(unittest.TestCase):
+    def test_resigns_after_consecutive_decisive_moves(self):
+        env = _env()
+        config = ResignConfig(threshold=0.8, consecutive=3, min_steps=2, playout_fraction=0.0)
+        monitor = ResignMonitor(config, ConstantModel(0.95))
+        # Mover in team 1 sees +0.95 -> team 0 is losing
+        stops = [monitor.update(env, None, 1, step) for step in range(5)]
+        self.assertEqual(stops, [False, False, True, False, False])
+        self.assertEqual(monitor.resign_winner, 1)
+        self.assertEqual(monitor.resign_step, 2)
+
+    def test_streak_resets_on_sign_change_and_playout_continues(self):
+        env = _env()
+        config = ResignConfig(threshold=0.5, consecutive=2, min_steps=0, playout_fraction=1.0)
+        monitor = ResignMonitor(config, ConstantModel(0.9), random.Random(0))
+        self.assertTrue(monitor.playout)
+        self.assertFalse(monitor.update(env, None, 0, 0))
+        self.assertFalse(monitor.update(env, None, 1, 1))  # opposite sign: streak restarts
+        self.assertEqual(monitor.streak, 1)
+        self.assertFalse(monitor.update(env, None, 3, 2))  # would resign, but this game is played out
+        self.assertEqual(monitor.resign_winner, 1)
+
+    def test_adjudication_by_hand_strength(self):
+        env = _env()
+        env.hands[1] = env.hands[1][:5]
+        self.assertGreater(0, hand_strength_margin(env))
+        monitor = ResignMonitor(ResignConfig(signal="strength"))
+        self.assertEqual(monitor.adjudicate(env), 1)
+        self.assertEqual(ResignMonitor(ResignConfig(signal="strength", adjudicate=False)).adjudicate(env), -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import unittest
+from types import SimpleNamespace
+
+from engine.rl.budget import SimulationBudget, move_difficulty, time_limit_ms
+from engine.rl.env import GuandanEnv
+from engine.rl.match import deal
+from engine.rl.mcts import MCTS, MCTSNode
+
+
+def _env(seed=4):
+    hands, start_player, level = deal(seed)
+    return GuandanEnv(my_hand=[], all_hands=hands, current_player=start_player, current_level=level)
+
+
+class TestSearchBudget(unittest.TestCase):
+    def test_single_move_is_free(self):
+        env = _env()
+        self.assertEqual(move_difficulty(env, 1), 0.0)
+        self.assertEqual(time_limit_ms(env, 1), 0.0)
+        budget = SimulationBudget()
+        self.assertEqual(budget.allocate(env, 1), 0)
+        self.assertEqual(budget.stats()["auto_moves"], 1)
+
+    def test_serving_time_never_exceeds_two_seconds(self):
+        env = _env()
+        env.hands[env.current_player] = env.hands[env.current_player][:5]
+        self.assertEqual(time_limit_ms(env, 200), 2000.0)
+        self.assertGreater(time_limit_ms(env, 200, max_ms=4000.0), 2000.0)
+        self.assertLess(time_limit_ms(_env(), 3), 2000.0)
+
+    def test_scales_with_choices_and_phase(self):
+        env = _env()
+        budget = SimulationBudget(base=50, min_sims=8, max_sims=200)
+        few, many = budget.allocate(env, 3), budget.allocate(env, 60)
+        self.assertLess(few, many)
+        # Full 27-card hands: opening discount
+        self.assertLess(many, 50 * 2)
+        env.hands[env.current_player] = env.hands[env.current_player][:5]
+        self.assertGreater(budget.allocate(env, 60), many)
+
+    def test_game_budget_caps_total(self):
+        env = _env()
+        budget = SimulationBudget(base=50, min_sims=4, game_budget=100)
+        team = env.current_player % 2
+        first = budget.allocate(env, 40)
+        self.assertLessEqual(first, 2 * 100 // 11)
+        budget.spend(team, 100)
+        self.assertEqual(budget.remaining(team), 0)
+        self.assertEqual(budget.allocate(env, 40), 0)
+        self.assertEqual(budget.remaining(1 - team), 100)
+
+    def test_min_sims_floor_never_overdraws_budget(self):
+        env = _env()
+        budget = SimulationBudget(base=50, min_sims=8, game_budget=30)
+        team = env.current_player % 2
+        for _ in range(20):
+            budget.spend(team, budget.allocate(env, 40))
+        self.assertEqual(budget.used[team], 30)
+        self.assertLessEqual(budget.stats()["simulations"], budget.game_budget)
+
+    def test_decided_root(self):
+        root = MCTSNode(_env())
+        root.untried_actions = []
+        root.children = {"a": SimpleNamespace(visits=30), "b": SimpleNamespace(visits=10)}
+        self.assertTrue(MCTS._decided(root, 19))
+        self.assertFalse(MCTS._decided(root, 20))
+        root.untried_actions = [None]
+        self.assertFalse(MCTS._decided(root, 0))
+
+    def test_search_stops_early(self):
+        env = _env()
+        env.hands[env.current_player] = env.hands[env.current_player][:1]
+        with contextlib.redirect_stdout(io.StringIO()):
+            action = MCTS(model=None).search(env, num_simulations=50, min_simulations=4)
+        # One card: one legal move once bombs are pruned, decided right away
+        self.assertEqual(action["iterations"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from engine.rl.actors import SelfPlayFleet
+from engine.rl.registry import ModelRegistry
+
+
+def state_dict(seed=0):
+    rng = np.random.default_rng(seed)
+    shapes = {"fc1.weight": (128, 120), "fc1.bias": (128,), "fc2.weight": (128, 128), "fc2.bias": (128,),
+              "fc3.weight": (1, 128), "fc3.bias": (1,)}
+    return {k: (rng.standard_normal(s) * 0.05).astype(np.float32) for k, s in shapes.items()}
+
+
+class TestSelfPlayFleet(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(os.path.join(self.tmp.name, "models"))
+        self.registry.publish(state_dict())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_workers_feed_learner_and_stop_cleanly(self):
+        fleet = SelfPlayFleet(2, self.registry.root_dir, opponent_type='heuristic', queue_size=1, seed=7,
+                              search_budget={"base": 2, "min_sims": 1, "max_sims": 2})
+        fleet.start()
+        processes = list(fleet.processes)
+        try:
+            games = [fleet.get(timeout=120) for _ in range(2)]
+            # Nobody consumes now: the queue fills (size 1) and the workers block on put
+            time.sleep(2)
+            self.assertEqual(fleet.alive(), 2)
+        finally:
+            fleet.stop(timeout=30)
+
+        for game in games:
+            self.assertIsNotNone(game)
+            worker_id, winner, samples, version, record, info = game
+            self.assertIn(worker_id, (0, 1))
+            self.assertEqual(version, 1)
+            self.assertTrue(samples)
+            self.assertEqual(len(samples[0][0]), 120)
+        # Workers left through the stop event (drained, joined), not terminate()
+        self.assertEqual([p.exitcode for p in processes], [0, 0])
+        self.assertEqual(fleet.processes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import multiprocessing as mp
+import unittest
+
+import numpy as np
+
+from engine.rl.numpy_net import NumpyValueNet
+from engine.rl.shared_weights import SharedWeightStore, SharedModel
+
+
+def _state_dict(seed):
+    rng = np.random.default_rng(seed)
+    sizes = [(128, 120), (64, 128), (1, 64)]
+    sd = {}
+    for name, (out_dim, in_dim) in zip(["fc1", "fc2", "fc3"], sizes):
+        sd[f"{name}.weight"] = rng.standard_normal((out_dim, in_dim)).astype(np.float32) * 0.1
+        sd[f"{name}.bias"] = rng.standard_normal(out_dim).astype(np.float32) * 0.1
+    return sd
+
+
+def _worker_predict(spec, x, out):
+    model = SharedModel(SharedWeightStore.attach(spec))
+    out.put((model.version, model.predict_batch(x)))
+
+
+class TestSharedWeights(unittest.TestCase):
+    def setUp(self):
+        self.store = SharedWeightStore.create(_state_dict(0), slots=3)
+        self.x = np.random.default_rng(1).random((4, 120)).astype(np.float32)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_zero_copy_and_version_pickup(self):
+        self.store.publish(_state_dict(0), 1)
+        reader = SharedModel(SharedWeightStore.attach(self.store.spec()))
+        self.assertEqual(reader.version, 1)
+        for w_t, b, _ in reader.snapshot().layers:
+            self.assertTrue(np.shares_memory(w_t, reader.store._data))
+            self.assertTrue(np.shares_memory(b, reader.store._data))
+        np.testing.assert_allclose(reader.predict_batch(self.x), NumpyValueNet(_state_dict(0)).predict_batch(self.x),
+                                   rtol=1e-5)
+
+        self.assertFalse(reader.refresh())
+        self.store.publish(_state_dict(1), 2)
+        self.assertTrue(reader.refresh())
+        self.assertEqual(reader.version, 2)
+        np.testing.assert_allclose(reader.predict_batch(self.x), NumpyValueNet(_state_dict(1)).predict_batch(self.x),
+                                   rtol=1e-5)
+        reader.store.close()
+
+    def test_snapshot_pool_ring(self):
+        reader = SharedModel(SharedWeightStore.attach(self.store.spec()))
+        self.assertIsNone(reader.version)
+        for v in range(1, 5):
+            self.store.publish(_state_dict(v), v)
+        self.assertEqual(self.store.versions(), [2, 3, 4])
+        reader.refresh()
+        old = reader.opponent()
+        self.assertIn(old.version, (2, 3))
+        held = reader.snapshot()
+        # Two more versions wrap the ring over the slot `held` maps
+        self.store.publish(_state_dict(5), 5)
+        self.store.publish(_state_dict(6), 6)
+        self.store.publish(_state_dict(7), 7)
+        self.assertFalse(reader.valid(held))
+        reader.store.close()
+
+    def test_worker_process_reads_published_weights(self):
+        self.store.publish(_state_dict(3), 9)
+        ctx = mp.get_context("spawn")
+        out = ctx.Queue()
+        p = ctx.Process(target=_worker_predict, args=(self.store.spec(), self.x, out))
+        p.start()
+        version, values = out.get(timeout=60)
+        p.join(10)
+        self.assertEqual(version, 9)
+        np.testing.assert_allclose(values, NumpyValueNet(_state_dict(3)).predict_batch(self.x), rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
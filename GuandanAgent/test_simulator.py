@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from engine.rl.records import GameRecordLog
+from engine.rl.simulator import run_simulation, SimulationWriter, read_outcomes, summarize
+
+
+class TestSimulator(unittest.TestCase):
+    def test_mirrored_games_with_records_and_samples(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = SimulationWriter(tmp)
+            for chunk in run_simulation(3, "heuristic", "simple", seed=5, chunk_size=2, records=True, samples=True):
+                writer.write(chunk)
+            writer.close()
+
+            outcomes = read_outcomes(os.path.join(tmp, "outcomes.bin"))
+            self.assertEqual(len(outcomes), 6)
+            self.assertEqual(sorted(zip(outcomes["seed"].tolist(), outcomes["swapped"].tolist())),
+                             [(s, w) for s in (5, 6, 7) for w in (0, 1)])
+            self.assertTrue(np.all(outcomes["winner"] >= 0))
+            self.assertEqual(summarize(outcomes)["games"], 6)
+
+            records = list(GameRecordLog(os.path.join(tmp, "games")))
+            self.assertEqual([len(r.moves) for r in records], outcomes["steps"].tolist())
+
+            shards = [np.load(os.path.join(tmp, n)) for n in sorted(os.listdir(tmp)) if n.startswith("samples_")]
+            self.assertEqual(sum(len(s["moves"]) for s in shards), int(outcomes["steps"].sum()))
+            self.assertEqual(shards[0]["states"].shape[1], 120)
+
+
+if __name__ == '__main__':
+    unittest.main()
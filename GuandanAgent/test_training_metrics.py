@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from engine.rl.metrics import DownsampledSeries, MetricsLog, MetricsReader
+
+
+class TestTrainingMetrics(unittest.TestCase):
+    def test_downsampled_series_is_bounded(self):
+        series = DownsampledSeries(points_per_level=20, factor=10, levels=3)
+        for game in range(1, 2001):
+            series.add(game, float(game % 2))
+        points = series.points()
+        self.assertLessEqual(len(points), 60)
+        games = [g for g, _ in points]
+        self.assertEqual(games, sorted(games))
+        self.assertEqual(games[-20:], list(range(1981, 2001)))  # recent points at full resolution
+        self.assertLessEqual(games[0], 200)  # old history kept, coarsely
+        self.assertTrue(all(abs(v - 0.5) < 1e-9 for g, v in points if g < 1981))
+
+    def test_reader_follows_log_incrementally(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.jsonl")
+            log = MetricsLog(path)
+            reader = MetricsReader(path)
+            for game in range(1, 4):
+                log.append({"game": game, "win": game % 2, "win_rate": 0.5})
+            snap = reader.snapshot()
+            self.assertEqual((snap["games_played"], snap["history"]), (3, [1, 0, 1]))
+            self.assertIs(reader.snapshot(), snap)  # nothing new: cached
+
+            with open(path, "a") as f:
+                f.write('{"game": 4, "win"')  # torn line is not applied yet
+            self.assertEqual(reader.snapshot()["games_played"], 3)
+
+            log.truncate(os.path.getsize(path) - len('{"game": 4, "win"'))
+            log.append({"event": "train", "game": 3, "loss": 0.25})
+            log.append({"game": 4, "win": 0, "win_rate": 0.5})
+            snap = reader.snapshot()
+            self.assertEqual((snap["games_played"], snap["last_train"]["loss"]), (4, 0.25))
+
+            log.truncate(0)  # rewritten from scratch (e.g. resume)
+            log.append({"game": 1, "win": 1, "win_rate": 1.0})
+            self.assertEqual(reader.snapshot()["history"], [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
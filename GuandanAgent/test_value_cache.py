@@ -0,0 +1,95 @@
+import random
+import unittest
+
+from engine.cards import standard_deck
+from engine.rl.env import GuandanEnv
+from engine.rl.value_cache import ValueCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.version = 1
+        self.calls = 0
+
+    def predict(self, vec):
+        self.calls += 1
+        return sum(vec) * 0.01
+
+    def predict_batch(self, vecs):
+        return [self.predict(v) for v in vecs]
+
+
+def dealt_env(seed=0):
+    rng = random.Random(seed)
+    deck = standard_deck() * 2
+    rng.shuffle(deck)
+    return GuandanEnv(my_hand=[], all_hands=[deck[i * 27:(i + 1) * 27] for i in range(4)])
+
+
+class TestValueCache(unittest.TestCase):
+    def test_repeated_vectors_hit(self):
+        model = CountingModel()
+        cache = ValueCache(model, capacity=2)
+        self.assertEqual(cache.predict([1.0, 2.0]), cache.predict([1.0, 2.0]))
+        cache.predict_batch([[1.0, 2.0], [3.0]])
+        self.assertEqual(model.calls, 2)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+        cache.predict([4.0])  # evicts the least recently used entry
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_version_change_invalidates(self):
+        model = CountingModel()
+        cache = ValueCache(model)
+        cache.predict([1.0])
+        model.version = 2
+        cache.predict([1.0])
+        self.assertEqual(model.calls, 2)
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_pinned_old_version_does_not_wipe_current(self):
+        class VersionedModel:
+            def __init__(self, version):
+                self.version = version
+                self.calls = 0
+
+            def predict(self, vec):
+                self.calls += 1
+                return sum(vec) + self.version
+
+        old, new = VersionedModel(1), VersionedModel(2)
+        cache = ValueCache(old)
+        pinned_old = cache.snapshot()
+        cache.model = new  # publish while a search is still pinned to version 1
+        pinned_new = cache.snapshot()
+        for _ in range(3):
+            for vec in ([1.0], [2.0]):
+                self.assertEqual(pinned_old.predict(vec), sum(vec) + 1)
+                self.assertEqual(pinned_new.predict(vec), sum(vec) + 2)
+                self.assertEqual(cache.predict(vec), sum(vec) + 2)
+        self.assertEqual((old.calls, new.calls), (2, 2))
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_state_key_tracks_steps(self):
+        env = dealt_env()
+        same = env.clone()
+        self.assertEqual(env.state_key(), same.state_key())
+
+        action = next(a for a in env.get_legal_actions() if a['action'] == 'play')
+        env.step(action)
+        self.assertNotEqual(env.state_key(), same.state_key())
+
+        # Rebuilding the same position from scratch gives the same key
+        rebuilt = GuandanEnv(my_hand=[], all_hands=env.hands, current_player=env.current_player,
+                             last_play=env.last_play, current_level=env.current_level)
+        self.assertEqual(rebuilt.state_key(), env.state_key())
+
+        model = CountingModel()
+        cache = ValueCache(model)
+        cache.predict_state(env)
+        cache.predict_state(rebuilt)
+        self.assertEqual(model.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+import numpy as np
+
+from engine.rl.env import GuandanEnv
+from engine.rl.match import deal
+from engine.rl.vec_env import VectorGuandanEnv, greedy_actions
+
+
+def _scalar_env(seed):
+    hands, start_player, level = deal(seed)
+    return GuandanEnv(my_hand=[], all_hands=hands, current_player=start_player, current_level=level)
+
+
+class TestVectorEnv(unittest.TestCase):
+    def test_matches_scalar_env(self):
+        vec = VectorGuandanEnv(4, seed=10)
+        envs = [_scalar_env(10 + i) for i in range(4)]
+        rng = random.Random(0)
+        finished = 0
+        for _ in range(400):
+            np.testing.assert_allclose(vec.features(), np.stack([e.features() for e in envs]))
+            legal, mask = vec.legal_actions()
+            for i, e in enumerate(envs):
+                self.assertEqual(len(legal[i]), len(e.get_legal_actions()))
+                self.assertEqual(int(mask[i].sum()), len(legal[i]))
+            choice = [rng.randrange(len(m)) for m in legal]
+            rewards, dones, infos = vec.step(choice)
+            for i, e in enumerate(envs):
+                _, reward, done, _ = e.step(legal[i][choice[i]])
+                self.assertEqual(bool(dones[i]), done)
+                if done:
+                    self.assertEqual(rewards[i], reward)
+                    self.assertEqual(infos[i]["winner"], 0 if reward > 0 else 1)
+                    envs[i] = _scalar_env(int(vec.seeds[i]))
+                    finished += 1
+        self.assertGreater(finished, 0)
+
+    def test_afterstates_and_greedy(self):
+        vec = VectorGuandanEnv(3, seed=1)
+        feats, mask, legal = vec.afterstate_features()
+        self.assertEqual(feats.shape[:2], mask.shape)
+        # Leading: the first move played from game 0's position, seen from the mover's seat
+        env = vec.env_at(0)
+        me = env.current_player
+        env.step(legal[0][0])
+        env.current_player = me
+        env._features_player = None
+        np.testing.assert_allclose(feats[0, 0], env.features())
+        values = np.random.default_rng(0).random(mask.shape)
+        choice = greedy_actions(values, mask)
+        self.assertTrue(all(mask[i, c] for i, c in enumerate(choice)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,214 +7,175 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import time
 import json
 import random
+import signal
 import torch
 import numpy as np
 import argparse
 from typing import List, Tuple, Any
-from GuandanAgent.engine.rl.env import GuandanEnv, state_to_vector
-from GuandanAgent.engine.rl.mcts import MCTS
 from GuandanAgent.engine.rl.model import ModelManager
-from GuandanAgent.engine.cards import standard_deck
-from GuandanAgent.engine.logic import get_rank_value
-
-def self_play_game(model_manager, opponent_type='mcts') -> Tuple[int, List[Tuple[List[float], float]]]:
-    # 1. Deal Cards
-    full_deck = standard_deck() * 2
-    random.shuffle(full_deck)
-    # 27 cards per player
-    hands = [
-        full_deck[:27],
-        full_deck[27:54],
-        full_deck[54:81],
-        full_deck[81:]
-    ]
-    
-    # 2. Initialize God View Environment
-    # Random start player
-    start_player = random.randint(0, 3)
-    # Random Level (2-14) to train with different wild cards
-    current_level = random.randint(2, 14)
-    env = GuandanEnv(my_hand=[], all_hands=hands, current_player=start_player, current_level=current_level)
-    
-    # 3. Game Loop
-    # Agent Config:
-    # Team 0 (Player 0, 2): MCTS with Model (The "Learner")
-    # Team 1 (Player 1, 3): Opponent (Heuristic or MCTS)
-    
-    learner_mcts = MCTS(model=model_manager)
-    
-    if opponent_type == 'heuristic':
-        # Pure Heuristic (No MCTS Search, just policy)
-        opponent_mcts = MCTS(model=None) 
-    else: # mcts or self_play
-        # Opponent uses MCTS too
-        # If 'self_play', it shares the same model? 
-        # Yes, AlphaGo Zero self-play uses same model for both sides.
-        opponent_mcts = MCTS(model=model_manager)
-
-    steps = 0
-    max_steps = 200 # Safety break
-    
-    # Data Collection
-    game_data = [] # List of (state_vector, value_target) tuples (simplification)
-    
-    while not env.is_done() and steps < max_steps:
-        steps += 1
-        current_p = env.current_player
-        
-        legal_moves = env.get_legal_actions()
-        if not legal_moves:
-            break
-            
-        action = None
-        
-        # Create Player View Env (PARTIAL OBSERVABILITY)
-        player_view_env = GuandanEnv(
-            my_hand=env.hands[current_p],
-            last_play=env.last_play,
-            current_player=current_p,
-            pass_count=env.pass_count,
-            current_level=current_level
-        )
-
-        # Select Agent based on Team
-        if current_p in [0, 2]: # Team 0 (Learner)
-            sims = 50 
-            mcts_action_info = learner_mcts.search(player_view_env, num_simulations=sims)
-            action = mcts_action_info
-            
-            # Collect Data only for Learner?
-            # AlphaGo collects for ALL moves in self-play.
-            # But if opponent is Heuristic, maybe we shouldn't learn from Heuristic's moves?
-            # Actually, we learn from the *Outcome* of the state.
-            # If Heuristic made a move, and Lost, we learn that state was Bad.
-            # So yes, collect all data.
-            vec = state_to_vector(player_view_env)
-            game_data.append((current_p, vec))
-            
-        else: # Team 1 (Opponent)
-            if opponent_type == 'heuristic':
-                # Direct Heuristic Policy (Fast, no Search)
-                # We need access to _heuristic_policy. 
-                # MCTS class has it.
-                lm = player_view_env.get_legal_actions()
-                # Mock state object required by _heuristic_policy
-                # Or just use MCTS with 1 simulation? 
-                # MCTS with 0 simulations runs rollout policy (heuristic).
-                # But search() forces at least 1.
-                # Let's call _heuristic_policy directly.
-                class MockState:
-                    def __init__(self, lp, cl, cp, lpi):
-                        self.last_play = lp
-                        self.current_level = cl
-                        self.current_player = cp
-                        self.last_player_idx = lpi
-                
-                s = MockState(player_view_env.last_play, player_view_env.current_level, player_view_env.current_player, player_view_env.last_player_idx)
-                action = opponent_mcts._heuristic_policy(lm, s)
-                
-                # We also collect data for Heuristic moves?
-                # If we want to learn "Heuristic moves lead to Loss/Win", yes.
-                vec = state_to_vector(player_view_env)
-                game_data.append((current_p, vec))
-                
-            else:
-                # MCTS Opponent
-                sims = 50
-                mcts_action_info = opponent_mcts.search(player_view_env, num_simulations=sims)
-                action = mcts_action_info
-                
-                vec = state_to_vector(player_view_env)
-                game_data.append((current_p, vec))
-                 
-        env.step(action)
-        
-    # 4. Determine Winner
-    winner_team = -1
-    for i in range(4):
-        if len(env.hands[i]) == 0:
-            winner_team = 0 if i in [0, 2] else 1
-            break
-    
-    # Debug Log
-    if steps >= max_steps:
-        print(f"Game Terminated (Max Steps). Winner: None")
-    else:
-        # print(f"Game Finished. Winner: Team {winner_team}. Steps: {steps}")
-        pass
-        
-    # Return Data
-    if winner_team == -1:
-        labeled_data = [] # Discard draws/incomplete
-    else:
-        labeled_data = []
-        for p, vec in game_data:
-            player_team = 0 if p in [0, 2] else 1
-            if player_team == winner_team:
-                reward = 1.0
-            else:
-                reward = -1.0
-            labeled_data.append((vec, reward))
-    
-    return winner_team, labeled_data
+from GuandanAgent.engine.rl.registry import ModelRegistry
+from GuandanAgent.engine.rl.selfplay import self_play_game, ResignConfig
+from GuandanAgent.engine.rl.actors import SelfPlayFleet
+from GuandanAgent.engine.rl.budget import SimulationBudget
+from GuandanAgent.engine.rl.shared_weights import SharedWeightStore, SharedModel
+from GuandanAgent.engine.rl.distributed import Coordinator, actor_config
+from GuandanAgent.engine.rl.replay import ReplayBuffer, PrioritizedReplayBuffer
+from GuandanAgent.engine.rl.records import GameRecordLog
+from GuandanAgent.engine.rl.checkpoint import capture_rng_state, restore_rng_state, save_checkpoint, load_checkpoint
+from GuandanAgent.engine.rl.metrics import MetricsLog, load_metrics
 
 class TrainingSession:
-    def __init__(self):
+    def __init__(self, buffer_size=2000, dedup=False, sampling='uniform', batch_size=500, updates_per_step=5,
+                 accumulation_steps=1, checkpoint_interval=300, resume=False, resign=None,
+                 search_budget=None, snapshot_pool=8, keep_versions=20):
         self.model_mgr = ModelManager()
         # Ensure directory exists
         base_dir = os.path.dirname(os.path.abspath(__file__))
+        # Serving reads published versions from here, never the working checkpoint
+        self.registry = ModelRegistry(os.path.join(base_dir, "models"))
         data_dir = os.path.join(base_dir, "backend", "data")
         os.makedirs(data_dir, exist_ok=True)
+        # Legacy full-rewrite stats file, only read once to seed the metrics log
         self.stats_file = os.path.join(data_dir, "training_stats.json")
-        self.games_played = 0
-        self.win_rates = []
-        self.win_rate_trend = [] # List of {'game': int, 'win_rate': float}
-        self.replay_buffer = []
-        self.buffer_size = 2000
+        # Append-only per-game metrics, followed by /api/training/stats
+        self.metrics_path = os.path.join(data_dir, "training_metrics.jsonl")
+        self.metrics_log = MetricsLog(self.metrics_path)
+        # Ring buffer memory-mapped under data/replay_buffer: survives restarts
+        self.buffer_size = buffer_size
+        self.sampling = sampling
+        self.batch_size = batch_size
+        self.updates_per_step = updates_per_step
+        self.accumulation_steps = accumulation_steps
+        buffer_cls = PrioritizedReplayBuffer if sampling == 'prioritized' else ReplayBuffer
+        self.replay_buffer = buffer_cls(self.buffer_size, path=os.path.join(base_dir, "data", "replay_buffer"),
+                                        dedup=dedup)
+        if len(self.replay_buffer):
+            print(f"Restored {len(self.replay_buffer)} samples from the replay buffer")
+        # Full game records (deal + moves) so data can be re-featurized later
+        self.game_log = GameRecordLog(os.path.join(base_dir, "data", "games"))
+        # Early resignation / adjudication (None = play every game out)
+        self.resign = resign
+        # SimulationBudget kwargs (base / max_sims / game_budget); one budget per game
+        self.search_budget = search_budget or {}
+        # Shared memory weights for workers / pool opponents (open while a loop runs)
+        self.snapshot_pool = snapshot_pool
+        self.weights = None
+        # Registry versions kept on disk (0 = keep all); never fewer than the snapshot pool
+        self.keep_versions = keep_versions
+        # TCP coordinator for remote actors (distributed loop only)
+        self.coordinator = None
+        # Minibatch sampling RNG (its state is checkpointed)
+        self.rng = np.random.default_rng()
+
+        # Full-session checkpoint: weights, optimizer, buffer position + priorities, RNGs, counters
+        self.checkpoint_path = os.path.join(base_dir, "data", "checkpoint", "session.pt")
+        self.checkpoint_interval = checkpoint_interval
+        self._last_checkpoint = time.time()
+        self._in_update = False
+        self._stop_requested = False
         
-        # Load stats if exist
-        if os.path.exists(self.stats_file):
-            try:
-                with open(self.stats_file, 'r') as f:
-                    data = json.load(f)
-                    self.games_played = data.get('games_played', 0)
-                    self.win_rates = data.get('history', [])
-                    self.win_rate_trend = data.get('trend', [])
-            except:
-                pass
+        if not self.metrics_log.exists() and os.path.exists(self.stats_file):
+            self._import_legacy_stats()
+        self.metrics = load_metrics(self.metrics_path)
+        self.games_played = self.metrics.games_played
+
+        if resume:
+            self.resume()
+
+    # --- Checkpointing ---
+
+    def checkpoint_state(self):
+        return {
+            "model_mgr": self.model_mgr.training_state(),
+            "replay_buffer": self.replay_buffer.checkpoint_state(),
+            "game_log_position": self.game_log.tell(),
+            "rng": capture_rng_state(),
+            "sampler_rng": self.rng.bit_generator.state,
+            "games_played": self.games_played,
+            "metrics_position": self.metrics_log.tell(),
+            "saved_at": time.time(),
+        }
+
+    def save_checkpoint(self):
+        start = time.time()
+        in_update, self._in_update = self._in_update, True # Don't let a stop signal cut the write short
+        try:
+            save_checkpoint(self.checkpoint_path, self.checkpoint_state())
+            self._last_checkpoint = time.time()
+            print(f"Checkpoint saved at game {self.games_played} ({time.time() - start:.2f}s)")
+        except Exception as e:
+            print(f"Error saving checkpoint: {e}")
+        finally:
+            self._in_update = in_update
+
+    def maybe_checkpoint(self):
+        if self.checkpoint_interval and time.time() - self._last_checkpoint >= self.checkpoint_interval:
+            self.save_checkpoint()
+
+    def resume(self):
+        """Restore the session from the last checkpoint (no-op if there is none)."""
+        state = load_checkpoint(self.checkpoint_path)
+        if state is None:
+            print("No checkpoint found. Starting a new session.")
+            return False
+        self.model_mgr.load_training_state(state["model_mgr"])
+        self.replay_buffer.load_checkpoint_state(state["replay_buffer"])
+        # Games recorded after the checkpoint are replayed again, so drop their records
+        self.game_log.truncate(tuple(state["game_log_position"]))
+        restore_rng_state(state["rng"])
+        self.rng.bit_generator.state = state["sampler_rng"]
+        self.metrics_log.truncate(state["metrics_position"])
+        self.metrics = load_metrics(self.metrics_path)
+        self.games_played = state["games_played"]
+        print(f"Resumed from checkpoint at game {self.games_played} ({len(self.replay_buffer)} buffered samples)")
+        return True
+
+    def install_signal_handlers(self):
+        """
+        SIGTERM/SIGINT stop the session at the next safe point. Outside a
+        buffer/model update the current game is abandoned right away; during
+        an update the stop waits until the update has finished.
+        """
+        def handler(signum, frame):
+            self._stop_requested = True
+            if not self._in_update:
+                raise KeyboardInterrupt
+        signal.signal(signal.SIGTERM, handler)
+        signal.signal(signal.SIGINT, handler)
+
+    def _import_legacy_stats(self):
+        try:
+            with open(self.stats_file, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Could not import {self.stats_file}: {e}")
+            return
+        self.metrics_log.append({
+            "event": "import",
+            "games_played": data.get('games_played', 0),
+            "history": data.get('history', []),
+            "trend": data.get('trend', []),
+            "model_version": data.get('model_version'),
+        })
+        print(f"Imported {data.get('games_played', 0)} games of stats into {self.metrics_path}")
 
-    def update_stats(self, winner_team):
+    def update_stats(self, winner_team, info=None):
         self.games_played += 1
         # Track win rate of "Model" (Team 0)
         win = 1 if winner_team == 0 else 0
-        self.win_rates.append(win)
-        if len(self.win_rates) > 100:
-            self.win_rates.pop(0)
-            
-        current_win_rate = sum(self.win_rates) / len(self.win_rates) if self.win_rates else 0
-        
-        # Add to trend
-        self.win_rate_trend.append({
-            'game': self.games_played,
-            'win_rate': current_win_rate
-        })
-        
-        # Keep trend manageable? (Maybe max 1000 points)
-        # For now, let's keep all, it's just two numbers per game. 
-        # Even 10k games is small JSON.
-        
-        stats = {
-            "games_played": self.games_played,
-            "current_win_rate": current_win_rate,
-            "model_version": f"v0.3 (MCTS Fixed, Trained on {self.games_played} games)",
-            "history": self.win_rates,
-            "trend": self.win_rate_trend
-        }
-        
-        # Write to frontend accessible location
+        record = {"game": self.games_played, "win": win}
+        if info:
+            record["outcome"] = info["outcome"]
+            record["steps"] = info["steps"]
+            # Played-out game that would have resigned: was the resignation right?
+            if info["playout"] and info["resign_winner"] != -1 and winner_team != -1:
+                record["false_resign"] = info["resign_winner"] != winner_team
+        self.metrics.apply(record)
+        record["win_rate"] = self.metrics.win_rate
+        record["model_version"] = f"v0.3 (MCTS Fixed, Trained on {self.games_played} games)"
+        # O(1) append; the API keeps its own downsampled view of the log
         try:
-            with open(self.stats_file, 'w') as f:
-                json.dump(stats, f)
+            self.metrics_log.append(record)
         except Exception as e:
             print(f"Error saving stats: {e}")
             
@@ -222,66 +183,253 @@ class TrainingSession:
         if len(self.replay_buffer) < 100:
             return
             
-        print(f"Training on {len(self.replay_buffer)} samples...")
-        
-        # Simple: Use all buffer or batch
-        # For this demo, just take last 500
-        batch = self.replay_buffer[-500:]
-        
-        states = [d[0] for d in batch]
-        targets = [d[1] for d in batch]
+        print(f"Training on {len(self.replay_buffer)} samples ({self.sampling} sampling)...")
         
-        loss = self.model_mgr.train(states, targets, epochs=5)
-        print(f"Loss: {loss:.4f}")
+        # Several sampled minibatches per game: with prioritized sampling the
+        # high-error states get revisited, so each played game teaches more
+        result = self.model_mgr.train_from_buffer(self.replay_buffer, batch_size=self.batch_size,
+                                                  num_batches=self.updates_per_step,
+                                                  accumulation_steps=self.accumulation_steps, rng=self.rng)
+        print(f"Loss: {result['loss']:.4f} ({result['samples_per_sec']:.0f} samples/sec)")
+        self.metrics_log.append({"event": "train", "game": self.games_played, "loss": result['loss'],
+                                 "samples_per_sec": result['samples_per_sec']})
         
-        # Save Model occasionally
-        if self.games_played % 20 == 0:
+        # Save Model occasionally (only if this step actually changed the weights)
+        if result['optimizer_steps'] and self.games_played % 20 == 0:
             self.model_mgr.save_model()
+            self.publish_model()
+
+    def publish_model(self):
+        """Publish the current weights as a new immutable registry version (and to shared memory)."""
+        state_dict = {k: v.detach().cpu() for k, v in self.model_mgr.model.state_dict().items()}
+        version = None
+        try:
+            version = self.registry.publish(state_dict, {"games_played": self.games_played})
+        except Exception as e:
+            print(f"Error publishing model: {e}")
+        if self.weights is not None:
+            if version is None:
+                version = max(self.weights.versions(), default=0) + 1
+            self.weights.publish(state_dict, version)
+        self.prune_registry()
+        if self.coordinator is not None:
+            self.coordinator.publish(state_dict, version if version is not None else self.model_mgr.version)
+
+    def prune_registry(self):
+        """Drop old registry versions; the current one and those still in the snapshot pool stay."""
+        if not self.keep_versions:
+            return
+        in_pool = self.weights.versions() if self.weights is not None else []
+        try:
+            removed = self.registry.prune(keep=max(self.keep_versions, self.snapshot_pool), protect=in_pool)
+        except Exception as e:
+            print(f"Error pruning model registry: {e}")
+            return
+        if removed:
+            print(f"Pruned model versions {removed}")
+
+    def open_shared_weights(self):
+        """
+        Shared memory ring of the last `snapshot_pool` weight versions, seeded
+        with the current weights. Workers map it instead of reading the registry.
+        """
+        state_dict = {k: v.detach().cpu() for k, v in self.model_mgr.model.state_dict().items()}
+        self.weights = SharedWeightStore.create(state_dict, slots=self.snapshot_pool)
+        self.weights.publish(state_dict, self.registry.current_version() or 0)
+        print(f"Shared weights: {self.snapshot_pool} slots, {self.weights.nbytes / 1024:.0f} KiB")
+        return self.weights
+
+    def close_shared_weights(self):
+        if self.weights is not None:
+            self.weights.close()
+            self.weights = None
             
     def run_training_loop(self, num_games=None, opponent_type='mcts'):
         print(f"Starting Training Loop (Mode: vs {opponent_type})...")
+        # "pool": team 1 plays a random past snapshot, team 0 the live weights
+        pool = SharedModel(self.open_shared_weights()) if opponent_type == 'pool' else None
         
         target_games = None
         if num_games:
             target_games = self.games_played + num_games
             print(f"Target: Play {num_games} new games (Stop at {target_games})")
             
-        while True:
-            # Check exit condition
-            if target_games is not None and self.games_played >= target_games:
-                print(f"Completed {num_games} new games. Stopping.")
-                break
-                
-            # 1. Play Game
-            try:
-                winner, new_data = self_play_game(self.model_mgr, opponent_type=opponent_type)
-                print(f"Game {self.games_played + 1} Finished. Winner: Team {winner}")
-                
-                # 2. Update Stats
-                self.update_stats(winner)
-                
-                # 3. Add to Buffer
-                if new_data:
-                    self.replay_buffer.extend(new_data)
-                    if len(self.replay_buffer) > self.buffer_size:
-                        self.replay_buffer = self.replay_buffer[-self.buffer_size:]
-                
-                # 4. Train
-                # Train every 1 game if we have enough data
-                if len(self.replay_buffer) >= 100:
-                    self.train_step()
-                
-            except Exception as e:
-                print(f"Game Error: {e}")
-                import traceback
-                traceback.print_exc()
-                time.sleep(1)
+        try:
+            while True:
+                # Check exit condition
+                if target_games is not None and self.games_played >= target_games:
+                    print(f"Completed {num_games} new games. Stopping.")
+                    break
+                    
+                # 1. Play Game
+                try:
+                    opponent = pool.opponent() if pool is not None else None
+                    winner, new_data, record, info = self_play_game(
+                        self.model_mgr, opponent_type='mcts' if pool is not None else opponent_type,
+                        return_record=True, resign=self.resign, return_info=True,
+                        budget=SimulationBudget(**self.search_budget), opponent_model=opponent)
+                    print(f"Game {self.games_played + 1} Finished ({info['outcome']}, {info['steps']} moves). "
+                          f"Winner: Team {winner}")
+                    self.record_game(winner, new_data, record, info)
+                    
+                except Exception as e:
+                    print(f"Game Error: {e}")
+                    import traceback
+                    traceback.print_exc()
+                    time.sleep(1)
+        except KeyboardInterrupt:
+            print("Interrupted. Stopping...")
+        finally:
+            self.save_checkpoint()
+            self.close_shared_weights()
+
+    def record_game(self, winner, new_data, record=None, info=None):
+        # Stats, buffer and model change together: a stop signal waits for this
+        self._in_update = True
+        try:
+            # 2. Update Stats
+            self.update_stats(winner, info)
+            if record is not None:
+                self.game_log.append(record)
+                self.game_log.flush()
+            
+            # 3. Add to Buffer
+            if new_data:
+                self.replay_buffer.extend(new_data)
+                self.replay_buffer.flush()
+            
+            # 4. Train
+            # Train every 1 game if we have enough data
+            if len(self.replay_buffer) >= 100:
+                self.train_step()
+        finally:
+            self._in_update = False
+
+        self.maybe_checkpoint()
+        if self._stop_requested:
+            raise KeyboardInterrupt
+
+    def run_parallel_training_loop(self, num_workers, num_games=None, opponent_type='mcts'):
+        """
+        Actor/learner mode: `num_workers` processes play games with the latest
+        published weights, this process only trains and publishes.
+        """
+        print(f"Starting Parallel Training Loop ({num_workers} workers, Mode: vs {opponent_type})...")
+        target_games = self.games_played + num_games if num_games else None
+
+        # Serving loads weights from the registry, so make sure there is a version
+        if self.registry.current_version() is None:
+            self.publish_model()
+
+        # Workers map the weights from shared memory: no per-worker copies or disk reloads
+        self.open_shared_weights()
+        fleet = SelfPlayFleet(num_workers, self.registry.root_dir, opponent_type=opponent_type,
+                              queue_size=num_workers * 4, resign=self.resign,
+                              search_budget=self.search_budget, weights_spec=self.weights.spec())
+        fleet.start()
+        try:
+            self._learn_from(fleet, target_games, source="worker")
+        finally:
+            self.save_checkpoint()
+            fleet.stop()
+            self.close_shared_weights()
+
+    def run_distributed_training_loop(self, listen, num_games=None, opponent_type='mcts'):
+        """
+        Learner for remote actors (actor.py on any host): a TCP coordinator
+        hands out weights and seeds and collects the games.
+        """
+        host, port = listen.rsplit(':', 1)
+        if opponent_type == 'pool':
+            print("Snapshot pool opponents need shared memory; remote actors play vs mcts")
+            opponent_type = 'mcts'
+        print(f"Starting Distributed Training Loop (Mode: vs {opponent_type})...")
+        target_games = self.games_played + num_games if num_games else None
+
+        if self.registry.current_version() is None:
+            self.publish_model()
+        self.coordinator = Coordinator(host, int(port), opponent_type=opponent_type,
+                                       config=actor_config(self.resign, self.search_budget))
+        state_dict = {k: v.detach().cpu() for k, v in self.model_mgr.model.state_dict().items()}
+        self.coordinator.publish(state_dict, self.registry.current_version() or 0)
+        self.coordinator.start()
+        try:
+            # Actors come and go: keep waiting while none is connected
+            self._learn_from(self.coordinator, target_games, source="actor", exit_when_idle=False)
+        finally:
+            self.save_checkpoint()
+            self.coordinator.stop()
+            self.coordinator = None
+
+    def _learn_from(self, fleet, target_games, source="worker", exit_when_idle=True):
+        """Train on games from a SelfPlayFleet or Coordinator until target_games."""
+        start_time = time.time()
+        start_games = self.games_played
+        try:
+            while target_games is None or self.games_played < target_games:
+                item = fleet.get(timeout=5)
+                if item is None:
+                    if fleet.alive() == 0:
+                        if exit_when_idle:
+                            print(f"All self-play {source}s exited. Stopping.")
+                            break
+                        print(f"Waiting for {source}s...")
+                    continue
+                worker_id, winner, new_data, version, record, info = item
+                elapsed = max(time.time() - start_time, 1e-6)
+                rate = (self.games_played + 1 - start_games) / elapsed * 3600
+                print(f"Game {self.games_played + 1} Finished ({source} {worker_id}, model v{version}, "
+                      f"{info['outcome']}). Winner: Team {winner} [{rate:.0f} games/h]")
+                try:
+                    self.record_game(winner, new_data, record, info)
+                except Exception as e:
+                    print(f"Training Error: {e}")
+                    import traceback
+                    traceback.print_exc()
+        except KeyboardInterrupt:
+            print(f"Interrupted. Stopping {source}s...")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Guandan RL Training')
     parser.add_argument('--games', type=int, default=None, help='Number of games to play (default: infinite)')
-    parser.add_argument('--opponent', type=str, default='mcts', choices=['heuristic', 'mcts'], help='Opponent type: heuristic or mcts (default: mcts)')
+    parser.add_argument('--opponent', type=str, default='mcts', choices=['heuristic', 'mcts', 'pool'], help='Opponent type: heuristic, mcts (same weights) or pool (past snapshots) (default: mcts)')
+    parser.add_argument('--workers', type=int, default=0, help='Self-play worker processes (default: 0 = play in this process)')
+    parser.add_argument('--buffer-size', type=int, default=2000, help='Replay buffer capacity for a new buffer (default: 2000)')
+    parser.add_argument('--dedup', action='store_true', help='Skip samples whose state is already in the replay buffer')
+    parser.add_argument('--sampling', type=str, default='uniform', choices=['uniform', 'prioritized'], help='Replay sampling: uniform or prioritized by last error (default: uniform)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Minibatch size per update (default: 500)')
+    parser.add_argument('--updates-per-step', type=int, default=5, help='Minibatches trained on after each game (default: 5)')
+    parser.add_argument('--accumulation-steps', type=int, default=1, help='Minibatches per optimizer step (default: 1)')
+    parser.add_argument('--resume', action='store_true', help='Continue from the last full checkpoint if there is one')
+    parser.add_argument('--checkpoint-interval', type=float, default=300, help='Seconds between full checkpoints (default: 300, 0 = only on exit)')
+    parser.add_argument('--resign-threshold', type=float, default=None, help='Resign once |estimate| stays above this (default: off)')
+    parser.add_argument('--resign-moves', type=int, default=6, help='Consecutive decisive moves before resigning (default: 6)')
+    parser.add_argument('--resign-signal', type=str, default='value', choices=['value', 'strength'], help='Resignation estimate: value net or hand-size margin (default: value)')
+    parser.add_argument('--resign-playout', type=float, default=0.1, help='Fraction of games played out anyway to measure false resignations (default: 0.1)')
+    parser.add_argument('--sims', type=int, default=50, help='MCTS simulations for an average move, scaled per move by difficulty (default: 50)')
+    parser.add_argument('--max-sims', type=int, default=200, help='Most simulations for one move (default: 200)')
+    parser.add_argument('--game-sims', type=int, default=None, help='Simulation budget per team per game (default: unlimited)')
+    parser.add_argument('--snapshot-pool', type=int, default=8, help='Weight versions kept in shared memory for workers and pool opponents (default: 8)')
+    parser.add_argument('--keep-versions', type=int, default=20, help='Published model versions kept in models/ (default: 20, 0 = keep all)')
+    parser.add_argument('--listen', type=str, default=None, help='HOST:PORT to accept remote actors (actor.py) instead of local workers')
     args = parser.parse_args()
+
+    resign = None
+    if args.resign_threshold is not None:
+        resign = ResignConfig(threshold=args.resign_threshold, consecutive=args.resign_moves,
+                              signal=args.resign_signal, playout_fraction=args.resign_playout)
     
-    session = TrainingSession()
-    session.run_training_loop(num_games=args.games, opponent_type=args.opponent)
+    session = TrainingSession(buffer_size=args.buffer_size, dedup=args.dedup, sampling=args.sampling,
+                              batch_size=args.batch_size, updates_per_step=args.updates_per_step,
+                              accumulation_steps=args.accumulation_steps,
+                              checkpoint_interval=args.checkpoint_interval, resume=args.resume, resign=resign,
+                              search_budget={"base": args.sims, "max_sims": args.max_sims,
+                                             "game_budget": args.game_sims},
+                              snapshot_pool=args.snapshot_pool, keep_versions=args.keep_versions)
+    session.install_signal_handlers()
+    if args.listen:
+        session.run_distributed_training_loop(args.listen, num_games=args.games, opponent_type=args.opponent)
+    elif args.workers > 0:
+        session.run_parallel_training_loop(args.workers, num_games=args.games, opponent_type=args.opponent)
+    else:
+        session.run_training_loop(num_games=args.games, opponent_type=args.opponent)
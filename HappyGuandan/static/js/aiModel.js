@@ -3,7 +3,23 @@ window.aiModel = {
 
   async loadModel() {
     const res = await fetch('assets/ai/model_weights.json');
-    this.weights = await res.json();
+    this.weights = this.dequantize(await res.json());
+  },
+
+  // 量化权重（scripts/quantize.py 导出）在加载时还原成浮点矩阵
+  dequantize(w) {
+    if (w.format !== 'int8') return w;
+    const out = {};
+    for (const key of Object.keys(w)) {
+      if (key.endsWith('_weight_q')) {
+        const name = key.slice(0, -'_q'.length);
+        const scale = w[name + '_scale'];
+        out[name] = w[key].map((row, i) => row.map(q => q * scale[i]));
+      } else if (!key.endsWith('_weight_scale') && key !== 'format') {
+        out[key] = w[key];
+      }
+    }
+    return out;
   },
 
   predict(stateVec) {
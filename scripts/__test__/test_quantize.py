@@ -0,0 +1,46 @@
+import unittest
+import os
+import json
+import numpy as np
+import torch
+from scripts import quantize
+from scripts.simple_mlp import SimpleMLP
+
+
+class TestQuantize(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.model = SimpleMLP(input_dim=20, output_dim=5)
+        self.X = np.random.RandomState(0).rand(64, 20).astype(np.float32)
+        self.outfile = 'output/test_quantized_weights.json'
+        os.makedirs('output', exist_ok=True)
+
+    def tearDown(self):
+        if os.path.exists(self.outfile):
+            os.remove(self.outfile)
+
+    def test_quantize_simple_mlp_report(self):
+        qmodel, report = quantize.quantize_simple_mlp(self.model, self.X, mode="int8")
+        with torch.no_grad():
+            expected = self.model(torch.from_numpy(self.X)).numpy()
+        np.testing.assert_allclose(qmodel.forward(self.X), expected, atol=0.02)
+        self.assertIn('argmax_agreement', report)
+
+    def test_export_quantized_weights_dequantizes(self):
+        qmodel, _ = quantize.quantize_simple_mlp(self.model, self.X, mode="int8")
+        quantize.export_quantized_weights(qmodel, self.outfile)
+        with open(self.outfile, 'r') as f:
+            data = json.load(f)
+
+        self.assertEqual(data['format'], 'int8')
+        q = np.array(data['layer0_weight_q'])
+        scale = np.array(data['layer0_weight_scale'])
+        self.assertEqual(q.shape, (128, 20))
+        w = self.model.state_dict()['model.layer0.weight'].numpy()
+        # 校准可能会裁剪极少数离群权重
+        close = np.abs(q * scale[:, None] - w) <= scale[:, None]
+        self.assertGreater(close.mean(), 0.95)
+
+
+if __name__ == '__main__':
+    unittest.main()
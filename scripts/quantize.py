@@ -0,0 +1,58 @@
+# === scripts/quantize.py ===
+import json
+import os
+
+import numpy as np
+
+from GuandanAgent.engine.rl.numpy_net import NumpyMLP
+from GuandanAgent.engine.rl.quantize import calibrate, accuracy_report, format_report
+
+# SimpleMLP 的层结构（与 simple_mlp.py 中的 OrderedDict 命名一致）
+SIMPLE_MLP_LAYERS = [("layer0", "relu"), ("hidden", "relu"), ("layer2", "sigmoid")]
+
+
+def simple_mlp_to_numpy(model):
+    """把 SimpleMLP 转成 NumPy 推理模型"""
+    state_dict = model.state_dict()
+    return NumpyMLP([
+        (state_dict[f"model.{name}.weight"], state_dict[f"model.{name}.bias"], act)
+        for name, act in SIMPLE_MLP_LAYERS
+    ])
+
+
+def quantize_simple_mlp(model, X, mode="int8"):
+    """
+    量化 SimpleMLP（int8 按通道 或 float16），用 X 做校准。
+    返回 (量化模型, 精度报告)
+    """
+    float_model = simple_mlp_to_numpy(model)
+    qmodel = calibrate(float_model, X, mode=mode)
+    report = accuracy_report(float_model, qmodel, X)
+    print(format_report(report))
+    return qmodel, report
+
+
+def export_quantized_weights(qmodel, filepath):
+    """
+    导出量化权重给 JS 前端（aiModel.js 会在加载时反量化）。
+    int8: layerX_weight_q（整数）+ layerX_weight_scale（每个输出通道一个缩放系数）
+    float16: layerX_weight（保留 4 位有效数字即可）
+    """
+    weights = {"format": qmodel.mode}
+    for (name, _), layer in zip(SIMPLE_MLP_LAYERS, qmodel.layers):
+        w = layer["weight"].T  # 恢复成 [out, in]，与 export_weights 相同
+        if qmodel.mode == "int8":
+            weights[f"{name}_weight_q"] = w.astype(int).tolist()
+            weights[f"{name}_weight_scale"] = layer["scale"].tolist()
+        else:
+            weights[f"{name}_weight"] = [[float(f"{v:.4g}") for v in row] for row in w.astype(np.float32)]
+        weights[f"{name}_bias"] = layer["bias"].tolist()
+
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    temp_path = filepath + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(weights, f, separators=(',', ':'))
+    os.replace(temp_path, filepath)
+
+    print(f"✅ 量化权重已导出到 {filepath}，文件大小: {os.path.getsize(filepath) / 1024:.2f} KB")
+    return True